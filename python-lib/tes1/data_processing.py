@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 import io
 
+from services.gap_index import GapIndex, fill_at_positions
+
 
 def handle_null_values(csv_content: str) -> str:
     """
@@ -281,11 +283,18 @@ def flag_missing_values_in_range(df: pd.DataFrame, logs_to_check: list, flag_col
     return df_out
 
 
-def fill_flagged_missing_values(df: pd.DataFrame, logs_to_fill: list, max_consecutive_nan: int = 3) -> pd.DataFrame:
+def fill_flagged_missing_values(df: pd.DataFrame, logs_to_fill: list, max_consecutive_nan: int = 3,
+                                method: str = 'bfill', fill_value: float = np.nan,
+                                gap_index: GapIndex = None) -> pd.DataFrame:
     """
     Mengisi nilai null pada kolom yang dipilih, TAPI HANYA jika:
     1. Baris tersebut memiliki MISSING_FLAG == 1.
     2. Jumlah nilai null yang berurutan <= max_consecutive_nan.
+
+    Run NaN setiap log diambil dari GapIndex (dibangun sekali bila tidak
+    diberikan); hanya posisi di gap pendek yang diisi. method: 'bfill'
+    (nilai valid berikutnya, default), 'ffill', 'linear' atau 'constant'
+    (fill_value).
     """
     df_out = df.copy()
 
@@ -300,23 +309,15 @@ def fill_flagged_missing_values(df: pd.DataFrame, logs_to_fill: list, max_consec
     print(
         f"--> Mengisi nilai hilang untuk baris dengan flag 1 (maks {max_consecutive_nan} NaN berurutan).")
 
-    # Masker dasar: hanya pertimbangkan baris dengan flag 1
-    base_fill_mask = (df_out['MISSING_FLAG'] == 1)
+    if gap_index is None:
+        gap_index = GapIndex(df_out, existing_logs)
 
     for col in existing_logs:
-        is_nan = df_out[col].isnull()
-        group_id = (is_nan != is_nan.shift()).cumsum()
-        group_size = group_id.map(group_id.value_counts())
-
-        # Masker untuk NaN yang berada dalam grup kecil (boleh diisi)
-        nan_in_small_gap_mask = (is_nan) & (group_size <= max_consecutive_nan)
-
-        # Kondisi final: baris harus punya flag 1 DAN merupakan bagian dari celah kecil
-        final_col_mask = base_fill_mask & nan_in_small_gap_mask
-
-        if final_col_mask.any():
-            temp_col = df_out[col].copy()
-            filled_temp_col = temp_col.bfill().ffill()
-            df_out.loc[final_col_mask, col] = filled_temp_col[final_col_mask]
+        # Baris NaN ber-flag 1 di dalam run NaN yang cukup pendek
+        positions = gap_index.short_gap_positions(col, max_consecutive_nan)
+        if len(positions):
+            values = df_out[col].to_numpy(dtype=float, copy=True)
+            values[positions] = fill_at_positions(values, positions, method, fill_value)
+            df_out[col] = values
 
     return df_out
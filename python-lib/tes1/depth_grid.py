@@ -0,0 +1,166 @@
+# File: services/depth_grid.py
+# Description: Grid kedalaman reguler berbasis indeks bilangan bulat. Kurva
+# dari run atau sumur dengan sampling berbeda (mis. 0.1524 m vs 0.1 m)
+# di-resample ke grid yang sama (linear, nearest, block average) sehingga
+# penggabungan dilakukan per indeks grid, bukan per nilai float DEPTH.
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RESAMPLE_METHODS = ('linear', 'nearest', 'block')
+GRID_INDEX_COL = 'GRID_INDEX'
+
+
+class DepthGrid:
+    """
+    Grid kedalaman depth[i] = origin + i * step untuk i = start..stop-1.
+    Indeks dihitung dari origin, sehingga dua grid dengan origin dan step
+    sama selalu cocok per indeks tanpa membandingkan float.
+    """
+
+    def __init__(self, origin: float, step: float, start: int, stop: int):
+        if step <= 0:
+            raise ValueError("Step grid harus lebih besar dari nol.")
+        self.origin = float(origin)
+        self.step = float(step)
+        self.start = int(start)
+        self.stop = max(int(stop), int(start))
+
+    @classmethod
+    def spanning(cls, depths: Iterable, step: float, origin: float = 0.0) -> 'DepthGrid':
+        """Semua titik grid (origin dan step tetap) di antara kedalaman valid teratas dan terbawah."""
+        depth_arrays = [np.asarray(d, dtype=float) for d in depths]
+        finite = [d[np.isfinite(d)] for d in depth_arrays]
+        finite = [d for d in finite if len(d)]
+        if not finite:
+            return cls(origin, step, 0, 0)
+        top = min(d.min() for d in finite)
+        bottom = max(d.max() for d in finite)
+        return cls(origin, step, np.ceil((top - origin) / step - 1e-9),
+                   np.floor((bottom - origin) / step + 1e-9) + 1)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __repr__(self) -> str:
+        return f"DepthGrid(origin={self.origin}, step={self.step}, start={self.start}, stop={self.stop})"
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Indeks bilangan bulat setiap titik grid."""
+        return np.arange(self.start, self.stop, dtype=np.int64)
+
+    @property
+    def depths(self) -> np.ndarray:
+        """Kedalaman setiap titik grid (dihitung dari indeks, tanpa akumulasi error)."""
+        return self.origin + self.indices * self.step
+
+    def index_of(self, depth) -> np.ndarray:
+        """Indeks grid terdekat untuk setiap kedalaman (-1 untuk NaN)."""
+        depth = np.asarray(depth, dtype=float)
+        position = np.rint((depth - self.origin) / self.step)
+        return np.where(np.isfinite(position), position, -1).astype(np.int64)
+
+
+def _linear(depth, values, grid_depth):
+    """
+    (Internal) Interpolasi linear. Titik grid di luar rentang data atau yang
+    bersebelahan dengan sampel NaN menjadi NaN (gap tidak dijembatani).
+    """
+    missing = np.isnan(values)
+    out = np.interp(grid_depth, depth, np.where(missing, 0.0, values), left=np.nan, right=np.nan)
+    out[np.interp(grid_depth, depth, missing.astype(float)) > 0] = np.nan
+    return out
+
+
+def _nearest(depth, values, grid_depth, tolerance):
+    """(Internal) Sampel terdekat, hanya bila jaraknya <= tolerance."""
+    right = np.minimum(np.searchsorted(depth, grid_depth), len(depth) - 1)
+    left = np.maximum(right - 1, 0)
+    pick = np.where(np.abs(grid_depth - depth[left]) <= np.abs(depth[right] - grid_depth), left, right)
+    out = values[pick]
+    out[np.abs(depth[pick] - grid_depth) > tolerance] = np.nan
+    return out
+
+
+def _block_average(depth, values, grid: DepthGrid):
+    """(Internal) Rata-rata semua sampel non-NaN yang jatuh di sel setiap titik grid."""
+    position = grid.index_of(depth) - grid.start
+    valid = (position >= 0) & (position < len(grid)) & ~np.isnan(values)
+    sums = np.bincount(position[valid], weights=values[valid], minlength=len(grid))
+    counts = np.bincount(position[valid], minlength=len(grid))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def resample_curve(depth, values, grid: DepthGrid, method: str = 'linear',
+                   tolerance: Optional[float] = None) -> np.ndarray:
+    """
+    Resample satu kurva ke grid.
+
+    Args:
+        method (str): 'linear', 'nearest' atau 'block' (rata-rata per sel).
+        tolerance (float, optional): Jarak maksimum untuk 'nearest'
+            (default setengah step).
+
+    Returns:
+        np.ndarray: Nilai kurva di setiap titik grid (panjang len(grid)).
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"Metode resampling tidak dikenal: {method}")
+    depth = np.asarray(depth, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = np.isfinite(depth)
+    depth, values = depth[keep], values[keep]
+    if len(depth) == 0 or len(grid) == 0:
+        return np.full(len(grid), np.nan)
+    if method == 'block':
+        return _block_average(depth, values, grid)
+
+    order = np.argsort(depth, kind='stable')
+    depth, values = depth[order], values[order]
+    if method == 'nearest':
+        return _nearest(depth, values, grid.depths, grid.step / 2 if tolerance is None else tolerance)
+    return _linear(depth, values, grid.depths)
+
+
+def resample_frame(df: pd.DataFrame, grid: DepthGrid, columns: Optional[List[str]] = None,
+                   method: str = 'linear', depth_col: str = 'DEPTH') -> pd.DataFrame:
+    """
+    Resample kolom numerik sebuah DataFrame ke grid.
+
+    Returns:
+        pd.DataFrame: GRID_INDEX, depth_col (kedalaman grid) dan kolom yang di-resample.
+    """
+    if columns is None:
+        columns = [c for c in df.columns
+                   if c != depth_col and pd.api.types.is_numeric_dtype(df[c])
+                   and not pd.api.types.is_bool_dtype(df[c])]
+    depth = df[depth_col].to_numpy(dtype=float)
+    result = {GRID_INDEX_COL: grid.indices, depth_col: grid.depths}
+    for col in columns:
+        result[col] = resample_curve(depth, df[col].to_numpy(dtype=float), grid, method)
+    return pd.DataFrame(result)
+
+
+def join_on_grid(frames: Dict[str, pd.DataFrame], step: float, method: str = 'linear',
+                 origin: float = 0.0, depth_col: str = 'DEPTH') -> pd.DataFrame:
+    """
+    Menggabungkan beberapa DataFrame (mis. run atau sumur) pada satu grid.
+    Kolom tiap frame diberi awalan '<nama>_' bila nama kolomnya bentrok.
+
+    Returns:
+        pd.DataFrame: GRID_INDEX, depth_col dan semua kolom yang di-resample.
+    """
+    grid = DepthGrid.spanning([df[depth_col] for df in frames.values()], step, origin)
+    seen = set()
+    result = {GRID_INDEX_COL: grid.indices, depth_col: grid.depths}
+    for name, df in frames.items():
+        resampled = resample_frame(df, grid, method=method, depth_col=depth_col)
+        for col in resampled.columns[2:]:
+            out_col = f"{name}_{col}" if col in seen or col in result else col
+            result[out_col] = resampled[col].to_numpy()
+            seen.add(col)
+    return pd.DataFrame(result)
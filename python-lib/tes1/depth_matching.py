@@ -1,11 +1,19 @@
-import lasio
 import numpy as np
 import pandas as pd
 from dtaidistance import dtw
-from scipy.interpolate import interp1d
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from services.well_store import read_well
+from services.dtw_engine import DEFAULT_RADIUS, path_to_positions, warp_positions
+from services.depth_grid import DepthGrid, resample_curve
+
+try:
+    from dtaidistance import dtw_cc  # noqa: F401  (pustaka C dtaidistance)
+    DTW_C_AVAILABLE = True
+except ImportError:
+    DTW_C_AVAILABLE = False
 
 
 def normalize(series):
@@ -16,72 +24,91 @@ def normalize(series):
     return (series - np.mean(series)) / std_dev
 
 
-def depth_matching(ref_las_path: str, lwd_las_path: str, num_chunks: int = 10):
+def depth_matching(ref_las_path: str, lwd_las_path: str, num_chunks: int = 10,
+                   method: str = 'chunked', windows: int = 1, overlap: float = 0.25,
+                   radius: int = DEFAULT_RADIUS, max_workers: int = None,
+                   use_processes: bool = False, step: float = None,
+                   resample_method: str = 'linear'):
     """
     Menjalankan logika DTW dan mengembalikan tiga DataFrame: 
     data referensi, data LWD asli, dan data hasil alignment.
+
+    method='chunked' menjalankan DTW penuh per chunk (num_chunks); chunk
+    di-align paralel dengan thread pool (atau process pool bila
+    use_processes=True), max_workers=1 untuk serial.
+    method='multiscale' memakai DTW coarse-to-fine berband (dtw_engine) pada
+    seluruh log resolusi penuh; windows > 1 membaginya menjadi jendela yang
+    tumpang tindih sebesar overlap.
+
+    step (opsional) me-resample log referensi dan LWD ke grid kedalaman yang
+    sama (kelipatan step, metode resample_method) sebelum DTW, sehingga kedua
+    log punya interval sampling sama dan hasil digabung per indeks grid.
     """
     try:
-        ref_las = lasio.read(ref_las_path)
-        lwd_las = lasio.read(lwd_las_path)
-
-        ref_df = ref_las.df().reset_index()[["DEPT", "GR_CAL"]].dropna()
+        # Hanya kolom yang dipakai yang dibaca dari salinan kolumnar
+        ref_df = read_well(ref_las_path, columns=["DEPT", "GR_CAL"])[0].dropna()
         ref_df.columns = ["Depth", "GR"]
 
-        lwd_df = lwd_las.df().reset_index()[["DEPT", "DGRCC"]].dropna()
+        lwd_df = read_well(lwd_las_path, columns=["DEPT", "DGRCC"])[0].dropna()
         lwd_df.columns = ["Depth", "DGRCC"]
 
+        grid = None
+        if step is not None:
+            ref_df, grid = _resample_to_grid(ref_df, "GR", step, resample_method)
+            lwd_df, _ = _resample_to_grid(lwd_df, "DGRCC", step, resample_method)
+
+        if method == 'multiscale':
+            return ref_df, lwd_df, _multiscale_alignment(ref_df, lwd_df, windows, overlap, radius)
+        if method != 'chunked':
+            raise ValueError(f"Metode depth matching tidak dikenal: {method}")
+        if not DTW_C_AVAILABLE:
+            print("Peringatan: Pustaka C dtaidistance tidak tersedia, "
+                  "DTW chunk memakai versi Python (lebih lambat).")
+
         N_ref = len(ref_df)
         N_lwd = len(lwd_df)
 
         ref_chunk_size = N_ref // num_chunks
         lwd_chunk_size = N_lwd // num_chunks
 
-        all_chunks = []
+        ref_depth = ref_df["Depth"].to_numpy()
+        ref_gr = ref_df["GR"].to_numpy()
+        lwd_dgrcc = lwd_df["DGRCC"].to_numpy()
 
+        chunk_args = []
         for i in range(num_chunks):
             ref_start = i * ref_chunk_size
             ref_end = N_ref if i == num_chunks - \
                 1 else (i + 1) * ref_chunk_size
-            ref_chunk = ref_df.iloc[ref_start:ref_end]
 
             lwd_start = i * lwd_chunk_size
             lwd_end = N_lwd if i == num_chunks - \
                 1 else (i + 1) * lwd_chunk_size
-            lwd_chunk = lwd_df.iloc[lwd_start:lwd_end]
 
-            if len(ref_chunk) < 2 or len(lwd_chunk) < 2:
+            if ref_end - ref_start < 2 or lwd_end - lwd_start < 2:
                 continue
-
-            ref_signal = normalize(ref_chunk["GR"].values)
-            lwd_signal = normalize(lwd_chunk["DGRCC"].values)
-
-            path = dtw.warping_path(lwd_signal, ref_signal)
-
-            aligned_depths = []
-            aligned_dgrcc = []
-            for lwd_idx, ref_idx in path:
-                aligned_depths.append(ref_chunk.iloc[ref_idx]["Depth"])
-                aligned_dgrcc.append(lwd_chunk.iloc[lwd_idx]["DGRCC"])
-
-            aligned_df = pd.DataFrame({
-                "Depth": aligned_depths,
-                "Aligned_DGRCC": aligned_dgrcc
-            }).sort_values(by="Depth")
-
-            interp_func = interp1d(aligned_df["Depth"], aligned_df["Aligned_DGRCC"],
-                                   kind='linear', bounds_error=False, fill_value="extrapolate")
-            interp_dgrcc = interp_func(ref_chunk["Depth"].values)
-
-            chunk_result = pd.DataFrame({
-                "Depth": ref_chunk["Depth"].values,
-                "REF_GR": ref_chunk["GR"].values,
-                "LWD_DGRCC_Aligned": interp_dgrcc
-            })
-
-            all_chunks.append(chunk_result)
-
-            final_df = pd.concat(all_chunks, ignore_index=True)
+            chunk_args.append((ref_depth[ref_start:ref_end], ref_gr[ref_start:ref_end],
+                               lwd_dgrcc[lwd_start:lwd_end]))
+
+        if not chunk_args:
+            raise ValueError("Tidak ada chunk dengan data yang cukup untuk di-align.")
+
+        # Chunk saling independen: di-align paralel, urutan hasil tetap
+        max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(chunk_args)))
+        if max_workers == 1:
+            all_chunks = [_align_chunk(*args) for args in chunk_args]
+        else:
+            executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with executor_cls(max_workers=max_workers) as executor:
+                all_chunks = list(executor.map(_align_chunk, *zip(*chunk_args)))
+
+        # Dirakit sekali di akhir
+        final_df = pd.concat(all_chunks, ignore_index=True)
+        if grid is not None:
+            # Baris ganda ditentukan dari indeks grid, bukan kesamaan float Depth
+            _, first = np.unique(grid.index_of(final_df["Depth"].to_numpy()), return_index=True)
+            final_df = final_df.iloc[first].reset_index(drop=True)
+        else:
             final_df = final_df.drop_duplicates(
                 subset="Depth").sort_values(by="Depth")
 
@@ -92,6 +119,51 @@ def depth_matching(ref_las_path: str, lwd_las_path: str, num_chunks: int = 10):
     return ref_df, lwd_df, final_df
 
 
+def _resample_to_grid(df, value_col, step, method):
+    """(Internal) Resample satu log (Depth, value_col) ke grid kelipatan step."""
+    grid = DepthGrid.spanning([df["Depth"].to_numpy()], step)
+    values = resample_curve(df["Depth"].to_numpy(), df[value_col].to_numpy(), grid, method)
+    resampled = pd.DataFrame({"Depth": grid.depths, value_col: values}).dropna()
+    return resampled.reset_index(drop=True), grid
+
+
+def _align_chunk(ref_depth, ref_gr, lwd_dgrcc):
+    """
+    (Internal) DTW satu chunk. Path diringkas menjadi satu posisi LWD
+    (rata-rata) per sampel referensi, seperti path_to_positions pada
+    dtw_engine, lalu DGRCC diambil pada posisi itu. Interpolasi terhadap
+    kedalaman dengan titik ganda (satu sampel referensi dipasangkan ke
+    beberapa sampel LWD) tidak lagi menghasilkan NaN. Pustaka C
+    dtaidistance (use_c=True) memberi path yang sama dengan versi Python
+    dan melepas GIL, sehingga chunk benar-benar berjalan paralel di thread;
+    tanpa pustaka C dipakai versi Python.
+    """
+    path = np.asarray(dtw.warping_path(normalize(lwd_dgrcc), normalize(ref_gr),
+                                       use_c=DTW_C_AVAILABLE), dtype=np.int64)
+    # Kolom path: (indeks LWD, indeks referensi)
+    positions = path_to_positions(path[:, ::-1], len(ref_depth))
+    interp_dgrcc = np.interp(positions, np.arange(len(lwd_dgrcc)), lwd_dgrcc)
+
+    return pd.DataFrame({
+        "Depth": ref_depth,
+        "REF_GR": ref_gr,
+        "LWD_DGRCC_Aligned": interp_dgrcc
+    })
+
+
+def _multiscale_alignment(ref_df, lwd_df, windows, overlap, radius):
+    """(Internal) Alignment seluruh log dengan DTW multi-resolusi berband."""
+    positions = warp_positions(normalize(ref_df["GR"].values), normalize(lwd_df["DGRCC"].values),
+                               num_windows=windows, overlap=overlap, radius=radius)
+    # Posisi LWD fraksional untuk setiap sampel referensi -> nilai DGRCC
+    aligned = np.interp(positions, np.arange(len(lwd_df)), lwd_df["DGRCC"].values)
+    return pd.DataFrame({
+        "Depth": ref_df["Depth"].values,
+        "REF_GR": ref_df["GR"].values,
+        "LWD_DGRCC_Aligned": aligned
+    })
+
+
 def plot_depth_matching_results(ref_df, lwd_df, final_df):
     """
     Menerima 3 DataFrame dan membuat plot 4-panel yang komprehensif.
@@ -0,0 +1,188 @@
+# File: services/depth_matching_batch.py
+# Description: Depth matching banyak sumur dan banyak kurva sekaligus. Fungsi
+# pergeseran kedalaman dihitung sekali per sumur dari kurva korelasi (GR), lalu
+# diterapkan ke semua kurva LWD lain (resistivitas, densitas, neutron). Sumur
+# diproses paralel dengan ProcessPoolExecutor.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.depth_matching import normalize
+from services.dtw_engine import DEFAULT_RADIUS, warp_positions
+from services.las_reader import scan_las_header
+from services.well_store import read_well
+
+# Nama kurva output -> kandidat mnemonic di file LAS (yang pertama ada dipakai)
+DEFAULT_MNEMONIC_MAP = {
+    'correlation': {'ref': ['GR_CAL', 'GR'], 'lwd': ['DGRCC', 'GR']},
+    'curves': {
+        'GR': ['DGRCC', 'GR'],
+        'RT': ['R39PC', 'RT'],
+        'RHOB': ['ALCDLC', 'RHOB'],
+        'NPHI': ['TNPL', 'NPHI'],
+    },
+}
+
+
+def _resolve_mnemonic(available: List[str], candidates) -> Optional[str]:
+    """(Internal) Mnemonic pertama dari kandidat yang ada di file."""
+    if isinstance(candidates, str):
+        candidates = [candidates]
+    return next((c for c in candidates if c in available), None)
+
+
+def depth_shift_function(ref_corr, lwd_depth, lwd_corr, windows: int = 1, overlap: float = 0.25,
+                         radius: int = DEFAULT_RADIUS) -> np.ndarray:
+    """
+    Kedalaman LWD yang cocok untuk setiap sampel referensi, dari DTW
+    multi-resolusi pada kurva korelasi yang dinormalisasi.
+    """
+    positions = warp_positions(normalize(np.asarray(ref_corr, dtype=float)),
+                               normalize(np.asarray(lwd_corr, dtype=float)),
+                               num_windows=windows, overlap=overlap, radius=radius)
+    return np.interp(positions, np.arange(len(lwd_depth)), lwd_depth)
+
+
+def apply_depth_shift(matched_depth, lwd_depth, values) -> np.ndarray:
+    """
+    Mengambil kurva LWD pada kedalaman hasil matching (interpolasi linear).
+    Sampel yang bersebelahan dengan NaN atau di luar rentang LWD menjadi NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    shifted = np.interp(matched_depth, lwd_depth, np.where(missing, 0.0, values),
+                        left=np.nan, right=np.nan)
+    touches_missing = np.interp(matched_depth, lwd_depth, missing.astype(float)) > 0
+    shifted[touches_missing] = np.nan
+    return shifted
+
+
+def match_well_pair(ref_las_path: str, lwd_las_path: str, mnemonic_map: Dict = None,
+                    windows: int = 1, overlap: float = 0.25,
+                    radius: int = DEFAULT_RADIUS) -> pd.DataFrame:
+    """
+    Depth matching satu pasangan sumur untuk semua kurva di mnemonic_map.
+
+    Returns:
+        pd.DataFrame: DEPTH (referensi), LWD_DEPTH (kedalaman LWD yang cocok),
+        DEPTH_SHIFT, REF_<kurva korelasi> dan setiap kurva LWD yang sudah
+        digeser, dengan nama sesuai mnemonic_map['curves'].
+    """
+    mnemonic_map = mnemonic_map or DEFAULT_MNEMONIC_MAP
+    ref_curves = [c['mnemonic'] for c in scan_las_header(ref_las_path)['curves']]
+    lwd_curves = [c['mnemonic'] for c in scan_las_header(lwd_las_path)['curves']]
+    ref_corr = _resolve_mnemonic(ref_curves, mnemonic_map['correlation']['ref'])
+    lwd_corr = _resolve_mnemonic(lwd_curves, mnemonic_map['correlation']['lwd'])
+    if ref_corr is None or lwd_corr is None:
+        raise ValueError(f"Kurva korelasi tidak ditemukan (ref: {ref_corr}, lwd: {lwd_corr}).")
+
+    # Tanpa 'curves', semua kurva LWD digeser dengan nama aslinya
+    curve_map = mnemonic_map.get('curves') or {c: [c] for c in lwd_curves[1:]}
+    output_curves = {}
+    for name, candidates in curve_map.items():
+        mnemonic = _resolve_mnemonic(lwd_curves, candidates)
+        if mnemonic is not None:
+            output_curves[name] = mnemonic
+
+    ref_depth_col, lwd_depth_col = ref_curves[0], lwd_curves[0]
+    ref_df = read_well(ref_las_path, columns=[ref_depth_col, ref_corr])[0].dropna()
+    lwd_columns = list(dict.fromkeys([lwd_depth_col, lwd_corr, *output_curves.values()]))
+    lwd_df = read_well(lwd_las_path, columns=lwd_columns)[0]
+    lwd_df = lwd_df.dropna(subset=[lwd_depth_col]).sort_values(lwd_depth_col)
+    corr_df = lwd_df.dropna(subset=[lwd_corr])
+    if len(ref_df) < 2 or len(corr_df) < 2:
+        raise ValueError("Data kurva korelasi tidak cukup untuk depth matching.")
+
+    ref_depth = ref_df[ref_depth_col].to_numpy(dtype=float)
+    matched_depth = depth_shift_function(ref_df[ref_corr].to_numpy(dtype=float),
+                                         corr_df[lwd_depth_col].to_numpy(dtype=float),
+                                         corr_df[lwd_corr].to_numpy(dtype=float),
+                                         windows, overlap, radius)
+
+    # Fungsi pergeseran yang sama untuk setiap kurva LWD
+    lwd_depth = lwd_df[lwd_depth_col].to_numpy(dtype=float)
+    result = {
+        'DEPTH': ref_depth,
+        'LWD_DEPTH': matched_depth,
+        'DEPTH_SHIFT': ref_depth - matched_depth,
+        f"REF_{ref_corr}": ref_df[ref_corr].to_numpy(dtype=float),
+    }
+    for name, mnemonic in output_curves.items():
+        result[name] = apply_depth_shift(matched_depth, lwd_depth, lwd_df[mnemonic].to_numpy(dtype=float))
+    return pd.DataFrame(result)
+
+
+def _run_pair_job(well_name: str, ref_las_path: str, lwd_las_path: str, mnemonic_map: Dict,
+                  windows: int, overlap: float, radius: int) -> dict:
+    """(Internal) Dijalankan di worker: depth matching satu sumur."""
+    start = time.perf_counter()
+    result = match_well_pair(ref_las_path, lwd_las_path, mnemonic_map, windows, overlap, radius)
+    return {'well': well_name, 'result': result, 'elapsed': time.perf_counter() - start}
+
+
+def run_depth_matching_batch(pairs, mnemonic_map: Dict = None, windows: int = 1,
+                             overlap: float = 0.25, radius: int = DEFAULT_RADIUS,
+                             max_workers: Optional[int] = None) -> dict:
+    """
+    Depth matching untuk banyak sumur secara paralel.
+
+    Args:
+        pairs: list (nama sumur, path LAS referensi, path LAS LWD) atau dict
+            nama sumur -> (path referensi, path LWD).
+        mnemonic_map (dict): {'correlation': {'ref': [...], 'lwd': [...]},
+            'curves': {nama output: [kandidat mnemonic LWD]}}. Default
+            DEFAULT_MNEMONIC_MAP.
+        max_workers (int, optional): Jumlah proses. Default os.cpu_count();
+            1 berarti dijalankan serial di proses ini.
+
+    Returns:
+        dict: 'results' (sumur -> DataFrame), 'timings' (sumur -> detik),
+        'errors' (sumur -> pesan) dan 'elapsed' (detik total).
+    """
+    if isinstance(pairs, dict):
+        pairs = [(well, ref, lwd) for well, (ref, lwd) in pairs.items()]
+    pairs = list(pairs)
+    job_args = (mnemonic_map or DEFAULT_MNEMONIC_MAP, windows, overlap, radius)
+
+    batch_start = time.perf_counter()
+    results, timings, errors = {}, {}, {}
+    if not pairs:
+        print("Peringatan: Tidak ada pasangan sumur untuk diproses.")
+        return {'results': results, 'timings': timings, 'errors': errors, 'elapsed': 0.0}
+
+    def _collect(well_name, run):
+        try:
+            output = run()
+            results[well_name] = output['result']
+            timings[well_name] = output['elapsed']
+        except Exception as e:
+            errors[well_name] = str(e)
+            print(f"Peringatan: Depth matching gagal untuk sumur {well_name}: {e}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(pairs) == 1:
+        for well_name, ref_path, lwd_path in pairs:
+            _collect(well_name, lambda: _run_pair_job(well_name, ref_path, lwd_path, *job_args))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pairs))) as executor:
+            futures = {executor.submit(_run_pair_job, well_name, ref_path, lwd_path, *job_args): well_name
+                       for well_name, ref_path, lwd_path in pairs}
+            for future in as_completed(futures):
+                _collect(futures[future], future.result)
+
+    elapsed = time.perf_counter() - batch_start
+    print(f"✅ Batch depth matching selesai: {len(results)} sumur berhasil, {len(errors)} gagal, "
+          f"{elapsed:.2f} detik.")
+    # Urutkan hasil sesuai urutan input
+    order = [well for well, _, _ in pairs if well in results]
+    return {
+        'results': {w: results[w] for w in order},
+        'timings': {w: timings[w] for w in order},
+        'errors': errors,
+        'elapsed': elapsed,
+    }
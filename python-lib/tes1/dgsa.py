@@ -1,26 +1,9 @@
 from typing import Optional, List
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 
-
-def _interpolate_coeffs(depth, coeff_df):
-    # (Fungsi internal ini tidak berubah)
-    if coeff_df.empty:
-        return np.array([np.nan] * 4)
-    target_cols = ['b0', 'b1', 'b2', 'b3']
-    if depth <= coeff_df['DEPTH'].min():
-        return coeff_df.iloc[0][target_cols].values
-    if depth >= coeff_df['DEPTH'].max():
-        return coeff_df.iloc[-1][target_cols].values
-    lower = coeff_df[coeff_df['DEPTH'] <= depth].iloc[-1]
-    upper = coeff_df[coeff_df['DEPTH'] > depth].iloc[0]
-    if upper['DEPTH'] == lower['DEPTH']:
-        return lower[target_cols].values
-    weight = (depth - lower['DEPTH']) / (upper['DEPTH'] - lower['DEPTH'])
-    interpolated = lower[target_cols] + weight * \
-        (upper[target_cols] - lower[target_cols])
-    return interpolated.values
+from services.gsa_engine import fit_sliding_cubic_windows, evaluate_cubic_baseline
+from services.result_writeback import write_back_columns
 
 
 def process_dgsa_for_well(df_well: pd.DataFrame, params: dict, target_intervals: list, target_zones: list) -> pd.DataFrame:
@@ -49,48 +32,27 @@ def process_dgsa_for_well(df_well: pd.DataFrame, params: dict, target_intervals:
         return df_well
 
     window_size, step, min_points = int(
-        params.get('SLIDING_WINDOW', 100)), 20, 30
+        params.get('SLIDING_WINDOW', 100)), int(params.get('STEP', 20)), 30
+    regression_mode = params.get('REGRESSION_MODE', 'batched')
     gr_filter, rhob_filter = (5, 180), (1.5, 3.0)
-    coeffs = []
-    for start in range(0, len(df_dgsa) - window_size, step):
-        window = df_dgsa.iloc[start:start+window_size]
-        gr, dens = window[gr_col].values, window[rhob_col].values
-        mask_filter = (gr > gr_filter[0]) & (gr < gr_filter[1]) & (
-            dens > rhob_filter[0]) & (dens < rhob_filter[1])
-        gr_filtered, dens_filtered = gr[mask_filter], dens[mask_filter]
-        if len(gr_filtered) < min_points:
-            continue
-        gr_scaled = 0.01 * gr_filtered
-        X, y = np.vstack(
-            [gr_scaled, gr_scaled**2, gr_scaled**3]).T, dens_filtered
-        try:
-            model = LinearRegression().fit(X, y)
-            coeffs.append({'DEPTH': window['DEPTH'].mean(), 'b0': model.intercept_, 'b1': model.coef_[
-                          0], 'b2': model.coef_[1], 'b3': model.coef_[2]})
-        except Exception as e:
-            print(
-                f"Peringatan: Regresi gagal pada ~{window['DEPTH'].mean()}: {e}")
+    coeff_df = fit_sliding_cubic_windows(
+        df_dgsa['DEPTH'].values, df_dgsa[gr_col].values, df_dgsa[rhob_col].values,
+        window_size=window_size, step=step, min_points=min_points,
+        gr_filter=gr_filter, target_filter=rhob_filter,
+        method=regression_mode)
 
-    if not coeffs:
+    if coeff_df.empty:
         print("Peringatan: Tidak ada koefisien regresi yang berhasil dihitung.")
         return df_well
 
-    coeff_df = pd.DataFrame(coeffs)
-    dgsa_list = []
-    for _, row in df_dgsa.iterrows():
-        depth, gr = row['DEPTH'], row[gr_col]
-        if not (gr_filter[0] < gr < gr_filter[1]):
-            dgsa_list.append(np.nan)
-            continue
-        b0, b1, b2, b3 = _interpolate_coeffs(depth, coeff_df)
-        grfix = 0.01 * gr
-        dgsa_list.append(b0 + b1*grfix + b2*grfix**2 + b3*grfix**3)
-    df_dgsa['DGSA'] = dgsa_list
+    gr_values = df_dgsa[gr_col].to_numpy(dtype=float)
+    dgsa_values = evaluate_cubic_baseline(
+        df_dgsa['DEPTH'].to_numpy(dtype=float), gr_values, coeff_df)
+    in_range = (gr_values > gr_filter[0]) & (gr_values < gr_filter[1])
+    df_dgsa['DGSA'] = np.where(in_range, dgsa_values, np.nan)
 
-    if 'DGSA' in df_well.columns:
-        df_well = df_well.drop(columns=['DGSA'])
-    df_merged = pd.merge(
-        df_well, df_dgsa[['DEPTH', 'DGSA']], on='DEPTH', how='left')
+    df_merged = df_well.drop(columns=['DGSA'], errors='ignore')
+    write_back_columns(df_merged, df_dgsa, ['DGSA'])
     if rhob_col in df_merged and 'DGSA' in df_merged:
         df_merged['GAS_EFFECT_RHOB'] = (
             df_merged[rhob_col] < df_merged['DGSA'])
@@ -0,0 +1,261 @@
+# File: services/dtw_engine.py
+# Description: DTW multi-resolusi dengan band Sakoe-Chiba untuk depth matching.
+# Sinyal di-downsample, disejajarkan di resolusi kasar, lalu diperhalus hanya di
+# dalam band di sekitar path kasar yang diproyeksikan. Kernel band memakai
+# numba bila tersedia, dengan fallback NumPy (scan prefix-min per baris).
+
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba bersifat opsional
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# Cache kompilasi numba hanya bila NUMBA_CACHE_DIR diatur (lihat rgsa_kernels)
+NUMBA_CACHE = bool(os.environ.get('NUMBA_CACHE_DIR'))
+
+DEFAULT_RADIUS = 10
+DEFAULT_MIN_SIZE = 64
+
+
+def resolve_backend(backend: str = 'auto') -> str:
+    """Memilih backend: 'numba' bila tersedia (atau diminta), selain itu 'numpy'."""
+    backend = (backend or 'auto').lower()
+    if backend == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        print("Peringatan: numba tidak terpasang, memakai backend NumPy.")
+        return 'numpy'
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"Backend DTW tidak dikenal: {backend}")
+    return backend
+
+
+# --- Kernel DTW dalam band ---
+# Band disimpan per baris i sebagai kolom lo[i]..hi[i] (inklusif); matriks
+# biaya kumulatif D berukuran (n, lebar band maksimum), D[i, j - lo[i]].
+
+def _banded_cost_numpy(s1, s2, lo, hi):
+    n = len(s1)
+    width = int((hi - lo).max()) + 1
+    D = np.full((n, width), np.inf)
+    prev = None
+    for i in range(n):
+        cols = np.arange(lo[i], hi[i] + 1)
+        cost = (s1[i] - s2[cols]) ** 2
+        cumulative = np.cumsum(cost)
+        if i == 0:
+            # Path dimulai di (0, 0): baris pertama hanya bisa bergerak ke kanan
+            row = cumulative if lo[0] == 0 else np.full(len(cols), np.inf)
+        else:
+            # D[i,j] = c[i,j] + min(B[j], D[i,j-1]), B[j] = min(D[i-1,j-1], D[i-1,j])
+            # diselesaikan sebagai S[j] + prefix-min(B[k] - S[k-1])
+            prev_lo, prev_row = lo[i - 1], prev
+            diag_idx = cols - 1 - prev_lo
+            up_idx = cols - prev_lo
+            diag = np.where((diag_idx >= 0) & (diag_idx < len(prev_row)),
+                            prev_row[np.clip(diag_idx, 0, len(prev_row) - 1)], np.inf)
+            up = np.where((up_idx >= 0) & (up_idx < len(prev_row)),
+                          prev_row[np.clip(up_idx, 0, len(prev_row) - 1)], np.inf)
+            best_prev = np.minimum(diag, up)
+            row = cumulative + np.minimum.accumulate(best_prev - (cumulative - cost))
+        D[i, :len(cols)] = row
+        prev = row
+    return D
+
+
+def _banded_cost_loop(s1, s2, lo, hi):
+    n = len(s1)
+    width = 0
+    for i in range(n):
+        width = max(width, hi[i] - lo[i] + 1)
+    D = np.full((n, width), np.inf)
+    for i in range(n):
+        for j in range(lo[i], hi[i] + 1):
+            cost = (s1[i] - s2[j]) ** 2
+            if i == 0 and j == 0:
+                D[i, 0] = cost
+                continue
+            best = np.inf
+            if j > lo[i]:
+                best = D[i, j - 1 - lo[i]]
+            if i > 0:
+                k = j - lo[i - 1]
+                if 0 <= k <= hi[i - 1] - lo[i - 1]:
+                    best = min(best, D[i - 1, k])
+                if 0 <= k - 1 <= hi[i - 1] - lo[i - 1]:
+                    best = min(best, D[i - 1, k - 1])
+            D[i, j - lo[i]] = cost + best
+    return D
+
+
+def _backtrack_loop(D, lo, hi):
+    n = len(lo)
+    i, j = n - 1, hi[n - 1]
+    path = np.empty((n + hi[n - 1] + 1, 2), dtype=np.int64)
+    count = 0
+    while True:
+        path[count, 0] = i
+        path[count, 1] = j
+        count += 1
+        if i == 0 and j == 0:
+            break
+        # Urutan preferensi saat seri: diagonal, atas, kiri
+        best = np.inf
+        next_i, next_j = i, j
+        if i > 0:
+            k = j - 1 - lo[i - 1]
+            if j > 0 and 0 <= k <= hi[i - 1] - lo[i - 1] and D[i - 1, k] < best:
+                best = D[i - 1, k]
+                next_i, next_j = i - 1, j - 1
+            k = j - lo[i - 1]
+            if 0 <= k <= hi[i - 1] - lo[i - 1] and D[i - 1, k] < best:
+                best = D[i - 1, k]
+                next_i, next_j = i - 1, j
+        if j > lo[i] and D[i, j - 1 - lo[i]] < best:
+            next_i, next_j = i, j - 1
+        if next_i == i and next_j == j:
+            # Tidak ada pendahulu berbiaya hingga: band tidak terhubung
+            raise ValueError("Backtrack DTW gagal: band tidak terhubung ke (0, 0).")
+        i, j = next_i, next_j
+    return path[:count][::-1].copy()
+
+
+if NUMBA_AVAILABLE:
+    _banded_cost_loop = numba.njit(cache=NUMBA_CACHE)(_banded_cost_loop)
+    _backtrack_jit = numba.njit(cache=NUMBA_CACHE)(_backtrack_loop)
+else:
+    _backtrack_jit = _backtrack_loop
+
+
+def _check_finite(s1, s2):
+    """(Internal) NaN/inf membuat semua biaya tak hingga dan path tidak terdefinisi."""
+    if not (np.isfinite(s1).all() and np.isfinite(s2).all()):
+        raise ValueError("Sinyal DTW mengandung NaN atau nilai tak hingga.")
+
+
+def dtw_path(s1, s2, lo=None, hi=None, backend: str = 'auto') -> np.ndarray:
+    """
+    Warping path DTW (biaya selisih kuadrat) antara s1 dan s2, opsional
+    dibatasi band: untuk baris i hanya kolom lo[i]..hi[i] yang dihitung.
+
+    Returns:
+        np.ndarray: (K, 2) pasangan indeks (i, j), dari (0, 0) sampai (n-1, m-1).
+    """
+    s1 = np.asarray(s1, dtype=float)
+    s2 = np.asarray(s2, dtype=float)
+    _check_finite(s1, s2)
+    n, m = len(s1), len(s2)
+    if n == 0 or m == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    lo = np.zeros(n, dtype=np.int64) if lo is None else np.asarray(lo, dtype=np.int64)
+    hi = np.full(n, m - 1, dtype=np.int64) if hi is None else np.asarray(hi, dtype=np.int64)
+    if resolve_backend(backend) == 'numba':
+        D = _banded_cost_loop(s1, s2, lo, hi)
+        return _backtrack_jit(D, lo, hi)
+    D = _banded_cost_numpy(s1, s2, lo, hi)
+    return _backtrack_loop(D, lo, hi)
+
+
+# --- Multi-resolusi ---
+
+def _downsample(signal):
+    """(Internal) Rata-rata tiap dua sampel; sampel ganjil terakhir berdiri sendiri."""
+    n = len(signal)
+    even = signal[:n - n % 2].reshape(-1, 2).mean(axis=1)
+    return np.append(even, signal[-1]) if n % 2 else even
+
+
+def _project_band(coarse_path, n, m, radius):
+    """
+    (Internal) Memproyeksikan path kasar ke resolusi penuh (tiap sel kasar
+    menjadi blok 2x2) lalu melebarkannya `radius` sampel ke segala arah.
+    """
+    ci, cj = coarse_path[:, 0], coarse_path[:, 1]
+    rows = np.concatenate([2 * ci, 2 * ci + 1])
+    col_lo = np.concatenate([2 * cj, 2 * cj])
+    col_hi = np.minimum(np.concatenate([2 * cj + 1, 2 * cj + 1]), m - 1)
+    valid = rows < n
+    lo = np.full(n, m - 1, dtype=np.int64)
+    hi = np.zeros(n, dtype=np.int64)
+    np.minimum.at(lo, rows[valid], col_lo[valid])
+    np.maximum.at(hi, rows[valid], col_hi[valid])
+    if radius > 0:
+        # Dilasi arah baris (min/max bergeser) lalu arah kolom (+/- radius)
+        lo = sliding_window_view(np.pad(lo, radius, mode='edge'), 2 * radius + 1).min(axis=1) - radius
+        hi = sliding_window_view(np.pad(hi, radius, mode='edge'), 2 * radius + 1).max(axis=1) + radius
+    lo = np.clip(lo, 0, m - 1)
+    hi = np.clip(hi, 0, m - 1)
+    lo[0], hi[-1] = 0, m - 1
+    return lo, hi
+
+
+def multiscale_dtw_path(s1, s2, radius: int = DEFAULT_RADIUS, min_size: int = DEFAULT_MIN_SIZE,
+                        backend: str = 'auto') -> np.ndarray:
+    """
+    DTW coarse-to-fine: kedua sinyal di-downsample 2x secara rekursif sampai
+    salah satunya <= min_size, disejajarkan penuh di level terkasar, lalu di
+    setiap level path diproyeksikan dan diperhalus di dalam band Sakoe-Chiba
+    selebar `radius` sampel. Biaya ~O((n + m) * radius) alih-alih O(n * m).
+    """
+    s1 = np.asarray(s1, dtype=float)
+    s2 = np.asarray(s2, dtype=float)
+    _check_finite(s1, s2)
+    if len(s1) <= min_size or len(s2) <= min_size:
+        return dtw_path(s1, s2, backend=backend)
+    coarse = multiscale_dtw_path(_downsample(s1), _downsample(s2), radius, min_size, backend)
+    lo, hi = _project_band(coarse, len(s1), len(s2), radius)
+    return dtw_path(s1, s2, lo, hi, backend=backend)
+
+
+def path_to_positions(path, n: int) -> np.ndarray:
+    """Posisi rata-rata (float) di s2 untuk setiap indeks s1 0..n-1 pada path."""
+    path = np.asarray(path)
+    counts = np.bincount(path[:, 0], minlength=n)
+    sums = np.bincount(path[:, 0], weights=path[:, 1].astype(float), minlength=n)
+    with np.errstate(invalid='ignore'):
+        return sums / counts
+
+
+def warp_positions(s1, s2, num_windows: int = 1, overlap: float = 0.25,
+                   radius: int = DEFAULT_RADIUS, min_size: int = DEFAULT_MIN_SIZE,
+                   backend: str = 'auto') -> np.ndarray:
+    """
+    Posisi s2 (float) yang cocok untuk setiap sampel s1.
+
+    Dengan num_windows > 1 kedua sinyal dibagi menjadi jendela proporsional
+    yang saling tumpang tindih (overlap = fraksi panjang jendela di tiap
+    sisi). Di daerah tumpang tindih hasil jendela dicampur dengan bobot
+    segitiga, sehingga sambungan antar jendela tidak melompat.
+    """
+    s1 = np.asarray(s1, dtype=float)
+    s2 = np.asarray(s2, dtype=float)
+    _check_finite(s1, s2)
+    n, m = len(s1), len(s2)
+    if num_windows <= 1:
+        return path_to_positions(multiscale_dtw_path(s1, s2, radius, min_size, backend), n)
+
+    weighted = np.zeros(n)
+    weights = np.zeros(n)
+    for k in range(num_windows):
+        start_frac = max(k - overlap, 0) / num_windows
+        stop_frac = min(k + 1 + overlap, num_windows) / num_windows
+        a0, a1 = int(round(start_frac * n)), int(round(stop_frac * n))
+        b0, b1 = int(round(start_frac * m)), int(round(stop_frac * m))
+        if a1 - a0 < 2 or b1 - b0 < 2:
+            continue
+        positions = b0 + path_to_positions(
+            multiscale_dtw_path(s1[a0:a1], s2[b0:b1], radius, min_size, backend), a1 - a0)
+        # Bobot segitiga: maksimum di tengah jendela, mendekati nol di tepinya
+        ramp = np.minimum(np.arange(1, a1 - a0 + 1), np.arange(a1 - a0, 0, -1)).astype(float)
+        weighted[a0:a1] += ramp * positions
+        weights[a0:a1] += ramp
+    with np.errstate(invalid='ignore'):
+        positions = weighted / weights
+    # Pastikan tetap monoton setelah pencampuran
+    return np.fmax.accumulate(positions)
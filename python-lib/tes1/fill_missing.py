@@ -2,9 +2,7 @@ import pandas as pd
 import numpy as np
 
 from services.data_processing import fill_flagged_missing_values
-
-import pandas as pd
-import numpy as np
+from services.gap_index import GapIndex, fill_at_positions
 
 
 def flag_missing_values(df, logs_to_check):
@@ -29,42 +27,34 @@ def flag_missing_values(df, logs_to_check):
     return df_flagged
 
 
-def fill_flagged_values(df, logs_to_fill, max_consecutive_nan):
+def fill_flagged_values(df, logs_to_fill, max_consecutive_nan, method='linear', fill_value=np.nan):
     """
     Mengisi nilai NaN pada log yang dipilih jika flag-nya 1 dan dalam batas max_consecutive.
+    Blok flag pendek ditentukan sekali dari GapIndex; semua log diisi pada
+    blok yang sama, baru kemudian flag-nya dihapus.
     """
     df_filled = df.copy()
+    logs_to_fill = [log for log in logs_to_fill if log in df_filled.columns]
+    if not logs_to_fill or 'MISSING_FLAG' not in df_filled.columns:
+        return df_filled
 
-    for log in logs_to_fill:
-        if log in df_filled.columns and 'MISSING_FLAG' in df_filled.columns:
-            # Buat grup dari data yang hilang secara berurutan
-            df_filled['block'] = (
-                df_filled['MISSING_FLAG'].diff() != 0).cumsum()
-            missing_blocks = df_filled[df_filled['MISSING_FLAG'] == 1]
-
-            # Hitung ukuran setiap blok data yang hilang
-            block_sizes = missing_blocks.groupby('block').size()
-
-            # Dapatkan ID blok yang ukurannya kurang dari atau sama dengan batas maksimum
-            blocks_to_fill = block_sizes[block_sizes <=
-                                         max_consecutive_nan].index
+    gap_index = GapIndex(df_filled, logs_to_fill)
+    # Baris di blok MISSING_FLAG == 1 yang panjangnya <= batas maksimum
+    block_positions = gap_index.short_flag_positions(max_consecutive_nan)
+    if len(block_positions) == 0:
+        return df_filled
 
-            # Buat mask boolean untuk semua baris yang akan diisi
-            fill_mask = (df_filled['MISSING_FLAG'] == 1) & (
-                df_filled['block'].isin(blocks_to_fill))
-
-            # Lakukan interpolasi pada seluruh kolom untuk mendapatkan nilai pengisi
-            interpolated_series = df_filled[log].interpolate(
-                method='linear', limit_direction='both')
-
-            # Gunakan mask untuk mengisi nilai hanya pada baris yang memenuhi syarat
-            df_filled.loc[fill_mask, log] = interpolated_series[fill_mask]
-
-            # Hapus flag untuk data yang sudah berhasil diisi
-            df_filled.loc[fill_mask, 'MISSING_FLAG'] = 0
-
-    # Hapus kolom 'block' temporary yang digunakan untuk grouping
-    if 'block' in df_filled.columns:
-        df_filled = df_filled.drop(columns=['block'])
+    for log in logs_to_fill:
+        values = df_filled[log].to_numpy(dtype=float, copy=True)
+        # Hanya posisi yang benar-benar NaN yang diisi
+        positions = block_positions[np.isnan(values[block_positions])]
+        if len(positions):
+            values[positions] = fill_at_positions(values, positions, method, fill_value)
+            df_filled[log] = values
+
+    # Hapus flag untuk blok yang sudah diisi
+    flag = df_filled['MISSING_FLAG'].to_numpy(copy=True)
+    flag[block_positions] = 0
+    df_filled['MISSING_FLAG'] = flag
 
     return df_filled
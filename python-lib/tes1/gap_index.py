@@ -0,0 +1,99 @@
+# File: services/gap_index.py
+# Description: Indeks gap (run NaN) per log yang dibangun sekali per DataFrame.
+# Untuk setiap log dicatat awal, panjang dan jumlah baris ber-flag dari setiap
+# run NaN, beserta run MISSING_FLAG == 1. Pengisian hanya menyentuh posisi gap
+# yang memenuhi syarat, dan statistik gap bisa dilaporkan tanpa scan ulang.
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.segments import find_runs, run_positions
+
+FILL_METHODS = ('linear', 'bfill', 'ffill', 'constant')
+
+
+class GapIndex:
+    """
+    Run NaN setiap log dan run flag (flag_col == flag_value) dari satu
+    DataFrame. Posisi adalah posisi baris (0..N-1), bukan label index.
+    """
+
+    def __init__(self, df: pd.DataFrame, logs: List[str], flag_col: str = 'MISSING_FLAG',
+                 flag_value: int = 1):
+        self.n_rows = len(df)
+        self.logs = [log for log in logs if log in df.columns]
+        self.flag_col = flag_col
+        if flag_col in df.columns:
+            flagged = (df[flag_col] == flag_value).to_numpy()
+        else:
+            flagged = np.zeros(self.n_rows, dtype=bool)
+        self.flagged = flagged
+        # Prefix sum baris ber-flag: jumlah flag per run tanpa scan ulang
+        self._flag_prefix = np.concatenate([[0], np.cumsum(flagged)])
+        self.flag_starts, self.flag_lengths = find_runs(flagged)
+
+        self.starts, self.lengths, self.flagged_rows = {}, {}, {}
+        for log in self.logs:
+            starts, lengths = find_runs(df[log].isna().to_numpy())
+            self.starts[log] = starts
+            self.lengths[log] = lengths
+            self.flagged_rows[log] = self._flag_prefix[starts + lengths] - self._flag_prefix[starts]
+
+    def short_gap_positions(self, log: str, max_length: int, flagged_only: bool = True) -> np.ndarray:
+        """
+        Posisi baris NaN pada log yang berada di run NaN dengan panjang
+        <= max_length; bila flagged_only, hanya baris yang ber-flag.
+        """
+        short = self.lengths[log] <= max_length
+        positions = run_positions(self.starts[log][short], self.lengths[log][short])
+        return positions[self.flagged[positions]] if flagged_only else positions
+
+    def short_flag_positions(self, max_length: int) -> np.ndarray:
+        """Posisi baris di run flag dengan panjang <= max_length."""
+        short = self.flag_lengths <= max_length
+        return run_positions(self.flag_starts[short], self.flag_lengths[short])
+
+    def summary(self, depth: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Statistik gap per run: LOG, START, LENGTH, FLAGGED_ROWS, dan
+        TOP/BOTTOM (kedalaman baris pertama dan terakhir) bila depth diberikan.
+        """
+        logs = [log for log in self.logs for _ in range(len(self.starts[log]))]
+        starts = np.concatenate([self.starts[log] for log in self.logs] or [np.empty(0, dtype=np.int64)])
+        lengths = np.concatenate([self.lengths[log] for log in self.logs] or [np.empty(0, dtype=np.int64)])
+        flagged = np.concatenate([self.flagged_rows[log] for log in self.logs] or [np.empty(0, dtype=np.int64)])
+        summary = pd.DataFrame({'LOG': logs, 'START': starts, 'LENGTH': lengths, 'FLAGGED_ROWS': flagged})
+        if depth is not None:
+            depth = np.asarray(depth, dtype=float)
+            summary['TOP'] = depth[starts]
+            summary['BOTTOM'] = depth[starts + lengths - 1]
+        return summary
+
+
+def fill_at_positions(values, positions, method: str = 'linear', fill_value: float = np.nan) -> np.ndarray:
+    """
+    Nilai pengisi untuk posisi tertentu, dihitung dari nilai valid terdekat.
+
+    'linear' interpolasi berdasarkan posisi (di luar data valid memakai nilai
+    ujung, seperti interpolate(limit_direction='both')), 'bfill' nilai valid
+    berikutnya (fallback sebelumnya, seperti bfill().ffill()), 'ffill' nilai
+    valid sebelumnya (fallback berikutnya), 'constant' fill_value.
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"Metode pengisian tidak dikenal: {method}")
+    positions = np.asarray(positions, dtype=np.int64)
+    if method == 'constant':
+        return np.full(len(positions), fill_value, dtype=float)
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return np.full(len(positions), np.nan)
+    if method == 'linear':
+        return np.interp(positions, valid, values[valid])
+    if method == 'bfill':
+        pick = np.minimum(np.searchsorted(valid, positions, side='left'), len(valid) - 1)
+    else:
+        pick = np.maximum(np.searchsorted(valid, positions, side='right') - 1, 0)
+    return values[valid[pick]]
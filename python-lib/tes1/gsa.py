@@ -1,27 +1,22 @@
 from typing import Optional
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-
-from services.rgsa import process_rgsa_for_well
-from services.ngsa import process_ngsa_for_well
-from services.dgsa import process_dgsa_for_well
-
-
-def _interpolate_coeffs(depth, coeff_df):
-    """(Internal) Melakukan interpolasi linear pada koefisien regresi."""
-    if coeff_df.empty:
-        return np.array([np.nan] * 4)
-    if depth <= coeff_df['DEPTH'].min():
-        return coeff_df.iloc[0][['b0', 'b1', 'b2', 'b3']].values
-    if depth >= coeff_df['DEPTH'].max():
-        return coeff_df.iloc[-1][['b0', 'b1', 'b2', 'b3']].values
-    lower = coeff_df[coeff_df['DEPTH'] <= depth].iloc[-1]
-    upper = coeff_df[coeff_df['DEPTH'] > depth].iloc[0]
-    weight = (depth - lower['DEPTH']) / (upper['DEPTH'] - lower['DEPTH'])
-    row = lower + weight * (upper - lower)
-    return row[['b0', 'b1', 'b2', 'b3']].values
 
+from services.gsa_engine import (
+    fit_sliding_cubic_windows, fit_sliding_cubic_windows_multi, evaluate_cubic_baseline)
+from services.rgsa import process_all_wells_rgsa
+from services.ngsa import process_all_wells_ngsa
+from services.dgsa import process_all_wells_dgsa
+from services.result_writeback import write_back_columns
+
+# Target NGSA/DGSA: (parameter kolom, kolom default, nama baseline, filter
+# target, kolom efek gas, kolom selisih). Keduanya memakai regresi sliding
+# window yang sama (lihat ngsa.py dan dgsa.py), sehingga windowing GR dapat
+# dibagi. RGSA memakai pipeline multi-pass tersendiri (rgsa.py).
+SLIDING_GSA_TARGETS = [
+    ('NEUT', 'NPHI', 'NGSA', (0.05, 0.6), 'GAS_EFFECT_NPHI', 'NPHI_DIFF'),
+    ('DENS', 'RHOB', 'DGSA', (1.5, 3.0), 'GAS_EFFECT_RHOB', 'DENS_DIFF'),
+]
 
 def _classify_zone(score):
     """(Internal) Memberikan nama zona berdasarkan skor anomali."""
@@ -41,78 +36,44 @@ def calculate_gsa_log(df_input: pd.DataFrame, params: dict, ref_log: str, target
     """
     df_input = df_input.copy()
     df_valid = df_input[['DEPTH', ref_log, target_log]].dropna().copy()
-    coeffs = []
 
     window_size = int(params.get('window_size', 106))
     step = int(params.get('step', 20))
     min_points = int(params.get('min_points_in_window', 30))
+    regression_mode = params.get('regression_mode', 'batched')
 
     print(f"Memulai kalkulasi {output_log_name}...")
 
-    for start in range(0, len(df_valid) - window_size, step):
-        window = df_valid.iloc[start:start + window_size]
-        gr = window[ref_log].values
-        target = window[target_log].values
-
-        mask = (gr > 5) & (gr < 180) & (target > 0.1) & (target < 1000)
-        gr, target = gr[mask], target[mask]
+    coeff_df = fit_sliding_cubic_windows(
+        df_valid['DEPTH'].values, df_valid[ref_log].values, df_valid[target_log].values,
+        window_size=window_size, step=step, min_points=min_points,
+        gr_filter=(5, 180), target_filter=(0.1, 1000),
+        log_target=(output_log_name == 'RGSA'), method=regression_mode)
 
-        if len(gr) < min_points:
-            continue
-
-        gr_scaled = 0.01 * gr
-        y = np.log10(target) if output_log_name == 'RGSA' else target
-        X = np.vstack([gr_scaled, gr_scaled**2, gr_scaled**3]).T
-
-        model = LinearRegression().fit(X, y)
-        coeffs.append({
-            'DEPTH': window['DEPTH'].mean(),
-            'b0': model.intercept_,
-            'b1': model.coef_[0],
-            'b2': model.coef_[1],
-            'b3': model.coef_[2]
-        })
-
-    if not coeffs:
+    if coeff_df.empty:
         print(
             f"⚠️ Tidak ada koefisien dihitung untuk {output_log_name}, seluruh output akan NaN.")
         df_input[output_log_name] = np.nan
         return df_input
 
-    coeff_df = pd.DataFrame(coeffs)
+    # Evaluasi baseline untuk seluruh kedalaman sekaligus
+    depth_values = df_input['DEPTH'].to_numpy(dtype=float)
+    gr_values = df_input[ref_log].to_numpy(dtype=float)
+    log_gsa = evaluate_cubic_baseline(depth_values, gr_values, coeff_df)
+    gsa_values = 10**log_gsa if output_log_name == 'RGSA' else log_gsa
 
-    # Siapkan array hasil
-    gsa_array = np.full(len(df_input), np.nan)
-
-    for i, row in df_input.iterrows():
-        if pd.isna(row[ref_log]) or pd.isna(row['DEPTH']):
-            continue
-
-        gr_val = row[ref_log]
-        if gr_val < 5 or gr_val > 180:
-            continue
-
-        b0, b1, b2, b3 = _interpolate_coeffs(row['DEPTH'], coeff_df)
-        if np.isnan(b0):
-            continue
-
-        grfix = 0.01 * gr_val
-        log_gsa = b0 + b1 * grfix + b2 * grfix**2 + b3 * grfix**3
-        gsa_val = 10**log_gsa if output_log_name == 'RGSA' else log_gsa
-        gsa_array[i] = gsa_val
+    valid = ~np.isnan(gr_values) & ~np.isnan(depth_values) & \
+        (gr_values >= 5) & (gr_values <= 180)
+    gsa_array = np.where(valid, gsa_values, np.nan)
 
     df_input[output_log_name] = gsa_array
     return df_input
-    return pd.merge(df_input, df_gsa[['DEPTH', output_log_name]], on='DEPTH', how='left')
 
 
 def run_rgsa_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
     """Hanya menjalankan proses RGSA."""
     print("Memproses RGSA...")
-    df_processed = process_rgsa_for_well(
-        df_well=df, params=params,
-        ref_log='GR', target_log='RT', output_log_name='RGSA'
-    )
+    df_processed = process_all_wells_rgsa(df_well=df, params=params)
     if 'RT' in df_processed and 'RGSA' in df_processed:
         df_processed['RGSA_GAS_EFFECT'] = df_processed['RT'] > df_processed['RGSA']
     return df_processed
@@ -121,10 +82,7 @@ def run_rgsa_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
 def run_ngsa_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
     """Hanya menjalankan proses NGSA."""
     print("Memproses NGSA...")
-    df_processed = process_ngsa_for_well(
-        df_well=df, params=params,
-        ref_log='GR', target_log='NPHI', output_log_name='NGSA'
-    )
+    df_processed = process_all_wells_ngsa(df_well=df, params=params)
     if 'NPHI' in df_processed and 'NGSA' in df_processed:
         df_processed['NGSA_GAS_EFFECT'] = df_processed['NPHI'] < df_processed['NGSA']
     return df_processed
@@ -133,11 +91,133 @@ def run_ngsa_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
 def run_dgsa_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
     """Hanya menjalankan proses DGSA."""
     print("Memproses DGSA...")
-    df_processed = process_dgsa_for_well(
-        df_well=df, params=params,
-        ref_log='GR', target_log='RHOB', output_log_name='DGSA'
-    )
+    df_processed = process_all_wells_dgsa(df_well=df, params=params)
+    if 'RHOB' in df_processed and 'DGSA' in df_processed:
+        df_processed['DGSA_GAS_EFFECT'] = df_processed['RHOB'] < df_processed['DGSA']
+        df_processed['DENS_DIFF'] = df_processed['DGSA'] - df_processed['RHOB']
+    return df_processed
+
+
+def _apply_sliding_gsa(df_processed: pd.DataFrame, params: dict) -> None:
+    """
+    (Internal) NGSA dan DGSA dengan algoritma dan parameter yang sama seperti
+    process_all_wells_ngsa/dgsa (tanpa filter interval/zona). Target dengan
+    baris valid yang sama difit bersama lewat fit_sliding_cubic_windows_multi;
+    hasil ditulis kembali per posisi baris secara in-place.
+    """
+    gr_col = params.get('GR', 'GR')
+    targets = [t for t in SLIDING_GSA_TARGETS
+               if params.get(t[0], t[1]) in df_processed.columns]
+    if gr_col not in df_processed.columns or not targets:
+        return
+
+    # Kelompokkan target berdasarkan baris valid (DEPTH, GR dan target tidak NaN)
+    base_valid = df_processed[['DEPTH', gr_col]].notna().all(axis=1).to_numpy()
+    row_groups = {}
+    for target in targets:
+        rows = base_valid & df_processed[params.get(target[0], target[1])].notna().to_numpy()
+        row_groups.setdefault(np.packbits(rows).tobytes(), (rows, []))[1].append(target)
+
+    gr_filter = (5, 180)
+    for rows, members in row_groups.values():
+        target_cols = [params.get(t[0], t[1]) for t in members]
+        df_valid = df_processed.loc[rows, ['DEPTH', gr_col] + target_cols]
+        if len(df_valid) < 100:
+            print(f"Peringatan: Data tidak cukup untuk regresi "
+                  f"{'/'.join(t[2] for t in members)} (hanya {len(df_valid)} baris).")
+            continue
+
+        coeff_dfs = fit_sliding_cubic_windows_multi(
+            df_valid['DEPTH'].values, df_valid[gr_col].values, df_valid[target_cols].values,
+            target_filters=[t[3] for t in members], log_targets=[False] * len(members),
+            window_size=int(params.get('SLIDING_WINDOW', 100)),
+            step=int(params.get('STEP', 20)), min_points=30, gr_filter=gr_filter,
+            method=params.get('REGRESSION_MODE', 'batched'))
+
+        depth_values = df_valid['DEPTH'].to_numpy(dtype=float)
+        gr_values = df_valid[gr_col].to_numpy(dtype=float)
+        in_range = (gr_values > gr_filter[0]) & (gr_values < gr_filter[1])
+        for (_, _, output_name, _, effect_col, diff_col), target_col, coeff_df in zip(
+                members, target_cols, coeff_dfs):
+            if coeff_df.empty:
+                print(f"Peringatan: Tidak ada koefisien regresi {output_name} yang berhasil dihitung.")
+                continue
+            baseline = evaluate_cubic_baseline(depth_values, gr_values, coeff_df)
+            df_result = pd.DataFrame({output_name: np.where(in_range, baseline, np.nan)},
+                                     index=df_valid.index)
+            write_back_columns(df_processed, df_result, [output_name])
+            df_processed[effect_col] = df_processed[target_col] < df_processed[output_name]
+            df_processed[diff_col] = df_processed[output_name] - df_processed[target_col]
+
+
+def run_gsa_combined_analysis(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    """
+    Menjalankan RGSA, NGSA dan DGSA dan mengembalikan satu DataFrame berisi
+    ketiga baseline beserta flag efek gas.
+
+    Algoritma dan parameter sama dengan run_rgsa_analysis, run_ngsa_analysis
+    dan run_dgsa_analysis, sehingga kolom hasilnya identik dengan ketiga
+    panggilan terpisah. RGSA tetap memakai pipeline multi-pass (GR cap dinamis
+    dan tumbling window). NGSA dan DGSA berbagi windowing GR bila baris
+    validnya sama; target dengan mask filter yang juga sama diselesaikan
+    sekali sebagai masalah multi right-hand-side. Hasil ditulis per posisi
+    baris ke satu frame, tanpa pd.merge berulang.
+    """
+    print("Memproses RGSA, NGSA dan DGSA sekaligus...")
+    df_processed = process_all_wells_rgsa(df_well=df, params=params)
+    if 'RT' in df_processed and 'RGSA' in df_processed:
+        df_processed['RGSA_GAS_EFFECT'] = df_processed['RT'] > df_processed['RGSA']
+
+    _apply_sliding_gsa(df_processed, params)
+    if 'NPHI' in df_processed and 'NGSA' in df_processed:
+        df_processed['NGSA_GAS_EFFECT'] = df_processed['NPHI'] < df_processed['NGSA']
     if 'RHOB' in df_processed and 'DGSA' in df_processed:
         df_processed['DGSA_GAS_EFFECT'] = df_processed['RHOB'] < df_processed['DGSA']
         df_processed['DENS_DIFF'] = df_processed['DGSA'] - df_processed['RHOB']
     return df_processed
+
+    # Kelompokkan target berdasarkan baris yang valid (DEPTH, GR dan target tidak NaN)
+    base_valid = df_processed[['DEPTH', ref_log]].notna().all(axis=1).to_numpy()
+    row_groups = {}
+    for k, (target_col, _, _, _) in enumerate(targets):
+        rows = base_valid & df_processed[target_col].notna().to_numpy()
+        row_groups.setdefault(np.packbits(rows).tobytes(), (rows, []))[1].append(k)
+
+    coeff_dfs = [None] * len(targets)
+    for rows, members in row_groups.values():
+        df_valid = df_processed.loc[rows]
+        group_coeffs = fit_sliding_cubic_windows_multi(
+            df_valid['DEPTH'].values, df_valid[ref_log].values,
+            df_valid[[targets[k][0] for k in members]].values,
+            target_filters=[targets[k][2] for k in members],
+            log_targets=[targets[k][3] for k in members],
+            window_size=int(params.get('window_size', 106)),
+            step=int(params.get('step', 20)),
+            min_points=int(params.get('min_points_in_window', 30)),
+            gr_filter=(5, 180), method=params.get('regression_mode', 'batched'))
+        for k, coeff_df in zip(members, group_coeffs):
+            coeff_dfs[k] = coeff_df
+
+    depth_values = df_processed['DEPTH'].to_numpy(dtype=float)
+    gr_values = df_processed[ref_log].to_numpy(dtype=float)
+    valid = ~np.isnan(gr_values) & ~np.isnan(depth_values) & \
+        (gr_values >= 5) & (gr_values <= 180)
+
+    for (target_col, output_name, _, log_target), coeff_df in zip(targets, coeff_dfs):
+        if coeff_df.empty:
+            print(f"⚠️ Tidak ada koefisien dihitung untuk {output_name}, seluruh output akan NaN.")
+            df_processed[output_name] = np.nan
+            continue
+        baseline = evaluate_cubic_baseline(depth_values, gr_values, coeff_df)
+        if log_target:
+            baseline = 10**baseline
+        df_processed[output_name] = np.where(valid, baseline, np.nan)
+
+    if 'RGSA' in df_processed:
+        df_processed['RGSA_GAS_EFFECT'] = df_processed['RT'] > df_processed['RGSA']
+    if 'NGSA' in df_processed:
+        df_processed['NGSA_GAS_EFFECT'] = df_processed['NPHI'] < df_processed['NGSA']
+    if 'DGSA' in df_processed:
+        df_processed['DGSA_GAS_EFFECT'] = df_processed['RHOB'] < df_processed['DGSA']
+        df_processed['DENS_DIFF'] = df_processed['DGSA'] - df_processed['RHOB']
+    return df_processed
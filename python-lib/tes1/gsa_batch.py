@@ -0,0 +1,249 @@
+# File: services/gsa_batch.py
+# Description: Menjalankan RGSA/NGSA/DGSA untuk banyak sumur sekaligus dengan
+# ProcessPoolExecutor. Kolom numerik dikirim ke worker lewat shared memory.
+
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from services.rgsa import process_all_wells_rgsa
+from services.ngsa import process_all_wells_ngsa
+from services.dgsa import process_all_wells_dgsa
+
+GSA_PROCESSORS = {
+    'RGSA': process_all_wells_rgsa,
+    'NGSA': process_all_wells_ngsa,
+    'DGSA': process_all_wells_dgsa,
+}
+
+STRUCTURES_DIR = 'data/structures'
+
+
+def discover_well_files(field_name: str, structure_name: str, file_name: Optional[str] = None,
+                        base_dir: str = STRUCTURES_DIR) -> Dict[str, str]:
+    """
+    Mencari file CSV tiap sumur di data/structures/<field>/<structure>/<well>.
+
+    Bila file_name diberikan, file tersebut yang dipakai di setiap folder sumur.
+    Jika tidak, dipakai '<well>.csv' bila ada, selain itu CSV pertama (urut nama).
+
+    Returns:
+        dict: nama sumur -> path file CSV.
+    """
+    structure_path = os.path.join(base_dir, field_name, structure_name)
+    if not os.path.isdir(structure_path):
+        raise FileNotFoundError(f"Folder struktur tidak ditemukan: {structure_path}")
+
+    well_files = {}
+    for well_name in sorted(os.listdir(structure_path)):
+        well_path = os.path.join(structure_path, well_name)
+        if not os.path.isdir(well_path) or well_name.startswith('.'):
+            continue
+        if file_name:
+            candidate = os.path.join(well_path, file_name)
+            if os.path.isfile(candidate):
+                well_files[well_name] = candidate
+            continue
+        csv_files = sorted(f for f in os.listdir(well_path) if f.lower().endswith('.csv'))
+        if not csv_files:
+            continue
+        preferred = f"{well_name}.csv"
+        chosen = next((f for f in csv_files if f.lower() == preferred.lower()), csv_files[0])
+        well_files[well_name] = os.path.join(well_path, chosen)
+    return well_files
+
+
+# --- Shared memory ---
+
+def _share_frame(df: pd.DataFrame):
+    """
+    (Internal) Menyalin kolom numerik ke satu blok shared memory (float64,
+    kolom x baris). Kolom lain (MARKER, ZONE, LITHOLOGY, ...) dikirim biasa.
+    """
+    numeric_cols = [c for c in df.columns
+                    if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+    other = df.drop(columns=numeric_cols)
+    block_shape = (len(numeric_cols), len(df))
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(block_shape)) * 8, 1))
+    block = np.ndarray(block_shape, dtype=np.float64, buffer=shm.buf)
+    for i, col in enumerate(numeric_cols):
+        block[i] = df[col].to_numpy(dtype=np.float64)
+    spec = {
+        'shm_name': shm.name,
+        'shape': block_shape,
+        'numeric_cols': numeric_cols,
+        'dtypes': {c: df[c].dtype for c in numeric_cols},
+        'other': other,
+        'columns': list(df.columns),
+        'index': df.index,
+    }
+    return shm, spec
+
+
+def _attach_shared(name: str) -> shared_memory.SharedMemory:
+    """
+    (Internal) Membuka blok milik proses induk. Worker memakai resource tracker
+    yang sama dengan induk, sehingga unlink cukup dilakukan sekali oleh induk.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _frame_from_shared(spec: dict) -> pd.DataFrame:
+    """(Internal) Menyusun kembali DataFrame sumur dari blok shared memory."""
+    shm = _attach_shared(spec['shm_name'])
+    try:
+        block = np.ndarray(spec['shape'], dtype=np.float64, buffer=shm.buf)
+        data = {}
+        for i, col in enumerate(spec['numeric_cols']):
+            values = block[i].copy()
+            dtype = spec['dtypes'][col]
+            data[col] = values if dtype == np.float64 else values.astype(dtype)
+        del block
+    finally:
+        shm.close()
+    df = pd.DataFrame(data, index=spec['index'])
+    for col in spec['other'].columns:
+        df[col] = spec['other'][col].to_numpy()
+    return df[spec['columns']]
+
+
+# --- Worker ---
+
+def _run_well_job(well_name: str, source, modules: tuple, params: dict,
+                  target_intervals: list, target_zones: list) -> dict:
+    """(Internal) Dijalankan di worker: memuat satu sumur lalu menjalankan modul GSA berurutan."""
+    timing = {}
+    start = time.perf_counter()
+    if isinstance(source, str):
+        df = pd.read_csv(source)
+    elif isinstance(source, dict):
+        df = _frame_from_shared(source)
+    else:
+        df = source
+    timing['load'] = time.perf_counter() - start
+
+    for module in modules:
+        t0 = time.perf_counter()
+        df = GSA_PROCESSORS[module](df, params, target_intervals, target_zones)
+        timing[module] = time.perf_counter() - t0
+    timing['total'] = time.perf_counter() - start
+    return {'well': well_name, 'result': df, 'timing': timing, 'pid': os.getpid()}
+
+
+def run_gsa_batch(wells: Union[Dict[str, pd.DataFrame], str], params: dict,
+                  modules: tuple = ('RGSA', 'NGSA', 'DGSA'),
+                  target_intervals: list = None, target_zones: list = None,
+                  structure_name: Optional[str] = None, file_name: Optional[str] = None,
+                  max_workers: Optional[int] = None, use_shared_memory: bool = True,
+                  base_dir: str = STRUCTURES_DIR) -> dict:
+    """
+    Menjalankan modul GSA untuk banyak sumur secara paralel.
+
+    Args:
+        wells: dict nama sumur -> DataFrame, atau nama field (bersama
+            structure_name) untuk membaca CSV dari data/structures.
+        params (dict): Parameter yang sama dengan process_all_wells_*.
+        modules (tuple): Urutan modul yang dijalankan ('RGSA', 'NGSA', 'DGSA').
+        max_workers (int, optional): Jumlah proses. Default os.cpu_count();
+            1 berarti dijalankan serial di proses ini.
+        use_shared_memory (bool): Kirim kolom numerik lewat shared memory
+            alih-alih pickle penuh (hanya untuk input DataFrame). Paling banyak
+            2 x jumlah worker sumur yang dikirim sekaligus; blok tiap sumur
+            dilepas begitu hasilnya diterima.
+
+    Returns:
+        dict: 'results' (sumur -> DataFrame), 'timings' (sumur -> detik per
+        tahap), 'errors' (sumur -> pesan) dan 'elapsed' (detik total).
+    """
+    unknown = [m for m in modules if m not in GSA_PROCESSORS]
+    if unknown:
+        raise ValueError(f"Modul GSA tidak dikenal: {unknown}")
+
+    if isinstance(wells, str):
+        if not structure_name:
+            raise ValueError("structure_name wajib diisi bila sumur dibaca dari folder.")
+        sources = discover_well_files(wells, structure_name, file_name, base_dir)
+    else:
+        sources = dict(wells)
+
+    batch_start = time.perf_counter()
+    results, timings, errors = {}, {}, {}
+    if not sources:
+        print("Peringatan: Tidak ada sumur untuk diproses.")
+        return {'results': results, 'timings': timings, 'errors': errors, 'elapsed': 0.0}
+
+    max_workers = max_workers or os.cpu_count() or 1
+    job_args = (tuple(modules), params, target_intervals, target_zones)
+
+    def _collect(well_name, run):
+        try:
+            output = run()
+            results[well_name] = output['result']
+            timings[well_name] = output['timing']
+        except Exception as e:
+            errors[well_name] = str(e)
+            print(f"Peringatan: GSA gagal untuk sumur {well_name}: {e}")
+
+    if max_workers == 1 or len(sources) == 1:
+        for well_name, source in sources.items():
+            _collect(well_name, lambda: _run_well_job(well_name, source, *job_args))
+    else:
+        workers = min(max_workers, len(sources))
+        pending = iter(sources.items())
+        # future -> (sumur, blok shared memory atau None)
+        in_flight = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                while True:
+                    # Batasi sumur yang sedang diproses; blok shared memory baru
+                    # dialokasikan saat sumurnya dikirim ke worker
+                    while len(in_flight) < workers * 2:
+                        item = next(pending, None)
+                        if item is None:
+                            break
+                        well_name, source = item
+                        shm = None
+                        if use_shared_memory and isinstance(source, pd.DataFrame):
+                            shm, source = _share_frame(source)
+                        try:
+                            future = executor.submit(_run_well_job, well_name, source, *job_args)
+                        except BaseException:
+                            if shm is not None:
+                                shm.close()
+                                shm.unlink()
+                            raise
+                        in_flight[future] = (well_name, shm)
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        well_name, shm = in_flight.pop(future)
+                        if shm is not None:
+                            shm.close()
+                            shm.unlink()
+                        _collect(well_name, future.result)
+        finally:
+            for _, shm in in_flight.values():
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+
+    elapsed = time.perf_counter() - batch_start
+    print(f"✅ Batch GSA selesai: {len(results)} sumur berhasil, {len(errors)} gagal, "
+          f"{elapsed:.2f} detik.")
+    # Urutkan hasil sesuai urutan input
+    order = [w for w in sources if w in results]
+    return {
+        'results': {w: results[w] for w in order},
+        'timings': {w: timings[w] for w in order},
+        'errors': errors,
+        'elapsed': elapsed,
+    }
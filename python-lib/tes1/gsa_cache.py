@@ -0,0 +1,207 @@
+# File: services/gsa_cache.py
+# Description: Cache tabel koefisien regresi GSA berdasarkan hash isi data.
+# Tier memori (LRU) di depan tier disk (Parquet, opsional dan dibatasi jumlah
+# file serta ukuran), sehingga permintaan GSA yang berulang cukup menjalankan Pass 3.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (engine Parquet untuk tier disk)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Tier disk hanya aktif bila direktori diberikan (params['COEFF_CACHE_DIR']
+# atau environment variable GSA_COEFF_CACHE_DIR)
+CACHE_DIR_ENV = 'GSA_COEFF_CACHE_DIR'
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_DISK_ENTRIES = 256
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+CACHE_VERSION = 1
+
+
+def _update_with_column(hasher, df: pd.DataFrame, col: Optional[str]):
+    """(Internal) Menambahkan isi satu kolom ke hash; kolom yang tidak ada ditandai eksplisit."""
+    hasher.update(f"|{col}|".encode())
+    if col is None or col not in df.columns:
+        hasher.update(b'<missing>')
+        return
+    series = df[col]
+    if pd.api.types.is_numeric_dtype(series):
+        hasher.update(np.ascontiguousarray(series.to_numpy(dtype=np.float64)).tobytes())
+    else:
+        hasher.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+
+
+def rgsa_cache_key(df_well: pd.DataFrame, params: Dict, mask: Optional[pd.Series] = None) -> str:
+    """
+    Membuat kunci cache untuk tabel koefisien RGSA.
+
+    Kunci mencakup isi DEPTH, GR, RES dan LITH, parameter yang memengaruhi
+    Pass 1-2 (SLIDING_WINDOW, RES_MIN, RES_MAX) serta mask interval/zona target.
+    Parameter tampilan tidak ikut, sehingga perubahannya tetap memakai cache.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f"rgsa-v{CACHE_VERSION}".encode())
+    for col in ('DEPTH', params.get('GR', 'GR'), params.get('RES', 'RT'),
+                params.get('LITH', 'LITHOLOGY')):
+        _update_with_column(hasher, df_well, col)
+    for name, default in (('SLIDING_WINDOW', 100), ('RES_MIN', 0.1), ('RES_MAX', 1000)):
+        hasher.update(f"|{name}={float(params.get(name, default))!r}".encode())
+    hasher.update(b'|MASK|')
+    if mask is not None:
+        hasher.update(np.packbits(np.asarray(mask, dtype=bool)).tobytes())
+    return hasher.hexdigest()
+
+
+class CoefficientCache:
+    """
+    Cache dua tingkat untuk DataFrame koefisien: LRU di memori dan file
+    Parquet di disk. Tier disk dilewati bila cache_dir None atau pyarrow
+    tidak tersedia. File disk dibatasi max_disk_entries dan max_disk_bytes;
+    file dengan mtime tertua (terakhir ditulis atau dibaca) dihapus lebih dulu.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 cache_dir: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.max_entries = max(int(max_entries), 1)
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max(int(max_disk_entries), 1)
+        self.max_disk_bytes = max(int(max_disk_bytes), 0)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.cache_dir or not PARQUET_AVAILABLE:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _remember(self, key: str, df: pd.DataFrame):
+        with self._lock:
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Mengambil tabel koefisien; None bila tidak ada di kedua tier."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits['memory'] += 1
+                return self._memory[key].copy()
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                print(f"Peringatan: Gagal membaca cache koefisien {path}: {e}")
+            else:
+                try:
+                    os.utime(path)  # mtime sebagai waktu akses untuk eviction
+                except OSError:
+                    pass
+                self._remember(key, df)
+                with self._lock:
+                    self.hits['disk'] += 1
+                return df.copy()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        """Menyimpan tabel koefisien ke memori dan, bila bisa, ke disk."""
+        df = df.reset_index(drop=True).copy()
+        self._remember(key, df)
+
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Direktori read-only atau disk penuh: cukup tier memori
+            print(f"Peringatan: Cache koefisien tidak disimpan ke disk: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """(Internal) Menghapus file tertua (mtime) hingga batas jumlah dan ukuran terpenuhi."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.parquet'):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        entries.sort()
+        count, total = len(entries), sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if count <= self.max_disk_entries and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total -= size
+
+    def clear(self, disk: bool = False):
+        """Mengosongkan tier memori, dan tier disk bila disk=True."""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.parquet'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_coefficient_cache(params: Optional[Dict] = None) -> CoefficientCache:
+    """
+    Mengembalikan cache koefisien bersama untuk proses ini.
+
+    Tier disk bersifat opt-in: lokasinya diambil dari params['COEFF_CACHE_DIR'],
+    lalu environment variable GSA_COEFF_CACHE_DIR; tanpa keduanya hanya tier
+    memori yang dipakai. Ukuran tier memori diatur dengan
+    params['COEFF_CACHE_SIZE'], batas tier disk dengan
+    params['COEFF_CACHE_DISK_ENTRIES'] dan params['COEFF_CACHE_DISK_BYTES'].
+    Cache dibuat ulang bila salah satu pengaturan berubah.
+    """
+    global _default_cache
+    params = params or {}
+    cache_dir = params.get('COEFF_CACHE_DIR', os.environ.get(CACHE_DIR_ENV) or None)
+    settings = dict(
+        max_entries=max(int(params.get('COEFF_CACHE_SIZE', DEFAULT_MAX_ENTRIES)), 1),
+        cache_dir=cache_dir,
+        max_disk_entries=max(int(params.get('COEFF_CACHE_DISK_ENTRIES', DEFAULT_MAX_DISK_ENTRIES)), 1),
+        max_disk_bytes=max(int(params.get('COEFF_CACHE_DISK_BYTES', DEFAULT_MAX_DISK_BYTES)), 0))
+    with _default_cache_lock:
+        if _default_cache is None or any(
+                getattr(_default_cache, name) != value for name, value in settings.items()):
+            _default_cache = CoefficientCache(**settings)
+        return _default_cache
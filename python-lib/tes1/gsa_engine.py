@@ -0,0 +1,275 @@
+# File: services/gsa_engine.py
+# Description: Mesin regresi bersama untuk RGSA/NGSA/DGSA. Seluruh jendela
+# sliding-window diselesaikan sekaligus dengan satu panggilan numpy.linalg.
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+COEFF_COLS = ['b0', 'b1', 'b2', 'b3']
+
+
+def _window_starts(n_samples: int, window_size: int, step: int) -> np.ndarray:
+    """(Internal) Indeks awal jendela, sama dengan range(0, n - window, step)."""
+    return np.arange(0, max(n_samples - window_size, 0), max(int(step), 1))
+
+
+def solve_normal_equations(xtx, xty):
+    """
+    Menyelesaikan persamaan normal banyak jendela sekaligus.
+    Jendela yang singular diselesaikan dengan pseudo-inverse (solusi minimum-norm,
+    sama seperti lstsq pada LinearRegression).
+    """
+    vector_rhs = xty.ndim == 2
+    if vector_rhs:
+        xty = xty[..., None]
+    coefs = np.full(xty.shape, np.nan)
+    try:
+        coefs = np.linalg.solve(xtx, xty)
+        singular = ~np.isfinite(coefs).all(axis=(1, 2))
+    except np.linalg.LinAlgError:
+        singular = np.ones(len(xtx), dtype=bool)
+        for w in range(len(xtx)):
+            try:
+                coefs[w] = np.linalg.solve(xtx[w], xty[w])
+                singular[w] = False
+            except np.linalg.LinAlgError:
+                pass
+    if singular.any():
+        coefs[singular] = np.linalg.pinv(xtx[singular]) @ xty[singular]
+    if vector_rhs:
+        coefs = coefs[..., 0]
+    return coefs
+
+
+def _fit_windows_batched(depth, x, Y, valid, starts, window_size, min_points):
+    """
+    (Internal) Regresi sliding-window lewat view 3-D (jendela x sampel x fitur).
+
+    Y berukuran (N, K): K target berbagi matriks desain dan faktorisasi yang
+    sama, sehingga diselesaikan sebagai satu masalah multi right-hand-side.
+    Mengembalikan (kedalaman jendela, koefisien (W, 4, K)) atau None.
+    """
+    design = np.column_stack([x, x**2, x**3])
+
+    # View 3-D tanpa salinan: (jendela, sampel, fitur)
+    X = sliding_window_view(design, window_size, axis=0)[starts].transpose(0, 2, 1)
+    Yw = sliding_window_view(Y, window_size, axis=0)[starts].transpose(0, 2, 1)
+    W = sliding_window_view(valid, window_size)[starts].astype(float)
+    D = sliding_window_view(depth, window_size)[starts]
+
+    n_points = W.sum(axis=1)
+    keep = n_points >= min_points
+    if not keep.any():
+        return None
+    X, Yw, W, D, n_points = X[keep], Yw[keep], W[keep], D[keep], n_points[keep]
+
+    mean_x = np.einsum('wn,wni->wi', W, X) / n_points[:, None]
+    mean_y = np.einsum('wn,wnk->wk', W, Yw) / n_points[:, None]
+    Xc = (X - mean_x[:, None, :]) * W[:, :, None]
+    Yc = (Yw - mean_y[:, None, :]) * W[:, :, None]
+    xtx = np.einsum('wni,wnj->wij', Xc, Xc)
+    xty = np.einsum('wni,wnk->wik', Xc, Yc)
+
+    coefs = solve_normal_equations(xtx, xty)
+    # b0 = mean(y) - mean(X) . coef
+    intercept = mean_y - np.einsum('wi,wik->wk', mean_x, coefs)
+    return D.mean(axis=1), np.concatenate([intercept[:, None, :], coefs], axis=1)
+
+
+def _fit_windows_incremental(depth, x, Y, valid, starts, window_size, min_points):
+    """
+    (Internal) Regresi sliding-window dengan prefix sum.
+
+    Prefix sum dari x^0..x^6 dan x^0..x^3 * y (hanya sampel yang lolos filter)
+    dihitung sekali, sehingga persamaan normal tiap jendela cukup diperoleh
+    dari selisih dua baris prefix. x digeser ke rata-rata globalnya agar
+    matriks normal tetap terkondisi baik, lalu koefisien dikembalikan ke basis
+    asli [1, x, x^2, x^3].
+    """
+    n_targets = Y.shape[1]
+    w = valid.astype(float)
+    shift = x[valid].mean() if valid.any() else 0.0
+    xs = np.where(valid, x - shift, 0.0)
+
+    powers = xs[:, None] ** np.arange(7)[None, :] * w[:, None]
+    cross = (powers[:, :4, None] * Y[:, None, :]).reshape(len(x), 4 * n_targets)
+    prefix = np.vstack([np.zeros((1, 7 + 4 * n_targets)),
+                        np.cumsum(np.hstack([powers, cross]), axis=0)])
+    depth_prefix = np.concatenate([[0.0], np.cumsum(depth)])
+
+    ends = starts + window_size
+    sums = prefix[ends] - prefix[starts]
+    n_points = np.rint(sums[:, 0])
+    keep = n_points >= min_points
+    if not keep.any():
+        return None
+    sums = sums[keep]
+
+    idx = np.arange(4)
+    xtx = sums[:, idx[:, None] + idx[None, :]]
+    xty = sums[:, 7:].reshape(len(sums), 4, n_targets)
+    a0, a1, a2, a3 = np.moveaxis(solve_normal_equations(xtx, xty), 1, 0)
+
+    # Kembalikan koefisien dari basis (x - shift)^k ke basis x^k
+    c = shift
+    coefs = np.stack([
+        a0 - a1 * c + a2 * c**2 - a3 * c**3,
+        a1 - 2 * a2 * c + 3 * a3 * c**2,
+        a2 - 3 * a3 * c,
+        a3,
+    ], axis=1)
+
+    window_depth = (depth_prefix[ends] - depth_prefix[starts]) / window_size
+    return window_depth[keep], coefs
+
+
+def fit_sliding_cubic_windows_multi(depth, gr, targets, target_filters, log_targets,
+                                    window_size: int, step: int = 20, min_points: int = 30,
+                                    gr_filter=(5, 180), method: str = 'batched') -> list:
+    """
+    Menghitung koefisien regresi kubik GR untuk beberapa target sekaligus.
+
+    Semua target memakai jendela GR dan matriks desain yang sama, tetapi
+    setiap target punya mask sendiri (filter GR dan filter target itu),
+    sehingga hasilnya sama dengan fit_sliding_cubic_windows per target.
+    Target dengan mask identik dikelompokkan dan persamaan normalnya
+    diselesaikan sekali sebagai masalah multi right-hand-side.
+
+    Args:
+        depth, gr: Array sampel yang sudah bebas NaN dan terurut.
+        targets: Array (N, K) nilai target.
+        target_filters (list): Batas eksklusif (min, max) untuk tiap target.
+        log_targets (list): Tiap target diregresi terhadap log10 jika True.
+        window_size, step, min_points, gr_filter, method: Lihat
+            fit_sliding_cubic_windows.
+
+    Returns:
+        list: K DataFrame koefisien ('DEPTH', 'b0'..'b3'), satu per target.
+    """
+    depth = np.asarray(depth, dtype=float)
+    gr = np.asarray(gr, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    if targets.ndim == 1:
+        targets = targets[:, None]
+    n_targets = targets.shape[1]
+    empty = [pd.DataFrame(columns=['DEPTH'] + COEFF_COLS) for _ in range(n_targets)]
+
+    starts = _window_starts(len(gr), window_size, step)
+    if len(starts) == 0:
+        return empty
+
+    if method not in ('batched', 'incremental'):
+        raise ValueError(f"Metode regresi tidak dikenal: {method}")
+    gr_valid = (gr > gr_filter[0]) & (gr < gr_filter[1])
+    groups = {}
+    with np.errstate(invalid='ignore'):
+        for k, (low, high) in enumerate(target_filters):
+            valid = gr_valid & (targets[:, k] > low) & (targets[:, k] < high)
+            groups.setdefault(np.packbits(valid).tobytes(), (valid, []))[1].append(k)
+
+    results = list(empty)
+    for valid, members in groups.values():
+        x = np.where(valid, 0.01 * gr, 0.0)
+        Y = np.zeros((len(gr), len(members)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, k in enumerate(members):
+                values = np.log10(targets[:, k]) if log_targets[k] else targets[:, k]
+                Y[:, j] = np.where(valid, values, 0.0)
+
+        if method == 'incremental':
+            fitted = _fit_windows_incremental(depth, x, Y, valid, starts, window_size, min_points)
+        else:
+            fitted = _fit_windows_batched(depth, x, Y, valid, starts, window_size, min_points)
+        if fitted is None:
+            continue
+        window_depth, coefs = fitted
+        for j, k in enumerate(members):
+            results[k] = pd.DataFrame({'DEPTH': window_depth,
+                                       **{col: coefs[:, i, j] for i, col in enumerate(COEFF_COLS)}})
+    return results
+
+
+def fit_sliding_cubic_windows(depth, gr, target, window_size: int, step: int = 20,
+                              min_points: int = 30, gr_filter=(5, 180),
+                              target_filter=(0.1, 1000), log_target: bool = False,
+                              method: str = 'batched') -> pd.DataFrame:
+    """
+    Menghitung koefisien regresi kubik GR (b0..b3) untuk setiap sliding window.
+
+    Semua jendela ditumpuk menjadi satu view 3-D (jendela x sampel x fitur)
+    dari matriks desain [GR, GR^2, GR^3] (GR diskalakan 0.01), lalu persamaan
+    normal semua jendela diselesaikan dalam satu panggilan numpy.linalg.solve.
+    Hasilnya setara dengan LinearRegression().fit(X, y) per jendela.
+
+    Args:
+        depth, gr, target: Array sampel yang sudah bebas NaN dan terurut.
+        window_size (int): Jumlah sampel per jendela.
+        step (int): Pergeseran antar jendela.
+        min_points (int): Minimal sampel lolos filter agar jendela dipakai.
+        gr_filter, target_filter (tuple): Batas eksklusif (min, max).
+        log_target (bool): Jika True, regresi dilakukan terhadap log10(target).
+        method (str): 'batched' (view 3-D, default) atau 'incremental'
+            (prefix sum, biaya per jendela O(1) sehingga cocok untuk step kecil).
+
+    Returns:
+        pd.DataFrame: Kolom 'DEPTH' (rata-rata kedalaman jendela) dan 'b0'..'b3'.
+    """
+    return fit_sliding_cubic_windows_multi(
+        depth, gr, np.asarray(target, dtype=float)[:, None], [target_filter], [log_target],
+        window_size=window_size, step=step, min_points=min_points,
+        gr_filter=gr_filter, method=method)[0]
+
+
+def interpolate_coefficients(depths, coeff_df: pd.DataFrame) -> np.ndarray:
+    """
+    Interpolasi linear koefisien b0..b3 untuk seluruh array kedalaman sekaligus.
+
+    Setara dengan _interpolate_coeffs per baris: kedalaman <= DEPTH minimum
+    memakai koefisien pertama, >= DEPTH maksimum memakai koefisien terakhir,
+    selain itu diinterpolasi antara baris terakhir dengan DEPTH <= d dan baris
+    pertama dengan DEPTH > d (dicari dengan np.searchsorted).
+
+    Returns:
+        np.ndarray: Array (N, 4) berisi b0..b3; NaN untuk kedalaman NaN.
+    """
+    depths = np.asarray(depths, dtype=float)
+    out = np.full((len(depths), 4), np.nan)
+    if coeff_df is None or coeff_df.empty:
+        return out
+
+    coeff_df = coeff_df.sort_values('DEPTH', kind='stable')
+    knots = coeff_df['DEPTH'].to_numpy(dtype=float)
+    table = coeff_df[COEFF_COLS].to_numpy(dtype=float)
+
+    valid = ~np.isnan(depths)
+    d = depths[valid]
+    upper = np.searchsorted(knots, d, side='right')
+    lower = upper - 1
+
+    below = d <= knots[0]
+    above = d >= knots[-1]
+    inner = ~(below | above)
+
+    lower = np.clip(lower, 0, len(knots) - 1)
+    upper = np.clip(upper, 0, len(knots) - 1)
+    span = knots[upper] - knots[lower]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(inner & (span != 0), (d - knots[lower]) / span, 0.0)
+
+    result = table[lower] + weight[:, None] * (table[upper] - table[lower])
+    result[below] = table[0]
+    result[above] = table[-1]
+    out[valid] = result
+    return out
+
+
+def evaluate_cubic_baseline(depths, gr, coeff_df: pd.DataFrame) -> np.ndarray:
+    """
+    Menghitung baseline kubik b0 + b1*g + b2*g^2 + b3*g^3 (g = 0.01*GR) untuk
+    seluruh sampel dalam satu operasi vektor. Nilai dikembalikan dalam ruang
+    regresi (untuk RGSA masih log10, pemanggil yang menerapkan 10**).
+    """
+    coeffs = interpolate_coefficients(depths, coeff_df)
+    grfix = 0.01 * np.asarray(gr, dtype=float)
+    return coeffs[:, 0] + grfix * (coeffs[:, 1] + grfix * (coeffs[:, 2] + grfix * coeffs[:, 3]))
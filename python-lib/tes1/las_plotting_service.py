@@ -2,10 +2,13 @@
 Service for plotting LAS files using the main plotting functions from plotting_service.py
 """
 import os
+import numpy as np
 import pandas as pd
-import lasio
 from typing import List, Dict, Any, Optional
 from services.plotting_service import main_plot
+from services.well_store import read_well
+from services.las_reader import scan_las_header
+from services.depth_grid import GRID_INDEX_COL, DepthGrid, resample_frame
 
 
 def plot_las_file(file_path: str, sequence: List[str] = None, title: str = None) -> Dict[str, Any]:
@@ -27,12 +30,8 @@ def plot_las_file(file_path: str, sequence: List[str] = None, title: str = None)
         raise ValueError("File must be a LAS file (.las extension)")
     
     try:
-        # Read LAS file
-        las = lasio.read(file_path)
-        
-        # Convert to DataFrame and reset index
-        df = las.df()
-        df = df.reset_index()  # Make DEPT a column instead of index
+        # Read LAS file through the columnar well store (DEPT as a column)
+        df, _ = read_well(file_path)
         
         # Get available curves
         available_curves = df.columns.tolist()
@@ -87,7 +86,8 @@ def plot_las_file(file_path: str, sequence: List[str] = None, title: str = None)
         raise Exception(f"Error plotting LAS file {file_path}: {str(e)}")
 
 
-def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, title: str = None) -> Dict[str, Any]:
+def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, title: str = None,
+                            step: Optional[float] = None, resample_method: str = 'linear') -> Dict[str, Any]:
     """
     Plot multiple LAS files in separate subplots or combined.
     
@@ -95,6 +95,10 @@ def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, t
         file_paths: List of paths to LAS files
         sequence: List of curve names to plot (optional)
         title: Title for the plot (optional)
+        step: Resample every file onto one shared depth grid (multiples of
+            step) and join them by grid index; curves present in several
+            files are coalesced in file order (optional)
+        resample_method: 'linear', 'nearest' or 'block' when step is given
         
     Returns:
         Dict containing plot JSON and metadata for all files
@@ -104,19 +108,22 @@ def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, t
     
     results = []
     combined_df = pd.DataFrame()
+    grid_frames = []
     
     for file_path in file_paths:
         try:
-            # Read each LAS file
-            las = lasio.read(file_path)
-            df = las.df().reset_index()
+            # Read each LAS file through the columnar well store
+            df, _ = read_well(file_path)
             
             # Add file identifier column
             file_name = os.path.basename(file_path).replace('.las', '')
             df['FILE_SOURCE'] = file_name
             
             # Combine dataframes
-            if combined_df.empty:
+            if step is not None:
+                # Joined on one shared grid after all files are read
+                grid_frames.append((file_name, df))
+            elif combined_df.empty:
                 combined_df = df
             else:
                 # Align columns and combine
@@ -139,6 +146,9 @@ def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, t
                 "error": str(e)
             })
     
+    if grid_frames:
+        combined_df = _join_files_on_grid(grid_frames, step, resample_method)
+    
     if combined_df.empty:
         raise Exception("No valid LAS files could be processed")
     
@@ -156,7 +166,8 @@ def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, t
                 break
         
         if not sequence:
-            sequence = [col for col in available_curves if col not in ['DEPT', 'FILE_SOURCE']][:4]
+            sequence = [col for col in available_curves
+                        if col not in ['DEPT', 'FILE_SOURCE', GRID_INDEX_COL]][:4]
     
     # Filter sequence to only include available curves
     valid_sequence = [curve for curve in sequence if curve in available_curves]
@@ -187,6 +198,36 @@ def plot_multiple_las_files(file_paths: List[str], sequence: List[str] = None, t
     }
 
 
+def _join_files_on_grid(frames: List[tuple], step: float, method: str) -> pd.DataFrame:
+    """
+    Resample every file onto one DepthGrid spanning all of them and join the
+    files by grid index (outer join). A curve present in several files is
+    coalesced in file order; FILE_SOURCE names the first file with data at
+    each index.
+    """
+    depth_cols = [df.columns[0] for _, df in frames]
+    grid = DepthGrid.spanning([df[col] for (_, df), col in zip(frames, depth_cols)], step)
+    curves = []
+    for (_, df), depth_col in zip(frames, depth_cols):
+        curves += [col for col in df.columns
+                   if col not in curves and col != depth_col and col not in depth_cols
+                   and pd.api.types.is_numeric_dtype(df[col])]
+
+    combined = {GRID_INDEX_COL: grid.indices, depth_cols[0]: grid.depths}
+    source = np.full(len(grid), None, dtype=object)
+    for (file_name, df), depth_col in zip(frames, depth_cols):
+        file_curves = [col for col in curves if col in df.columns]
+        resampled = resample_frame(df, grid, columns=file_curves, method=method, depth_col=depth_col)
+        has_data = resampled[file_curves].notna().any(axis=1).to_numpy()
+        source[pd.isna(source) & has_data] = file_name
+        for col in file_curves:
+            values = resampled[col].to_numpy()
+            combined[col] = values if col not in combined else np.where(
+                np.isnan(combined[col]), values, combined[col])
+    combined['FILE_SOURCE'] = source
+    return pd.DataFrame(combined)
+
+
 def get_las_curves_info(file_paths: List[str]) -> Dict[str, Any]:
     """
     Get curve information from multiple LAS files to help user select curves for plotting.
@@ -202,28 +243,29 @@ def get_las_curves_info(file_paths: List[str]) -> Dict[str, Any]:
     
     for file_path in file_paths:
         try:
-            las = lasio.read(file_path)
+            # Header only (stops at ~A), cached per file
+            header = scan_las_header(file_path)
             file_name = os.path.basename(file_path)
             
             file_curves = []
-            for curve in las.curves:
+            for curve in header["curves"]:
                 curve_info = {
-                    "mnemonic": curve.mnemonic,
-                    "unit": curve.unit,
-                    "description": curve.descr
+                    "mnemonic": curve["mnemonic"],
+                    "unit": curve["unit"],
+                    "description": curve["description"]
                 }
                 file_curves.append(curve_info)
                 
                 # Track all unique curves
-                if curve.mnemonic not in all_curves:
-                    all_curves[curve.mnemonic] = {
-                        "unit": curve.unit,
-                        "description": curve.descr,
+                if curve["mnemonic"] not in all_curves:
+                    all_curves[curve["mnemonic"]] = {
+                        "unit": curve["unit"],
+                        "description": curve["description"],
                         "files": [file_name]
                     }
                 else:
-                    if file_name not in all_curves[curve.mnemonic]["files"]:
-                        all_curves[curve.mnemonic]["files"].append(file_name)
+                    if file_name not in all_curves[curve["mnemonic"]]["files"]:
+                        all_curves[curve["mnemonic"]]["files"].append(file_name)
             
             file_info.append({
                 "file_path": file_path,
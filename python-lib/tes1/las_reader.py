@@ -0,0 +1,268 @@
+# File: services/las_reader.py
+# Description: Pembaca LAS ringan. scan_las_header hanya membaca bagian header
+# (~V, ~W, ~P, ~C) dan berhenti di ~A, dengan cache per file yang dibatalkan
+# bila ukuran atau mtime file berubah. read_las_data mem-parsing bagian ~A
+# secara bulk dari file yang di-memory-map, dengan fallback ke lasio.
+
+import io
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import lasio
+import numpy as np
+import pandas as pd
+
+HEADER_CACHE_SIZE = 4096
+
+_SECTION_KEYS = {'V': 'version', 'W': 'well', 'P': 'params', 'C': 'curves'}
+# Seperti lasio: field ini tetap string walaupun berupa angka
+_NUMBER_STRINGS = ('API', 'UWI')
+_COMMA_DECIMAL = re.compile(r'(\d),(\d)')
+
+
+def _parse_header_line(line: str) -> tuple:
+    """
+    (Internal) Memecah baris header LAS 2.0 'MNEM.UNIT  VALUE : DESCRIPTION'.
+    Unit menempel pada titik pertama; value berakhir di titik dua terakhir.
+    """
+    mnemonic, dot, rest = line.partition('.')
+    if not dot:
+        mnemonic, _, descr = line.partition(':')
+        return mnemonic.strip(), '', '', descr.strip()
+    unit_end = 0
+    while unit_end < len(rest) and not rest[unit_end].isspace() and rest[unit_end] != ':':
+        unit_end += 1
+    unit = rest[:unit_end]
+    value, colon, descr = rest[unit_end:].rpartition(':')
+    if not colon:
+        value, descr = descr, ''
+    return mnemonic.strip(), unit.strip(), value.strip(), descr.strip()
+
+
+def _header_value(mnemonic: str, value):
+    """
+    (Internal) Konversi value header seperti lasio: int bila bisa, lalu float
+    berhingga, selain itu string apa adanya. API dan UWI tidak dikonversi.
+    Angka dikembalikan sebagai int/float Python agar aman untuk JSON.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if not isinstance(value, str) or mnemonic.upper() in _NUMBER_STRINGS:
+        return value
+    text = _COMMA_DECIMAL.sub(r'\1.\2', value)
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return value
+    return number if np.isfinite(number) else value
+
+
+def _dedupe_mnemonics(curves: List[dict]):
+    """(Internal) Mnemonic kurva ganda diberi akhiran ':1', ':2', ... seperti lasio."""
+    counts = {}
+    for curve in curves:
+        counts[curve['mnemonic']] = counts.get(curve['mnemonic'], 0) + 1
+    seen = {}
+    for curve in curves:
+        name = curve['mnemonic']
+        if counts[name] > 1:
+            seen[name] = seen.get(name, 0) + 1
+            curve['mnemonic'] = f"{name}:{seen[name]}"
+
+
+def _scan_header(buffer) -> tuple:
+    """
+    (Internal) Membaca baris header dari buffer biner (file, mmap, BytesIO)
+    sampai baris ~A.
+
+    Returns:
+        tuple: (header, offset byte awal data setelah baris ~A, atau None
+        bila ~A tidak ditemukan).
+    """
+    header = {'version': {}, 'well': {}, 'params': {}, 'curves': []}
+    section = None
+    data_offset = None
+    for raw_line in iter(buffer.readline, b''):
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('~'):
+            section_char = line[1:2].upper()
+            if section_char == 'A':
+                data_offset = buffer.tell()
+                break
+            section = _SECTION_KEYS.get(section_char)
+            continue
+        if section is None:
+            continue
+        mnemonic, unit, value, descr = _parse_header_line(line)
+        mnemonic = mnemonic or 'UNKNOWN'
+        if section == 'curves':
+            header['curves'].append({'mnemonic': mnemonic, 'unit': unit, 'description': descr})
+        else:
+            header[section][mnemonic] = {'unit': unit, 'value': _header_value(mnemonic, value),
+                                         'descr': descr}
+    _dedupe_mnemonics(header['curves'])
+    return header, data_offset
+
+
+def parse_las_header(path: str) -> dict:
+    """
+    Membaca header LAS tanpa menyentuh bagian data (~A).
+
+    Returns:
+        dict: 'version', 'well', 'params' (mnemonic -> {'unit', 'value',
+        'descr'}, value dikonversi ke int/float seperti lasio) dan 'curves'
+        (list {'mnemonic', 'unit', 'description'} sesuai urutan di file).
+    """
+    with open(path, 'rb') as f:
+        header, _ = _scan_header(f)
+    if not header['curves']:
+        raise ValueError(f"Bagian ~C (kurva) tidak ditemukan di {path}")
+    return header
+
+
+def header_from_las(las: lasio.LASFile) -> dict:
+    """Header dengan bentuk yang sama seperti parse_las_header, dari objek lasio."""
+    def _items(section):
+        return {item.mnemonic: {'unit': item.unit, 'value': _header_value(item.mnemonic, item.value),
+                                'descr': item.descr}
+                for item in section}
+
+    return {
+        'version': _items(las.version),
+        'well': _items(las.well),
+        'params': _items(las.params),
+        'curves': [{'mnemonic': c.mnemonic, 'unit': c.unit, 'description': c.descr}
+                   for c in las.curves],
+    }
+
+
+_header_cache = OrderedDict()
+_header_cache_lock = threading.Lock()
+
+
+def scan_las_header(path: str) -> dict:
+    """
+    parse_las_header dengan cache per file (LRU). Entri dipakai ulang selama
+    ukuran dan mtime file tidak berubah. Hasil tidak boleh diubah pemanggil.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _header_cache_lock:
+        cached = _header_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            _header_cache.move_to_end(key)
+            return cached[1]
+
+    header = parse_las_header(path)
+    with _header_cache_lock:
+        _header_cache[key] = (signature, header)
+        _header_cache.move_to_end(key)
+        while len(_header_cache) > HEADER_CACHE_SIZE:
+            _header_cache.popitem(last=False)
+    return header
+
+
+def clear_header_cache():
+    """Mengosongkan cache header."""
+    with _header_cache_lock:
+        _header_cache.clear()
+
+
+# --- Bagian data (~A) ---
+
+DEFAULT_NULL_VALUE = -999.25
+
+
+class IrregularLASError(ValueError):
+    """Bagian ~A tidak bisa dibaca dengan parser cepat (wrapped atau tidak beraturan)."""
+
+
+def _null_value(header: dict, null_value: Optional[float]) -> float:
+    """(Internal) Nilai NULL dari argumen, dari ~W NULL, atau -999.25."""
+    if null_value is not None:
+        return float(null_value)
+    try:
+        return float(header['well']['NULL']['value'])
+    except (KeyError, TypeError, ValueError):
+        return DEFAULT_NULL_VALUE
+
+
+def _read_data_fast(buffer, columns: Optional[List[str]], null_value: Optional[float]) -> tuple:
+    """(Internal) Parser cepat untuk bagian ~A LAS 2.0 yang tidak di-wrap."""
+    header, data_offset = _scan_header(buffer)
+    names = [c['mnemonic'] for c in header['curves']]
+    if data_offset is None or not names:
+        raise IrregularLASError("Bagian ~C atau ~A tidak ditemukan.")
+    wrap = str(header['version'].get('WRAP', {}).get('value', 'NO')).strip().upper()
+    if wrap.startswith('Y'):
+        raise IrregularLASError("File LAS wrapped.")
+    missing = [c for c in (columns or []) if c not in names]
+    if missing:
+        raise KeyError(f"Kolom {missing} tidak ada di file LAS")
+
+    buffer.seek(data_offset)
+    try:
+        # Parser C pandas: seluruh ~A sekaligus menjadi float64. Tanpa usecols
+        # agar baris dengan kolom berlebih tetap terdeteksi sebagai error.
+        data = pd.read_csv(buffer, sep=r'\s+', header=None, comment='#', dtype=np.float64,
+                           float_precision='round_trip').to_numpy()
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError) as e:
+        raise IrregularLASError(str(e))
+    # Baris yang lebih pendek terisi NaN di kolom terakhir
+    if data.shape[1] != len(names) or np.isnan(data[:, -1]).any():
+        raise IrregularLASError("Jumlah kolom ~A tidak sesuai dengan ~C.")
+
+    data[data == _null_value(header, null_value)] = np.nan
+    df = pd.DataFrame(data, columns=names)
+    if columns is not None:
+        df = df[list(columns)]
+    return df, header
+
+
+def read_las_data(source: str, columns: Optional[List[str]] = None,
+                  null_value: Optional[float] = None, is_content: bool = False) -> tuple:
+    """
+    Membaca data LAS menjadi DataFrame (sama dengan las.df().reset_index()).
+
+    File di disk di-memory-map dan bagian ~A di-parse sekaligus menjadi
+    array float64; nilai NULL (dari ~W, default -999.25) menjadi NaN. File
+    wrapped atau tidak beraturan dibaca dengan lasio.
+
+    Args:
+        source (str): Path file LAS, atau isi file bila is_content=True.
+        columns (list, optional): Kolom yang dikembalikan.
+        null_value (float, optional): Override nilai NULL.
+
+    Returns:
+        tuple: (DataFrame, header dict).
+    """
+    try:
+        if is_content:
+            return _read_data_fast(io.BytesIO(source.encode('utf-8', errors='replace')),
+                                   columns, null_value)
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise IrregularLASError("File kosong.")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _read_data_fast(mapped, columns, null_value)
+    except IrregularLASError:
+        pass
+
+    las = lasio.read(io.StringIO(source) if is_content else source)
+    df = las.df().reset_index()
+    if null_value is not None:
+        df = df.replace(float(null_value), np.nan)
+    if columns is not None:
+        df = df[list(columns)]
+    return df, header_from_las(las)
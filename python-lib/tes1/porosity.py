@@ -43,6 +43,41 @@ def _klasifikasi_reservoir_numeric(phie):
         return 1  # Non Prospek
 
 
+def dn_xplot_array(rho0, nphi0, rho_ma, rho_max, rho_fl):
+    """
+    (Internal) Versi array dari dn_xplot untuk seluruh sampel sekaligus.
+    Kedua cabang nphi0 >= phid dipilih dengan np.where; penyebut ~0 atau NaN
+    menghasilkan NaN seperti pada versi skalar.
+    """
+    rho0 = np.asarray(rho0, dtype=float)
+    nphi0 = np.asarray(nphi0, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        phid = (rho_ma - rho0 * 1000) / (rho_ma - rho_fl)
+        upper_branch = nphi0 >= phid
+        pda = np.where(upper_branch, (rho_ma - rho_max) / (rho_ma - rho_fl), 1.0)
+        pna = np.where(upper_branch,
+                       0.7 - 10 ** (-5 * nphi0 - 0.16),
+                       -2.06 * nphi0 - 1.17 + 10 ** (-16 * nphi0 - 0.4))
+
+        denom = pda - pna
+        bad_denom = np.isclose(denom, 0) | np.isnan(denom)
+        phix = (pda * nphi0 - phid * pna) / np.where(bad_denom, np.nan, denom)
+
+        bad_phix = np.isclose(1 - phix, 0) | np.isnan(phix)
+        phix = np.where(bad_phix, np.nan, phix)
+        rma = (rho0 * 1000 - phix * rho_fl) / np.where(bad_phix, np.nan, 1 - phix)
+    return phix, rma
+
+
+def _klasifikasi_reservoir_array(phie):
+    """(Internal) Versi array dari _klasifikasi_reservoir_numeric."""
+    phie = np.asarray(phie, dtype=float)
+    return np.select(
+        [np.isnan(phie), phie >= 0.20, phie >= 0.15, phie >= 0.10],
+        [0, 4, 3, 2],
+        default=1)
+
+
 def calculate_porosity(
     df: pd.DataFrame,
     params: dict,
@@ -116,40 +151,41 @@ def calculate_porosity(
     df_processed.loc[mask, "NPHI_SR"] = df_processed.loc[mask,
                                                          "NPHI_SR"].clip(lower=-0.015, upper=1)
 
-    # Jalankan fungsi dn_xplot yang kompleks hanya pada baris yang relevan
-    target_rows = df_processed.loc[mask].copy()
-
-    # Pastikan kolom yang dibutuhkan tidak NaN sebelum apply
-    valid_rows_mask = target_rows["RHOB_SR"].notna(
-    ) & target_rows["NPHI_SR"].notna()
-
-    if valid_rows_mask.any():
-        results = target_rows[valid_rows_mask].apply(
-            lambda row: dn_xplot(
-                row["RHOB_SR"], row["NPHI_SR"], RHO_MA_BASE, RHO_MAX, RHO_FL * 1000
-            ),
-            axis=1
-        )
-        # Pisahkan hasil tuple (phix, rma) ke dalam dua kolom
-        phix_vals, rma_vals = zip(*results)
-        target_rows.loc[valid_rows_mask, 'phix_temp'] = phix_vals
-        target_rows.loc[valid_rows_mask, 'rma_temp'] = rma_vals
-
-        # Perhitungan akhir berdasarkan hasil dn_xplot
-        target_rows["PHIE_DEN"] = np.array(
-            target_rows['phix_temp']) * (1 - target_rows["VSH"])
-        target_rows["PHIT_DEN"] = target_rows["PHIE_DEN"] + \
-            target_rows["VSH"] * PHIT_SH
-        target_rows["PHIE"] = target_rows["PHIE_DEN"].clip(
-            lower=0, upper=PHIE_MAX * (1 - target_rows["VSH"]))
-        target_rows["PHIT"] = target_rows["PHIE"] + \
-            target_rows["VSH"] * PHIT_SH
-        target_rows["RHO_MAT"] = np.array(target_rows['rma_temp']) / 1000
-
-        # Update DataFrame utama dengan hasil perhitungan
+    # Crossplot D-N dan turunannya untuk semua baris terpilih sekaligus
+    rhob_sr = df_processed.loc[mask, "RHOB_SR"].to_numpy(dtype=float)
+    nphi_sr = df_processed.loc[mask, "NPHI_SR"].to_numpy(dtype=float)
+    vsh = vsh_masked.to_numpy(dtype=float)
+    valid_rows = ~np.isnan(rhob_sr) & ~np.isnan(nphi_sr)
+
+    if valid_rows.any():
+        phix, rma = dn_xplot_array(
+            rhob_sr, nphi_sr, RHO_MA_BASE, RHO_MAX, RHO_FL * 1000)
+        phix[~valid_rows] = np.nan
+        rma[~valid_rows] = np.nan
+
+        # Perhitungan akhir berdasarkan hasil crossplot
+        phie_den = phix * (1 - vsh)
+        phit_den = phie_den + vsh * PHIT_SH
+        phie_limit = PHIE_MAX * (1 - vsh)
+        # Kedua batas dibandingkan terhadap PHIE_DEN asli, seperti Series.clip
+        phie = np.where(phie_den < 0, 0.0, phie_den)
+        phie = np.where(phie_den > phie_limit, phie_limit, phie)
+        phit = phie + vsh * PHIT_SH
+
+        # Nilai NaN tidak menimpa nilai lama (sama seperti DataFrame.update)
         update_cols = ["RHOB_SR", "NPHI_SR", "PHIE_DEN",
                        "PHIT_DEN", "PHIE", "PHIT", "RHO_MAT"]
-        df_processed.update(target_rows[update_cols])
-
-    print("Kolom Porositas baru telah ditambahkan/diperbarui: PHIE, PHIT, dll.")
+        new_values = np.column_stack(
+            [rhob_sr, nphi_sr, phie_den, phit_den, phie, phit, rma / 1000])
+        old_values = df_processed.loc[mask, update_cols].to_numpy(dtype=float)
+        df_processed.loc[mask, update_cols] = np.where(
+            np.isnan(new_values), old_values, new_values)
+
+    # Klasifikasi reservoir berdasarkan PHIE
+    if "RESERVOIR_CLASS" not in df_processed.columns:
+        df_processed["RESERVOIR_CLASS"] = 0
+    df_processed.loc[mask, "RESERVOIR_CLASS"] = _klasifikasi_reservoir_array(
+        df_processed.loc[mask, "PHIE"].to_numpy(dtype=float))
+
+    print("Kolom Porositas baru telah ditambahkan/diperbarui: PHIE, PHIT, RESERVOIR_CLASS, dll.")
     return df_processed
@@ -1,14 +1,37 @@
 # FILE 2: api/app/services/qc_service.py
 # (Ini adalah kode run_quality_control.py dan handle_nulls_script.py Anda yang digabungkan)
 import os
-import lasio
 import pandas as pd
 import numpy as np
 import io
+import importlib.util
 import logging
+import sys
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from services.qc_store import (QCResultStore, code_fingerprint, config_fingerprint,
+                               content_fingerprint, marker_fingerprints, qc_result_key)
+from services.las_reader import read_las_data
+from services.well_store import read_well
 
-def add_markers_to_df(df, well_name, all_markers_df, logger):
-    """Menambahkan marker ke DataFrame, dengan logging."""
+def _interval_labels(positions, assigned, labels, index, categorical=False):
+    """
+    (Internal) Mengubah indeks interval per sampel (hasil np.searchsorted) menjadi
+    kolom label. Label disimpan sebagai Categorical; secara default dikembalikan
+    sebagai kolom object dengan None untuk sampel tanpa interval.
+    """
+    label_codes, categories = pd.factorize(np.asarray(labels, dtype=object))
+    positions = np.clip(positions, 0, len(label_codes) - 1)
+    codes = np.where(assigned, label_codes[positions], -1)
+    labels_cat = pd.Categorical.from_codes(codes, categories=categories)
+    if categorical:
+        return pd.Series(labels_cat, index=index)
+    values = np.where(codes >= 0, np.asarray(categories, dtype=object)[np.maximum(codes, 0)], None)
+    return pd.Series(values, index=index, dtype=object)
+
+
+def add_markers_to_df(df, well_name, all_markers_df, logger, categorical=False):
+    """Menambahkan marker ke DataFrame, dengan logging. Satu np.searchsorted untuk semua sampel."""
     df['Marker'] = None
     well_name_cleaned = well_name.strip()
     logger.info(f"[Markers] Memulai pencarian marker untuk Sumur: '{well_name_cleaned}'")
@@ -24,19 +47,19 @@ def add_markers_to_df(df, well_name, all_markers_df, logger):
             return False
 
         logger.info(f"[Markers] Ditemukan {len(well_markers)} entri marker untuk '{well_name_cleaned}'.")
-        well_markers.sort_values(by='MD', inplace=True)
-        
-        last_depth = 0.0
-        for _, marker_row in well_markers.iterrows():
-            current_depth = marker_row['MD']
-            surface_name = str(marker_row['Surface'])
-            mask = (df['DEPTH'] >= last_depth) & (df['DEPTH'] < current_depth)
-            df.loc[mask, 'Marker'] = surface_name
-            last_depth = current_depth
-
-        if not well_markers.empty:
-            last_marker = well_markers.iloc[-1]
-            df.loc[df['DEPTH'] >= last_marker['MD'], 'Marker'] = str(last_marker['Surface'])
+        well_markers = well_markers.dropna(subset=['MD']).sort_values(by='MD')
+        if well_markers.empty:
+            logger.info(f"[Markers] Penandaan marker selesai.")
+            return True
+        marker_depths = well_markers['MD'].to_numpy(dtype=float)
+
+        # Interval [MD sebelumnya, MD) -> surface; interval pertama mulai dari 0,
+        # kedalaman >= MD terakhir mendapat surface terakhir
+        depths = df['DEPTH'].to_numpy(dtype=float)
+        positions = np.searchsorted(marker_depths, depths, side='right')
+        assigned = ~np.isnan(depths) & ((positions > 0) | (depths >= 0.0))
+        df['Marker'] = _interval_labels(
+            positions, assigned, well_markers['Surface'].astype(str), df.index, categorical)
 
         logger.info(f"[Markers] Penandaan marker selesai.")
         return True
@@ -52,24 +75,29 @@ def check_extreme_values(df, column):
         return mask.any()
     return False
 
-def run_full_qc_pipeline(files_data: list, logger):
-    """Fungsi utama dari qc_logic.py Anda, sekarang di dalam service."""
-    qc_results = []
-    output_files = {}
-    required_logs = ['GR', 'NPHI', 'RT', 'RHOB']
-    skip_files_lower = ['abb-032.las', 'abb-033.las', 'abb-059.las']
+REQUIRED_LOGS = ['GR', 'NPHI', 'RT', 'RHOB']
+SKIP_FILES_LOWER = ['abb-032.las', 'abb-033.las', 'abb-059.las']
+COLUMN_MAPPING = {'DEPT': 'DEPTH', 'ILD': 'RT', 'LLD': 'RT', 'RESD': 'RT', 'RHOZ': 'RHOB',
+                  'DENS': 'RHOB', 'TNPH': 'NPHI', 'GR_CAL': 'GR'}
+NULL_VALUES = [-999.0, -999.25]
+# Bagian dari kunci QCResultStore bersama hash kode modul QC dan pembaca LAS;
+# naikkan bila aturan QC berubah di luar modul-modul tersebut
+QC_LOGIC_VERSION = 1
 
+
+def load_marker_data(files_data: list, logger) -> pd.DataFrame:
+    """Membaca dan membersihkan semua file marker (CSV bernama *marker*) dari upload."""
     all_markers_df = pd.DataFrame()
     for file_info in files_data:
         if file_info['name'].lower().endswith('.csv') and 'marker' in file_info['name'].lower():
             try:
-                marker_content = io.StringIO(file_info['content'])
+                marker_content = io.StringIO(_file_content(file_info))
                 df_marker = pd.read_csv(marker_content, sep='[;,]', engine='python', on_bad_lines='skip')
                 if all(col in df_marker.columns for col in ['Well identifier', 'MD', 'Surface']):
                     all_markers_df = pd.concat([all_markers_df, df_marker], ignore_index=True)
             except Exception as e:
                 logger.warning(f"Tidak bisa membaca file marker '{file_info['name']}'. Error: {e}")
-    
+
     if not all_markers_df.empty:
         logger.info("[Markers] Membersihkan dan menyiapkan data marker...")
         all_markers_df['Well identifier_cleaned'] = all_markers_df['Well identifier'].str.strip().str.upper()
@@ -78,68 +106,316 @@ def run_full_qc_pipeline(files_data: list, logger):
         all_markers_df.dropna(subset=['MD', 'Well identifier_cleaned'], inplace=True)
         all_markers_df['Surface'] = all_markers_df['Surface'].astype(str)
         logger.info(f"[Markers] Data marker bersih. {len(all_markers_df)} baris valid dimuat.")
+    return all_markers_df
+
+
+def _file_content(file_info: dict) -> str:
+    """(Internal) Isi file dari upload ('content') atau dibaca dari disk ('path')."""
+    if 'content' in file_info:
+        return file_info['content']
+    with open(file_info['path'], 'r', errors='replace') as f:
+        return f.read()
+
+
+def read_las_dataframe(file_info: dict) -> pd.DataFrame:
+    """
+    Mem-parsing satu LAS menjadi DataFrame dengan nama kolom standar (COLUMN_MAPPING).
+    File di disk ('path') dibaca lewat well store kolumnar; isi upload dibaca
+    dengan parser ~A cepat (fallback lasio untuk file wrapped/tidak beraturan).
+    """
+    if 'content' not in file_info:
+        df, _ = read_well(file_info['path'])
+    else:
+        df, _ = read_las_data(file_info['content'], is_content=True)
+    df.rename(columns=lambda c: c.upper(), inplace=True)
+    df.rename(columns=COLUMN_MAPPING, inplace=True)
+    return df
+
+
+def qc_well_dataframe(df: pd.DataFrame, well_name: str, all_markers_df: pd.DataFrame, logger):
+    """
+    Menjalankan pemeriksaan QC pada satu sumur (DataFrame diubah in-place).
+
+    Returns:
+        tuple: (status, details) dengan status PASS, MISSING_LOGS, HAS_NULL
+        atau EXTREME_VALUES.
+    """
+    if 'DEPTH' not in df.columns: raise ValueError("Kolom DEPTH tidak ditemukan.")
+    df['DEPTH'] = pd.to_numeric(df['DEPTH'], errors='coerce')
+    df.dropna(subset=['DEPTH'], inplace=True)
+
+    missing_columns = [log for log in REQUIRED_LOGS if log not in df.columns]
+    if missing_columns:
+        return "MISSING_LOGS", ', '.join(missing_columns)
+
+    for col in REQUIRED_LOGS: df[col] = df[col].replace(NULL_VALUES, np.nan)
+
+    has_markers = add_markers_to_df(df, well_name, all_markers_df, logger, categorical=True)
+
+    zone_df = df.dropna(subset=['Marker']) if has_markers and not df['Marker'].isna().all() else df
+    if zone_df.empty: zone_df = df
+
+    null_columns = [log for log in REQUIRED_LOGS if zone_df[log].isna().any()]
+    if null_columns:
+        return "HAS_NULL", ', '.join(null_columns)
 
-    las_files = [f for f in files_data if f['name'].lower().endswith('.las')]
-    for file_info in las_files:
+    extreme_columns = [log for log in REQUIRED_LOGS if check_extreme_values(zone_df, log)]
+    if extreme_columns:
+        return "EXTREME_VALUES", ', '.join(extreme_columns)
+
+    return "PASS", 'All checks passed'
+
+
+def process_las_file(file_info: dict, all_markers_df: pd.DataFrame, logger):
+    """
+    Parsing + QC untuk satu file LAS.
+
+    Returns:
+        tuple: (hasil QC {'well_name', 'status', 'details'}, DataFrame bersih
+        atau None bila terjadi error).
+    """
+    filename = file_info['name']
+    well_name = os.path.splitext(filename)[0]
+    try:
+        logger.info(f"--- [Memproses] MULAI: {filename} ---")
+        df = read_las_dataframe(file_info)
+        status, details = qc_well_dataframe(df, well_name, all_markers_df, logger)
+        return {'well_name': well_name, 'status': status, 'details': details}, df
+    except Exception as e:
+        logger.error(f"Error memproses {filename}: {e}", exc_info=True)
+        return {'well_name': well_name, 'status': 'ERROR', 'details': str(e)}, None
+
+
+def _las_files_to_process(files_data: list, logger) -> list:
+    """(Internal) File LAS dari upload, tanpa file yang ada di SKIP_FILES_LOWER."""
+    las_files = []
+    for file_info in files_data:
         filename = file_info['name']
-        if filename.lower() in skip_files_lower:
+        if not filename.lower().endswith('.las'):
+            continue
+        if filename.lower() in SKIP_FILES_LOWER:
             logger.info(f"--- MELEWATI: {filename} ---")
             continue
-            
-        well_name = os.path.splitext(filename)[0]
-        status = "PASS"
-        details = {}
-        try:
-            logger.info(f"--- [Memproses] MULAI: {filename} ---")
-            las_content = io.StringIO(file_info['content'])
-            las = lasio.read(las_content)
-            df = las.df().reset_index()
-            df.rename(columns=lambda c: c.upper(), inplace=True)
-            column_mapping = { 'DEPT': 'DEPTH', 'ILD': 'RT', 'LLD': 'RT', 'RESD': 'RT', 'RHOZ': 'RHOB', 'DENS': 'RHOB', 'TNPH': 'NPHI', 'GR_CAL': 'GR' }
-            df.rename(columns=column_mapping, inplace=True)
-            
-            if 'DEPTH' not in df.columns: raise ValueError("Kolom DEPTH tidak ditemukan.")
-            df['DEPTH'] = pd.to_numeric(df['DEPTH'], errors='coerce')
-            df.dropna(subset=['DEPTH'], inplace=True)
-
-            details['missing_columns'] = [log for log in required_logs if log not in df.columns]
-            if details['missing_columns']:
-                status = "MISSING_LOGS"
-                qc_results.append({'well_name': well_name, 'status': status, 'details': ', '.join(details['missing_columns'])})
-                output_files[f"{well_name}_{status}.csv"] = df.to_csv(index=False)
-                continue
+        las_files.append(file_info)
+    return las_files
 
-            for col in required_logs: df[col] = df[col].replace([-999.0, -999.25], np.nan)
-            
-            has_markers = add_markers_to_df(df, well_name, all_markers_df, logger)
-            
-            zone_df = df.dropna(subset=['MARKER']) if has_markers and not df['MARKER'].isna().all() else df
-            if zone_df.empty: zone_df = df
-            
-            details['null_columns'] = [log for log in required_logs if zone_df[log].isna().any()]
-            if details['null_columns']:
-                status = "HAS_NULL"
-                qc_results.append({'well_name': well_name, 'status': status, 'details': ', '.join(details['null_columns'])})
-                output_files[f"{well_name}_{status}.csv"] = df.to_csv(index=False)
-                continue
 
-            details['extreme_columns'] = [log for log in required_logs if check_extreme_values(zone_df, log)]
-            if details['extreme_columns']:
-                status = "EXTREME_VALUES"
-                qc_results.append({'well_name': well_name, 'status': status, 'details': ', '.join(details['extreme_columns'])})
-                output_files[f"{well_name}_{status}.csv"] = df.to_csv(index=False)
+def _qc_config_version(**extra) -> str:
+    """(Internal) Versi konfigurasi, logika QC dan kode pembaca LAS untuk kunci QCResultStore."""
+    code_version = code_fingerprint(sys.modules[__name__], sys.modules[read_las_data.__module__],
+                                    sys.modules[read_well.__module__])
+    return config_fingerprint(required_logs=REQUIRED_LOGS, column_mapping=COLUMN_MAPPING,
+                              null_values=NULL_VALUES, qc_logic_version=QC_LOGIC_VERSION,
+                              code_version=code_version, **extra)
+
+
+def _qc_store_key(file_info: dict, marker_versions: dict, config_version: str) -> str:
+    """(Internal) Kunci QCResultStore untuk satu file LAS."""
+    well_name = os.path.splitext(file_info['name'])[0]
+    return qc_result_key(content_fingerprint(_file_content(file_info)), well_name,
+                         marker_versions.get(well_name.strip().upper()), config_version)
+
+
+def run_full_qc_pipeline(files_data: list, logger, store: QCResultStore = None):
+    """
+    Fungsi utama dari qc_logic.py Anda, sekarang di dalam service.
+
+    Bila store (QCResultStore) diberikan, file yang isi, marker dan
+    konfigurasinya tidak berubah memakai hasil QC tersimpan; hanya file baru
+    atau yang berubah yang diproses ulang.
+    """
+    qc_results = []
+    output_files = {}
+    reused = 0
+
+    all_markers_df = load_marker_data(files_data, logger)
+    if store is not None:
+        marker_versions = marker_fingerprints(all_markers_df)
+        config_version = _qc_config_version()
+
+    for file_info in _las_files_to_process(files_data, logger):
+        key = None
+        if store is not None:
+            key = _qc_store_key(file_info, marker_versions, config_version)
+            cached = store.get(key)
+            if cached is not None:
+                result, output = cached
+                logger.info(f"--- [Cache] {file_info['name']} tidak berubah, memakai hasil QC tersimpan ---")
+                qc_results.append(result)
+                if output is not None:
+                    output_files[f"{result['well_name']}_{result['status']}.csv"] = output
+                reused += 1
                 continue
-            
-            qc_results.append({'well_name': well_name, 'status': status, 'details': 'All checks passed'})
-            output_files[f"{well_name}_{status}.csv"] = df.to_csv(index=False)
 
-        except Exception as e:
-            logger.error(f"Error memproses {filename}: {e}", exc_info=True)
-            qc_results.append({'well_name': well_name, 'status': 'ERROR', 'details': str(e)})
+        result, df = process_las_file(file_info, all_markers_df, logger)
+        qc_results.append(result)
+        output = df.to_csv(index=False) if df is not None else None
+        if output is not None:
+            output_files[f"{result['well_name']}_{result['status']}.csv"] = output
+        # Hasil ERROR tidak disimpan agar dicoba lagi pada run berikutnya
+        if key is not None and result['status'] != 'ERROR':
+            store.put(key, result, output, flush=False)
 
+    if store is not None:
+        store.flush()
+        logger.info(f"[Cache] Hasil QC: {reused} dipakai ulang, {len(qc_results) - reused} diproses.")
     return {'qc_summary': qc_results, 'output_files': output_files}
 
-def append_zones_to_dataframe(df, well_name, depth_column='DEPTH'):
+
+# --- MODE PARALEL / STREAMING ---
+
+def _write_qc_output(df: pd.DataFrame, output_dir: str, well_name: str, status: str,
+                     output_format: str) -> str:
+    """(Internal) Menulis DataFrame hasil QC langsung ke disk dan mengembalikan path-nya."""
+    os.makedirs(output_dir, exist_ok=True)
+    if output_format == 'parquet':
+        path = os.path.join(output_dir, f"{well_name}_{status}.parquet")
+        df.to_parquet(path, index=False)
+    else:
+        path = os.path.join(output_dir, f"{well_name}_{status}.csv")
+        df.to_csv(path, index=False)
+    return path
+
+
+class _LogRecordCollector(logging.Handler):
+    """(Internal) Menampung log record di worker agar bisa diputar ulang di proses utama."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # Pesan dan traceback diformat di sini agar record bisa di-pickle
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        state = dict(record.__dict__)
+        state.update(msg=record.getMessage(), args=None, exc_info=None)
+        self.records.append(state)
+
+
+def _qc_worker(file_info: dict, all_markers_df: pd.DataFrame, output_dir: str,
+               output_format: str, logger_name: str, log_level: int) -> dict:
+    """
+    (Internal) Dijalankan di worker: QC satu file dan langsung menulis hasilnya.
+    Log worker dikumpulkan di 'log_records' dan dikirim bersama hasilnya.
+    """
+    logger = logging.Logger(logger_name, log_level)
+    collector = _LogRecordCollector()
+    logger.addHandler(collector)
+    result, df = process_las_file(file_info, all_markers_df, logger)
+    if df is not None:
+        result['output_path'] = _write_qc_output(
+            df, output_dir, result['well_name'], result['status'], output_format)
+    result['log_records'] = collector.records
+    return result
+
+
+def _replay_worker_logs(logger, result: dict):
+    """(Internal) Meneruskan log record dari worker ke handler logger proses utama."""
+    for state in result.pop('log_records', ()):
+        logger.handle(logging.makeLogRecord(state))
+
+
+def iter_qc_pipeline(files_data: list, logger, output_dir: str, output_format: str = 'csv',
+                     max_workers: int = None, use_processes: bool = True, callback=None,
+                     store: QCResultStore = None):
+    """
+    Versi paralel dan streaming dari run_full_qc_pipeline.
+
+    File LAS diproses di worker pool; hasil QC tiap sumur di-yield segera
+    setelah selesai (urutan penyelesaian, bukan urutan upload). DataFrame
+    bersih ditulis langsung ke output_dir sebagai CSV atau Parquet, dan path
+    file ada di 'output_path'. File info boleh berisi 'content' (string) atau
+    'path' (dibaca oleh worker). Log dari worker diteruskan ke logger saat
+    hasil file tersebut diterima.
+
+    Args:
+        callback (callable, optional): Dipanggil dengan setiap hasil QC.
+        use_processes (bool): ProcessPoolExecutor (default) atau ThreadPoolExecutor.
+        store (QCResultStore, optional): File yang isi, marker, konfigurasi dan
+            kode QC-nya tidak berubah memakai hasil tersimpan (file output
+            disalin ke output_dir) tanpa dikirim ke worker.
+    """
+    if output_format not in ('csv', 'parquet'):
+        raise ValueError(f"Format output tidak dikenal: {output_format}")
+    if output_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        logger.warning("pyarrow tidak tersedia, output QC ditulis sebagai CSV.")
+        output_format = 'csv'
+
+    all_markers_df = load_marker_data(files_data, logger)
+    las_files = _las_files_to_process(files_data, logger)
+    if not las_files:
+        return
+    if store is not None:
+        marker_versions = marker_fingerprints(all_markers_df)
+        config_version = _qc_config_version(output_format=output_format)
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(las_files)))
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    pending_files = iter(las_files)
+    reused = processed = 0
+    try:
+        with executor_cls(max_workers=max_workers) as executor:
+            # Batasi jumlah file yang sedang diproses agar memori tetap terkendali
+            in_flight = {}
+            while True:
+                while len(in_flight) < max_workers * 2:
+                    file_info = next(pending_files, None)
+                    if file_info is None:
+                        break
+                    key = None
+                    if store is not None:
+                        key = _qc_store_key(file_info, marker_versions, config_version)
+                        cached = store.get_file(key, output_dir)
+                        if cached is not None:
+                            logger.info(f"--- [Cache] {file_info['name']} tidak berubah, memakai hasil QC tersimpan ---")
+                            reused += 1
+                            if callback is not None:
+                                callback(cached)
+                            yield cached
+                            continue
+                    in_flight[executor.submit(_qc_worker, file_info, all_markers_df, output_dir,
+                                              output_format, logger.name,
+                                              logger.getEffectiveLevel())] = key
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = in_flight.pop(future)
+                    result = future.result()
+                    _replay_worker_logs(logger, result)
+                    processed += 1
+                    # Hasil ERROR tidak disimpan agar dicoba lagi pada run berikutnya
+                    if key is not None and result['status'] != 'ERROR' and result.get('output_path'):
+                        store.put_file(key, {k: v for k, v in result.items() if k != 'output_path'},
+                                       result['output_path'], flush=False)
+                    if callback is not None:
+                        callback(result)
+                    yield result
+    finally:
+        if store is not None:
+            store.flush()
+            logger.info(f"[Cache] Hasil QC: {reused} dipakai ulang, {processed} diproses.")
+
+
+def run_qc_pipeline_parallel(files_data: list, logger, output_dir: str, output_format: str = 'csv',
+                             max_workers: int = None, use_processes: bool = True, callback=None,
+                             store: QCResultStore = None):
+    """
+    Menjalankan iter_qc_pipeline sampai selesai. Bentuk hasil sama dengan
+    run_full_qc_pipeline, tetapi 'output_files' berisi path file di disk.
+    """
+    qc_results = []
+    output_files = {}
+    for result in iter_qc_pipeline(files_data, logger, output_dir, output_format,
+                                   max_workers, use_processes, callback, store):
+        output_path = result.get('output_path')
+        qc_results.append({k: v for k, v in result.items() if k != 'output_path'})
+        if output_path:
+            output_files[os.path.basename(output_path)] = output_path
+    return {'qc_summary': qc_results, 'output_files': output_files}
+
+def append_zones_to_dataframe(df, well_name, depth_column='DEPTH', categorical=False):
     """
     Append zone information to a DataFrame based on predefined depth ranges.
     Only applies to BNG wells with specific zone classifications.
@@ -148,6 +424,7 @@ def append_zones_to_dataframe(df, well_name, depth_column='DEPTH'):
         df (pd.DataFrame): Main DataFrame containing well log data with depth column
         well_name (str): Well identifier to check (must contain 'BNG')
         depth_column (str): Name of the depth column in df (default: 'DEPTH')
+        categorical (bool): Return 'ZONE' as a pandas Categorical (default: False)
     
     Returns:
         pd.DataFrame: DataFrame with added 'ZONE' column
@@ -171,18 +448,22 @@ def append_zones_to_dataframe(df, well_name, depth_column='DEPTH'):
         {'name': 'TAF', 'top': 1579.2, 'bottom': 2301.0}
     ]
     
-    # Apply zones based on depth ranges
-    for zone in zones:
-        mask = (result_df[depth_column] >= zone['top']) & (result_df[depth_column] < zone['bottom'])
-        result_df.loc[mask, 'ZONE'] = zone['name']
-    
+    # Apply zones based on depth ranges (top <= depth < bottom) in one lookup
+    tops = np.array([zone['top'] for zone in zones])
+    bottoms = np.array([zone['bottom'] for zone in zones])
+    depths = result_df[depth_column].to_numpy(dtype=float)
+    positions = np.searchsorted(tops, depths, side='right') - 1
+    assigned = (positions >= 0) & (depths < bottoms[np.maximum(positions, 0)])
+    result_df['ZONE'] = _interval_labels(
+        positions, assigned, [zone['name'] for zone in zones], result_df.index, categorical)
+
     # Count how many rows were assigned a zone
     zone_count = result_df['ZONE'].notna().sum()
     print(f"Applied zones to {well_name}: {zone_count} depth points classified")
     
     return result_df
 
-def append_markers_to_dataframe(df, marker_df, well_name, depth_column='DEPTH'):
+def append_markers_to_dataframe(df, marker_df, well_name, depth_column='DEPTH', categorical=False):
     """
     Append marker information to a DataFrame based on depth ranges and well name.
     
@@ -191,6 +472,7 @@ def append_markers_to_dataframe(df, marker_df, well_name, depth_column='DEPTH'):
         marker_df (pd.DataFrame): Marker DataFrame with columns ['Well identifier', 'MD', 'Surface']
         well_name (str): Well identifier to match (e.g., 'BNG-007')
         depth_column (str): Name of the depth column in df (default: 'DEPTH')
+        categorical (bool): Return 'MARKER' as a pandas Categorical (default: False)
     
     Returns:
         pd.DataFrame: DataFrame with added 'MARKER' column
@@ -228,27 +510,14 @@ def append_markers_to_dataframe(df, marker_df, well_name, depth_column='DEPTH'):
     # Sort markers by depth
     well_markers = well_markers.sort_values('MD').reset_index(drop=True)
     
-    # Apply markers based on depth ranges
-    for i in range(len(well_markers)):
-        current_depth = well_markers.loc[i, 'MD']
-        surface_name = str(well_markers.loc[i, 'Surface'])
-        
-        if i == 0:
-            # For the first marker, assign from the beginning up to this depth
-            mask = result_df[depth_column] <= current_depth
-        else:
-            # For subsequent markers, assign from previous depth to current depth
-            previous_depth = well_markers.loc[i-1, 'MD']
-            mask = (result_df[depth_column] > previous_depth) & (result_df[depth_column] <= current_depth)
-        
-        result_df.loc[mask, 'MARKER'] = surface_name
-    
-    # For depths beyond the last marker, assign the last surface
-    if len(well_markers) > 0:
-        last_depth = well_markers.iloc[-1]['MD']
-        last_surface = str(well_markers.iloc[-1]['Surface'])
-        mask = result_df[depth_column] > last_depth
-        result_df.loc[mask, 'MARKER'] = last_surface
+    # Apply markers based on depth ranges: (previous MD, MD] -> surface, the first
+    # surface from the top of the log, the last surface beyond the last marker
+    marker_depths = well_markers['MD'].to_numpy(dtype=float)
+    depths = result_df[depth_column].to_numpy(dtype=float)
+    positions = np.searchsorted(marker_depths, depths, side='left')
+    result_df['MARKER'] = _interval_labels(
+        positions, ~np.isnan(depths), well_markers['Surface'].astype(str), result_df.index,
+        categorical)
     
     print(f"Successfully applied {len(well_markers)} markers to {well_name}")
     return result_df
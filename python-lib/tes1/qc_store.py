@@ -0,0 +1,253 @@
+# File: services/qc_store.py
+# Description: Penyimpanan hasil QC per file LAS, dikunci dengan hash isi file,
+# versi marker sumur, konfigurasi QC dan versi kode QC/pembaca LAS. Menjalankan ulang QC hanya memproses
+# file yang baru atau berubah; sisanya memakai status, detail dan output lama.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, Optional
+
+import pandas as pd
+
+DEFAULT_STORE_DIR = 'data/cache/qc_results'
+STORE_VERSION = 1
+_INDEX_FILE = 'index.json'
+
+
+def content_fingerprint(content) -> str:
+    """Hash blake2b dari isi file (str atau bytes)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8', errors='surrogateescape')
+    return hashlib.blake2b(content, digest_size=20).hexdigest()
+
+
+def config_fingerprint(**config) -> str:
+    """Hash konfigurasi QC (mis. required_logs, column_mapping) dalam bentuk JSON terurut."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.blake2b(f"qc-v{STORE_VERSION}|{payload}".encode(), digest_size=20).hexdigest()
+
+
+def code_fingerprint(*modules) -> str:
+    """
+    Hash isi file sumber modul (mis. QC dan pembaca LAS). Mengubah kode
+    modul tersebut otomatis menghasilkan kunci hasil QC yang baru.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    for module in modules:
+        hasher.update(f"|{module.__name__}|".encode())
+        path = getattr(module, '__file__', None)
+        try:
+            with open(path, 'rb') as f:
+                hasher.update(f.read())
+        except (OSError, TypeError):
+            hasher.update(b'<no-source>')
+    return hasher.hexdigest()
+
+
+def marker_fingerprints(all_markers_df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Versi marker untuk setiap sumur: hash dari baris (MD, Surface) milik
+    sumur tersebut. Menambah marker untuk satu sumur tidak membatalkan hasil
+    QC sumur lain.
+    """
+    if all_markers_df.empty or 'Well identifier_cleaned' not in all_markers_df.columns:
+        return {}
+    fingerprints = {}
+    for well, rows in all_markers_df.groupby('Well identifier_cleaned', sort=False):
+        rows = rows[['MD', 'Surface']].sort_values(['MD', 'Surface'])
+        hashed = pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()
+        fingerprints[well] = hashlib.blake2b(hashed, digest_size=20).hexdigest()
+    return fingerprints
+
+
+def qc_result_key(content_hash: str, well_name: str, marker_version: Optional[str],
+                  config_version: str) -> str:
+    """Kunci hasil QC untuk satu file LAS (nama sumur ikut karena menentukan marker dan output)."""
+    raw = f"{content_hash}|{well_name}|{marker_version or '<no-markers>'}|{config_version}"
+    return hashlib.blake2b(raw.encode(), digest_size=20).hexdigest()
+
+
+class QCResultStore:
+    """
+    Menyimpan hasil QC ({'well_name', 'status', 'details'}) beserta output
+    bersih per kunci: teks CSV (put/get) atau salinan file output mode paralel
+    (put_file/get_file). Indeks disimpan sebagai JSON dan output sebagai file
+    di cache_dir; bila cache_dir None, hanya disimpan di memori.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_STORE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._memory_outputs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _index_path(self) -> Optional[str]:
+        return os.path.join(self.cache_dir, _INDEX_FILE) if self.cache_dir else None
+
+    def _output_path(self, key: str, extension: str = 'csv') -> str:
+        return os.path.join(self.cache_dir, 'outputs', f"{key}.{extension}")
+
+    def _load_index(self) -> dict:
+        path = self._index_path()
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Peringatan: Indeks hasil QC tidak bisa dibaca, mulai dari kosong: {e}")
+            return {}
+
+    def _save_index(self):
+        path = self._index_path()
+        if not path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        Mengambil hasil QC tersimpan.
+
+        Returns:
+            tuple: (hasil QC, output CSV atau None), atau None bila tidak ada.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            output = self._memory_outputs.get(key)
+        if output is None and entry.get('has_output') and self.cache_dir:
+            try:
+                with open(self._output_path(key), 'r') as f:
+                    output = f.read()
+            except OSError:
+                # Output hilang dari disk: anggap tidak ada di cache
+                with self._lock:
+                    self._index.pop(key, None)
+                    self.misses += 1
+                return None
+        with self._lock:
+            self.hits += 1
+        return dict(entry['result']), output
+
+    def put(self, key: str, result: dict, output: Optional[str], flush: bool = True):
+        """
+        Menyimpan hasil QC dan output CSV-nya. Dengan flush=False indeks baru
+        ditulis ke disk saat flush() dipanggil (untuk banyak file sekaligus).
+        """
+        try:
+            if self.cache_dir and output is not None:
+                os.makedirs(os.path.dirname(self._output_path(key)), exist_ok=True)
+                with open(self._output_path(key), 'w') as f:
+                    f.write(output)
+            with self._lock:
+                self._index[key] = {'result': dict(result), 'has_output': output is not None}
+                if not self.cache_dir and output is not None:
+                    self._memory_outputs[key] = output
+                if flush:
+                    self._save_index()
+        except Exception as e:
+            print(f"Peringatan: Hasil QC tidak disimpan ke store: {e}")
+
+    def put_file(self, key: str, result: dict, output_path: str, flush: bool = True):
+        """
+        Menyimpan hasil QC beserta salinan file output (CSV atau Parquet)
+        yang sudah ditulis oleh pipeline paralel.
+        """
+        extension = os.path.splitext(output_path)[1].lstrip('.') or 'csv'
+        try:
+            if self.cache_dir:
+                os.makedirs(os.path.dirname(self._output_path(key, extension)), exist_ok=True)
+                shutil.copyfile(output_path, self._output_path(key, extension))
+                data = None
+            else:
+                with open(output_path, 'rb') as f:
+                    data = f.read()
+            with self._lock:
+                self._index[key] = {'result': dict(result), 'has_output': True,
+                                    'output_file': extension}
+                if data is not None:
+                    self._memory_outputs[key] = data
+                if flush:
+                    self._save_index()
+        except Exception as e:
+            print(f"Peringatan: Hasil QC tidak disimpan ke store: {e}")
+
+    def get_file(self, key: str, output_dir: str) -> Optional[dict]:
+        """
+        Mengambil hasil QC yang disimpan dengan put_file dan menyalin file
+        outputnya ke output_dir sebagai '<well>_<status>.<ext>'.
+
+        Returns:
+            dict: Hasil QC dengan 'output_path', atau None bila tidak ada.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            data = self._memory_outputs.get(key)
+        if entry is None or 'output_file' not in entry:
+            with self._lock:
+                self.misses += 1
+            return None
+        result = dict(entry['result'])
+        extension = entry['output_file']
+        output_path = os.path.join(output_dir, f"{result['well_name']}_{result['status']}.{extension}")
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            if data is not None:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+            else:
+                shutil.copyfile(self._output_path(key, extension), output_path)
+        except OSError:
+            # Output hilang dari disk: anggap tidak ada di cache
+            with self._lock:
+                self._index.pop(key, None)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        result['output_path'] = output_path
+        return result
+
+    def flush(self):
+        """Menulis indeks ke disk."""
+        with self._lock:
+            try:
+                self._save_index()
+            except Exception as e:
+                print(f"Peringatan: Indeks hasil QC tidak disimpan: {e}")
+
+    def clear(self):
+        """Menghapus semua hasil QC tersimpan."""
+        with self._lock:
+            self._index = {}
+            self._memory_outputs.clear()
+            if self.cache_dir and os.path.isdir(self.cache_dir):
+                outputs_dir = os.path.join(self.cache_dir, 'outputs')
+                if os.path.isdir(outputs_dir):
+                    for name in os.listdir(outputs_dir):
+                        os.remove(os.path.join(outputs_dir, name))
+                self._save_index()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_qc_store(cache_dir: Optional[str] = DEFAULT_STORE_DIR) -> QCResultStore:
+    """Mengembalikan store hasil QC bersama untuk proses ini."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None or _default_store.cache_dir != cache_dir:
+            _default_store = QCResultStore(cache_dir)
+        return _default_store
@@ -0,0 +1,63 @@
+# File: services/result_writeback.py
+# Description: Menulis kolom hasil kembali ke DataFrame sumur berdasarkan posisi
+# baris, sebagai pengganti pd.merge(..., on='DEPTH', how='left').
+
+import numpy as np
+import pandas as pd
+
+
+def row_positions(df_target: pd.DataFrame, df_result: pd.DataFrame) -> np.ndarray:
+    """
+    Mencari posisi baris df_result di dalam df_target berdasarkan index asli.
+
+    df_result harus berasal dari df_target lewat filter/dropna/copy sehingga
+    label index-nya masih label asli. Pencarian dilakukan sekali untuk semua
+    kolom hasil.
+    """
+    if not df_target.index.is_unique:
+        raise ValueError(
+            "Index DataFrame target tidak unik; hasil tidak dapat ditulis kembali berdasarkan posisi.")
+    positions = df_target.index.get_indexer(df_result.index)
+    if (positions < 0).any():
+        raise ValueError(
+            "Sebagian baris hasil tidak ditemukan di DataFrame target (index berubah saat pemrosesan).")
+    return positions
+
+
+def write_back_columns(df_target: pd.DataFrame, df_result: pd.DataFrame, columns: list,
+                       positions: np.ndarray = None) -> pd.DataFrame:
+    """
+    Menyalin kolom hasil dari df_result ke df_target secara in-place per posisi.
+
+    Baris yang tidak ada di df_result diisi NaN, sama seperti left-merge.
+    Kolom bertipe integer/boolean dinaikkan ke float/object bila ada baris
+    yang kosong, mengikuti perilaku pd.merge. Kolom yang sudah ada ditimpa.
+
+    Args:
+        df_target (pd.DataFrame): DataFrame lengkap yang akan diperbarui.
+        df_result (pd.DataFrame): Subset baris dengan index asli yang berisi hasil.
+        columns (list): Nama kolom yang akan ditulis.
+        positions (np.ndarray, optional): Posisi baris yang sudah dihitung
+            dengan row_positions().
+
+    Returns:
+        pd.DataFrame: df_target yang sama (untuk kemudahan chaining).
+    """
+    if positions is None:
+        positions = row_positions(df_target, df_result)
+    n_rows = len(df_target)
+    full_cover = len(positions) == n_rows and \
+        np.array_equal(positions, np.arange(n_rows))
+
+    for col in columns:
+        values = df_result[col].to_numpy()
+        if full_cover:
+            df_target[col] = values
+            continue
+        if values.dtype.kind in 'iuf':
+            out = np.full(n_rows, np.nan, dtype=float)
+        else:
+            out = np.full(n_rows, np.nan, dtype=object)
+        out[positions] = values
+        df_target[col] = out
+    return df_target
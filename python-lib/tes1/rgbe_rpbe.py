@@ -3,13 +3,15 @@ import pandas as pd
 # Asumsi file-file ini ada dan berfungsi
 from services.plotting_service import main_plot
 from services.iqual import calculate_iqual
+from services.result_writeback import write_back_columns
+from services.segments import find_runs, run_sums, broadcast_runs
 
 
 def calculate_interval_statistics(df_input: pd.DataFrame) -> pd.DataFrame:
     """
     Menghitung statistik (RGBE, RPBE, R-squared) untuk setiap interval contiguous
-    di mana IQUAL > 0. Menggunakan metode single-pass untuk efisiensi.
-    (Fungsi ini tidak perlu diubah, logikanya sudah benar untuk data yang masuk)
+    di mana IQUAL > 0. Run dicari sekali dengan np.diff, jumlah per run dihitung
+    dengan np.add.reduceat dan hasilnya disebarkan kembali dengan np.repeat.
     """
     df = df_input.copy()
     if df.empty:
@@ -26,81 +28,43 @@ def calculate_interval_statistics(df_input: pd.DataFrame) -> pd.DataFrame:
         print("Peringatan: Kolom yang dibutuhkan (IQUAL, GR, RT, PHIE) tidak ada. Melewatkan kalkulasi statistik.")
         return df_input  # Kembalikan yang asli
 
-    grpstr_idx, grpsize = None, 0
-    sx_rg, sy_rg, sxy_rg, sx2_rg, sy2_rg = 0.0, 0.0, 0.0, 0.0, 0.0
-    sx_rp, sy_rp, sxy_rp, sx2_rp, sy2_rp = 0.0, 0.0, 0.0, 0.0, 0.0
-
-    # Iterasi melalui setiap baris DataFrame
-    for idx in range(len(df)):
-        iqual = df.at[idx, 'IQUAL']
-        iqual_prev = df.at[idx - 1, 'IQUAL'] if idx > 0 else 0
-
-        if iqual > 0:
-            if iqual_prev == 0:
-                grpstr_idx = idx
-                grpsize = 0
-                sx_rg, sy_rg, sxy_rg, sx2_rg, sy2_rg = 0.0, 0.0, 0.0, 0.0, 0.0
-                sx_rp, sy_rp, sxy_rp, sx2_rp, sy2_rp = 0.0, 0.0, 0.0, 0.0, 0.0
-
-            grpsize += 1
-            gr, rt, phie = df.at[idx, 'GR'], df.at[idx,
-                                                   'RT'], df.at[idx, 'PHIE']
-            sx_rg += gr
-            sy_rg += rt
-            sxy_rg += gr * rt
-            sx2_rg += gr**2
-            sy2_rg += rt**2
-            sx_rp += phie
-            sy_rp += rt
-            sxy_rp += phie * rt
-            sx2_rp += phie**2
-            sy2_rp += rt**2
-        else:
-            if grpsize > 2 and grpstr_idx is not None:
-                # Hitung statistik untuk grup yang baru saja selesai
-                denom_rg = sx_rg * sx_rg - grpsize * sx2_rg
-                denom_rp = sx_rp * sx_rp - grpsize * sx2_rp
-                denom_r_rg_sq = (grpsize * sx2_rg - sx_rg**2) * \
-                    (grpsize * sy2_rg - sy_rg**2)
-                denom_r_rp_sq = (grpsize * sx2_rp - sx_rp**2) * \
-                    (grpsize * sy2_rp - sy_rp**2)
-
-                rgbe = 100 * (sx_rg * sy_rg - grpsize * sxy_rg) / \
-                    denom_rg if denom_rg != 0 else np.nan
-                rpbe = (sx_rp * sy_rp - grpsize * sxy_rp) / \
-                    denom_rp if denom_rp != 0 else np.nan
-                r_rgbe = abs(grpsize * sxy_rg - sx_rg * sy_rg) / \
-                    np.sqrt(denom_r_rg_sq) if denom_r_rg_sq > 0 else np.nan
-                r_rpbe = abs(grpsize * sxy_rp - sx_rp * sy_rp) / \
-                    np.sqrt(denom_r_rp_sq) if denom_r_rp_sq > 0 else np.nan
-
-                # Terapkan hasil ke semua baris dalam grup yang telah selesai
-                df.loc[grpstr_idx:idx-1, 'NOD'] = grpsize
-                df.loc[grpstr_idx:idx-1, ['RGBE', 'R_RGBE', 'RPBE',
-                                          'R_RPBE']] = [rgbe, r_rgbe, rpbe, r_rpbe]
-
-            grpstr_idx, grpsize = None, 0
-
-    # Proses grup terakhir jika file diakhiri dengan IQUAL > 0
-    if grpsize > 2 and grpstr_idx is not None:
+    # Run kontigu IQUAL > 0. Seperti versi per baris, run hanya dihitung bila
+    # dimulai di baris pertama atau tepat setelah IQUAL == 0, dan panjangnya > 2.
+    iqual = df['IQUAL'].to_numpy(dtype=float)
+    starts, lengths = find_runs(iqual > 0)
+    eligible = (starts == 0) | (iqual[starts - 1] == 0)
+    keep = eligible & (lengths > 2)
+    starts, lengths = starts[keep], lengths[keep]
+    if len(starts) == 0:
+        return df
+
+    gr = df['GR'].to_numpy(dtype=float)
+    rt = df['RT'].to_numpy(dtype=float)
+    phie = df['PHIE'].to_numpy(dtype=float)
+    sums = run_sums(
+        np.column_stack([gr, rt, gr * rt, gr**2, rt**2, phie, phie * rt, phie**2]),
+        starts, lengths)
+    sx_rg, sy, sxy_rg, sx2_rg, sy2, sx_rp, sxy_rp, sx2_rp = sums.T
+    grpsize = lengths.astype(float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
         denom_rg = sx_rg * sx_rg - grpsize * sx2_rg
         denom_rp = sx_rp * sx_rp - grpsize * sx2_rp
-        denom_r_rg_sq = (grpsize * sx2_rg - sx_rg**2) * \
-            (grpsize * sy2_rg - sy_rg**2)
-        denom_r_rp_sq = (grpsize * sx2_rp - sx_rp**2) * \
-            (grpsize * sy2_rp - sy_rp**2)
-        rgbe = 100 * (sx_rg * sy_rg - grpsize * sxy_rg) / \
-            denom_rg if denom_rg != 0 else np.nan
-        rpbe = (sx_rp * sy_rp - grpsize * sxy_rp) / \
-            denom_rp if denom_rp != 0 else np.nan
-        r_rgbe = abs(grpsize * sxy_rg - sx_rg * sy_rg) / \
-            np.sqrt(denom_r_rg_sq) if denom_r_rg_sq > 0 else np.nan
-        r_rpbe = abs(grpsize * sxy_rp - sx_rp * sy_rp) / \
-            np.sqrt(denom_r_rp_sq) if denom_r_rp_sq > 0 else np.nan
-        df.loc[grpstr_idx:, 'NOD'] = grpsize
-        df.loc[grpstr_idx:, ['RGBE', 'R_RGBE', 'RPBE', 'R_RPBE']] = [
-            rgbe, r_rgbe, rpbe, r_rpbe]
-
+        denom_r_rg_sq = (grpsize * sx2_rg - sx_rg**2) * (grpsize * sy2 - sy**2)
+        denom_r_rp_sq = (grpsize * sx2_rp - sx_rp**2) * (grpsize * sy2 - sy**2)
+
+        rgbe = np.where(denom_rg != 0,
+                        100 * (sx_rg * sy - grpsize * sxy_rg) / denom_rg, np.nan)
+        rpbe = np.where(denom_rp != 0,
+                        (sx_rp * sy - grpsize * sxy_rp) / denom_rp, np.nan)
+        r_rgbe = np.where(denom_r_rg_sq > 0,
+                          np.abs(grpsize * sxy_rg - sx_rg * sy) / np.sqrt(denom_r_rg_sq), np.nan)
+        r_rpbe = np.where(denom_r_rp_sq > 0,
+                          np.abs(grpsize * sxy_rp - sx_rp * sy) / np.sqrt(denom_r_rp_sq), np.nan)
+
+    # Terapkan hasil ke semua baris setiap grup sekaligus
+    df[stat_cols] = broadcast_runs(
+        np.column_stack([grpsize, rgbe, r_rgbe, rpbe, r_rpbe]), starts, lengths, len(df))
     return df
 
 
@@ -137,34 +101,25 @@ def process_rgbe_rpbe(df: pd.DataFrame, params: dict = None, target_intervals: l
 
         for well_name, well_df in df_to_process.groupby('WELL_NAME'):
             print(f"Memproses statistik untuk sumur: {well_name}")
-            well_df_sorted = well_df.sort_values(
-                by='DEPTH').reset_index(drop=True)
-            result_df = calculate_interval_statistics(well_df_sorted)
+            well_df_sorted = well_df.sort_values(by='DEPTH')
+            original_index = well_df_sorted.index
+            result_df = calculate_interval_statistics(
+                well_df_sorted.reset_index(drop=True))
+            # Kembalikan index asli agar hasil bisa ditulis balik per posisi
+            result_df.index = original_index
             all_results.append(result_df)
 
         if not all_results:
             print("Peringatan: Tidak ada data yang diproses setelah filtering.")
             return df  # Kembalikan df asli jika tidak ada hasil
 
-        processed_df = pd.concat(all_results, ignore_index=True)
+        processed_df = pd.concat(all_results)
 
-        # 4. Gabungkan hasil kembali ke DataFrame asli yang lengkap
+        # 4. Tulis hasil kembali ke DataFrame asli yang lengkap
         stat_cols = ['NOD', 'RGBE', 'R_RGBE', 'RPBE', 'R_RPBE']
-        # Hapus kolom lama dari df asli untuk menghindari duplikasi saat merge
+        # Hapus kolom lama dari df asli, lalu isi per posisi baris (index asli)
         df_final = df.drop(columns=stat_cols, errors='ignore')
-
-        # Hanya merge kolom kunci (DEPTH) dan kolom hasil
-        if 'DEPTH' in processed_df.columns:
-            df_final = pd.merge(
-                df_final,
-                processed_df[['DEPTH'] + stat_cols],
-                on='DEPTH',
-                how='left'
-            )
-        else:
-            print(
-                "Error: Kolom 'DEPTH' tidak ditemukan di hasil proses, tidak dapat menggabungkan.")
-            return df
+        write_back_columns(df_final, processed_df, stat_cols)
 
         return df_final
 
@@ -150,7 +150,9 @@ from typing import List, Dict
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
+
+from services.rgsa_kernels import compute_gr_caps, fit_tumbling_windows, evaluate_rgsa
+from services.gsa_cache import get_coefficient_cache, rgsa_cache_key
 
 # --- PASS 1: DYNAMIC GR_MAX CALCULATION ---
 def calculate_dynamic_gr_cap(df_well: pd.DataFrame, params: Dict) -> pd.DataFrame:
@@ -179,27 +181,22 @@ def calculate_dynamic_gr_cap(df_well: pd.DataFrame, params: Dict) -> pd.DataFram
     # but apply it as a non-overlapping window size ('npoints').
     npoints = int(params.get('SLIDING_WINDOW', 100)) * 2 # Approximating npoints from legacy logic
 
-    gr_caps = []
-    for i in range(0, len(df_filtered), npoints):
-        chunk = df_filtered.iloc[i:i + npoints]
-        if len(chunk) < npoints / 2:
-            continue
-
-        # Get the 98th percentile GR value for the chunk
-        gr_cap_value = chunk[gr_col].quantile(0.98)
-        # Get the median depth for the chunk
-        median_depth = chunk['DEPTH'].median()
-
-        gr_caps.append({'DEPTH': median_depth, 'GR_MAX': gr_cap_value})
-        print(f"  - Depth: {median_depth:.2f}, GR_MAX_Cap: {gr_cap_value:.2f}")
+    # 98th-percentile GR and median depth per chunk, computed by the compiled
+    # (numba) kernel when available, otherwise by the NumPy fallback
+    median_depths, gr_cap_values = compute_gr_caps(
+        df_filtered['DEPTH'].values, df_filtered[gr_col].values, npoints,
+        backend=params.get('BACKEND', 'auto'))
 
+    if params.get('VERBOSE', True):
+        for median_depth, gr_cap_value in zip(median_depths, gr_cap_values):
+            print(f"  - Depth: {median_depth:.2f}, GR_MAX_Cap: {gr_cap_value:.2f}")
 
-    if not gr_caps:
+    if len(gr_cap_values) == 0:
         print("Warning: Could not calculate any GR caps. Aborting.")
         return None
 
     print("INFO: Pass 1 Complete.")
-    return pd.DataFrame(gr_caps)
+    return pd.DataFrame({'DEPTH': median_depths, 'GR_MAX': gr_cap_values})
 
 
 # --- PASS 2: REGRESSION COEFFICIENT CALCULATION ---
@@ -254,46 +251,34 @@ def calculate_regression_coefficients(df_well: pd.DataFrame, df_gr_cap: pd.DataF
 
     npoints = int(params.get('SLIDING_WINDOW', 100)) * 2
     min_points_in_window = 30
-    coeffs = []
-
-    # Use tumbling (non-overlapping) windows
-    for i in range(0, len(df_reg_data), npoints):
-        window = df_reg_data.iloc[i:i + npoints]
-
-        if len(window) < min_points_in_window:
-            continue
-
-        # Prepare data for regression
-        gr_scaled = 0.01 * window[gr_col]
-        log_rt = np.log10(window[rt_col])
-
-        X = np.vstack([gr_scaled, gr_scaled**2, gr_scaled**3]).T
-        y = log_rt
-        try:
-            model = LinearRegression().fit(X, y)
-            if hasattr(model, 'coef_') and len(model.coef_) == 3:
-                coeffs.append({
-                    'DEPTH': window['DEPTH'].iloc[0], # Use start depth of window
-                    'b0': model.intercept_,
-                    'b1': model.coef_[0],
-                    'b2': model.coef_[1],
-                    'b3': model.coef_[2],
-                    'CORR_COEF': model.score(X, y),
-                    'N_POINTS': len(window)
-                })
-        except Exception as e:
-            print(f"Warning: Regression failed at depth ~{window['DEPTH'].mean()}: {e}")
-
-    if not coeffs:
+
+    # Use tumbling (non-overlapping) windows; moments come from the kernel and
+    # all windows are solved in one batch
+    fit = fit_tumbling_windows(
+        0.01 * df_reg_data[gr_col].values, np.log10(df_reg_data[rt_col].values),
+        npoints, min_points_in_window, backend=params.get('BACKEND', 'auto'))
+
+    if len(fit['start']) == 0:
         print("Warning: No regression coefficients were successfully calculated.")
         return None
 
+    df_coeffs = pd.DataFrame({
+        'DEPTH': df_reg_data['DEPTH'].values[fit['start']],  # Use start depth of window
+        'b0': fit['coefs'][:, 0],
+        'b1': fit['coefs'][:, 1],
+        'b2': fit['coefs'][:, 2],
+        'b3': fit['coefs'][:, 3],
+        'CORR_COEF': fit['r2'],
+        'N_POINTS': fit['n_points'],
+    })
+
     print("INFO: Pass 2 Complete. Regression Results:")
-    print("      N  Points     Depth      R^2      Const      GR         GR^2       GR^3")
-    for i, c in enumerate(coeffs):
-        print(f"     {i+1:2d}  {c['N_POINTS']:<5d}   {c['DEPTH']:<7.2f}   {c['CORR_COEF']:.3f}   {c['b0']:<7.4f}   {c['b1']:<7.4f}   {c['b2']:<7.4f}   {c['b3']:<7.4f}")
+    if params.get('VERBOSE', True):
+        print("      N  Points     Depth      R^2      Const      GR         GR^2       GR^3")
+        for i, c in enumerate(df_coeffs.itertuples(index=False)):
+            print(f"     {i+1:2d}  {c.N_POINTS:<5d}   {c.DEPTH:<7.2f}   {c.CORR_COEF:.3f}   {c.b0:<7.4f}   {c.b1:<7.4f}   {c.b2:<7.4f}   {c.b3:<7.4f}")
 
-    return pd.DataFrame(coeffs)
+    return df_coeffs
 
 
 # --- PASS 3: FINAL RGSA CALCULATION & MERGE ---
@@ -314,24 +299,14 @@ def calculate_and_merge_rgsa(df_well: pd.DataFrame, df_coeffs: pd.DataFrame, par
     gr_col = params.get('GR', 'GR')
     rt_col = params.get('RES', 'RT')
 
-    df_merged = df_well.copy()
-    if 'RGSA' in df_merged.columns:
-        df_merged = df_merged.drop(columns=['RGSA'])
-
-    # Interpolate coefficients for every depth point
-    interp_depths = df_coeffs['DEPTH']
-    b0 = np.interp(df_merged['DEPTH'], interp_depths, df_coeffs['b0'])
-    b1 = np.interp(df_merged['DEPTH'], interp_depths, df_coeffs['b1'])
-    b2 = np.interp(df_merged['DEPTH'], interp_depths, df_coeffs['b2'])
-    b3 = np.interp(df_merged['DEPTH'], interp_depths, df_coeffs['b3'])
-
-    # Calculate RGSA
-    grfix = 0.01 * df_merged[gr_col]
-    log_rgsa = b0 + b1*grfix + b2*grfix**2 + b3*grfix**3
-    df_merged['RGSA'] = 10**log_rgsa
-    
-    # Handle missing values where input GR is missing
-    df_merged.loc[df_merged[gr_col].isna(), 'RGSA'] = np.nan
+    df_merged = df_well.drop(columns=['RGSA'], errors='ignore')
+
+    # Interpolate coefficients for every depth point and calculate RGSA
+    # (NaN where input GR is missing) in a single kernel pass
+    df_merged['RGSA'] = evaluate_rgsa(
+        df_merged['DEPTH'].values, df_merged[gr_col].values,
+        df_coeffs['DEPTH'].values, df_coeffs[['b0', 'b1', 'b2', 'b3']].values,
+        backend=params.get('BACKEND', 'auto'))
 
     # Hitung kolom efek gas
     if rt_col in df_merged and 'RGSA' in df_merged:
@@ -375,17 +350,31 @@ def process_all_wells_rgsa(df_well: pd.DataFrame, params: Dict,
         return df_processed
     # --- AKHIR BAGIAN BARU ---
 
-    # --- PASS 1 ---
-    df_gr_cap = calculate_dynamic_gr_cap(df_processed, params)
-    if df_gr_cap is None or df_gr_cap.empty:
-        print("❌ RGSA calculation failed at Pass 1. Returning original DataFrame.")
-        return df_processed
-
-    # --- PASS 2 ---
-    df_coeffs = calculate_regression_coefficients(df_processed, df_gr_cap, params)
-    if df_coeffs is None or df_coeffs.empty:
-        print("❌ RGSA calculation failed at Pass 2. Returning original DataFrame.")
-        return df_processed
+    # --- CACHE: Pass 1-2 dilewati bila tabel koefisien untuk data ini sudah ada ---
+    use_cache = params.get('USE_COEFF_CACHE', True)
+    df_coeffs = None
+    if use_cache:
+        cache = get_coefficient_cache(params)
+        cache_key = rgsa_cache_key(df_processed, params, mask)
+        df_coeffs = cache.get(cache_key)
+        if df_coeffs is not None:
+            print("INFO: Koefisien RGSA diambil dari cache, Pass 1-2 dilewati.")
+
+    if df_coeffs is None:
+        # --- PASS 1 ---
+        df_gr_cap = calculate_dynamic_gr_cap(df_processed, params)
+        if df_gr_cap is None or df_gr_cap.empty:
+            print("❌ RGSA calculation failed at Pass 1. Returning original DataFrame.")
+            return df_processed
+
+        # --- PASS 2 ---
+        df_coeffs = calculate_regression_coefficients(df_processed, df_gr_cap, params)
+        if df_coeffs is None or df_coeffs.empty:
+            print("❌ RGSA calculation failed at Pass 2. Returning original DataFrame.")
+            return df_processed
+
+        if use_cache:
+            cache.put(cache_key, df_coeffs)
 
     # --- PASS 3 ---
     result_df = calculate_and_merge_rgsa(df_processed, df_coeffs, params)
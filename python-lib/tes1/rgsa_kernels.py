@@ -0,0 +1,256 @@
+# File: services/rgsa_kernels.py
+# Description: Kernel komputasi untuk tiga pass RGSA. Menggunakan numba bila
+# tersedia, dengan fallback NumPy murni yang memberi hasil sama.
+
+import os
+
+import numpy as np
+
+from services.gsa_engine import solve_normal_equations
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba bersifat opsional
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# Cache kompilasi numba hanya bila NUMBA_CACHE_DIR diatur: tanpa itu numba
+# menulis di samping source plugin, yang bisa read-only saat terpasang.
+NUMBA_CACHE = bool(os.environ.get('NUMBA_CACHE_DIR'))
+
+
+def resolve_backend(backend: str = 'auto') -> str:
+    """Memilih backend: 'numba' bila tersedia (atau diminta), selain itu 'numpy'."""
+    backend = (backend or 'auto').lower()
+    if backend == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        print("Peringatan: numba tidak terpasang, memakai backend NumPy.")
+        return 'numpy'
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"Backend RGSA tidak dikenal: {backend}")
+    return backend
+
+
+# --- PASS 1: GR cap per chunk ---
+
+def _gr_cap_numpy(depth, gr, npoints):
+    n = len(gr)
+    n_full = n // npoints
+    caps, depths = [], []
+    if n_full:
+        gr_full = gr[:n_full * npoints].reshape(n_full, npoints)
+        depth_full = depth[:n_full * npoints].reshape(n_full, npoints)
+        caps.append(np.quantile(gr_full, 0.98, axis=1))
+        depths.append(np.median(depth_full, axis=1))
+    tail = n - n_full * npoints
+    if tail and tail >= npoints / 2:
+        caps.append([np.quantile(gr[n_full * npoints:], 0.98)])
+        depths.append([np.median(depth[n_full * npoints:])])
+    if not caps:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(depths), np.concatenate(caps)
+
+
+def _linear_quantile(sorted_values, q):
+    pos = q * (len(sorted_values) - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _gr_cap_loop(depth, gr, npoints):
+    n = len(gr)
+    n_chunks = (n + npoints - 1) // npoints
+    out_depth = np.empty(n_chunks)
+    out_cap = np.empty(n_chunks)
+    count = 0
+    for start in range(0, n, npoints):
+        stop = min(start + npoints, n)
+        if stop - start < npoints / 2:
+            continue
+        out_cap[count] = _linear_quantile(np.sort(gr[start:stop]), 0.98)
+        out_depth[count] = _linear_quantile(np.sort(depth[start:stop]), 0.5)
+        count += 1
+    return out_depth[:count], out_cap[:count]
+
+
+# --- PASS 2: momen tercentering per tumbling window ---
+
+def _window_moments_numpy(x, y, npoints, min_points):
+    n = len(x)
+    starts = np.arange(0, n, npoints)
+    counts = np.minimum(starts + npoints, n) - starts
+    keep = counts >= min_points
+    starts, counts = starts[keep], counts[keep]
+    if len(starts) == 0:
+        return starts, counts, np.empty((0, 3, 3)), np.empty((0, 3)), np.empty(0), \
+            np.empty((0, 3)), np.empty(0)
+
+    # Hanya sampel di dalam jendela yang dipakai (jendela terakhir bisa pendek)
+    window_id = np.repeat(np.arange(len(starts)), counts)
+    rows = np.concatenate([np.arange(s, s + c) for s, c in zip(starts, counts)]) \
+        if not keep.all() else np.arange(n)
+    X = np.column_stack([x[rows], x[rows]**2, x[rows]**3])
+    yw = y[rows]
+    seg_starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    mean_x = np.add.reduceat(X, seg_starts, axis=0) / counts[:, None]
+    mean_y = np.add.reduceat(yw, seg_starts) / counts
+    Xc = X - mean_x[window_id]
+    yc = yw - mean_y[window_id]
+    sxx = np.add.reduceat(Xc[:, :, None] * Xc[:, None, :], seg_starts, axis=0)
+    sxy = np.add.reduceat(Xc * yc[:, None], seg_starts, axis=0)
+    syy = np.add.reduceat(yc * yc, seg_starts)
+    return starts, counts, sxx, sxy, syy, mean_x, mean_y
+
+
+def _window_moments_loop(x, y, npoints, min_points):
+    n = len(x)
+    n_windows = (n + npoints - 1) // npoints
+    starts = np.empty(n_windows, dtype=np.int64)
+    counts = np.empty(n_windows, dtype=np.int64)
+    sxx = np.zeros((n_windows, 3, 3))
+    sxy = np.zeros((n_windows, 3))
+    syy = np.zeros(n_windows)
+    mean_x = np.zeros((n_windows, 3))
+    mean_y = np.zeros(n_windows)
+    feats = np.empty(3)
+    w = 0
+    for start in range(0, n, npoints):
+        stop = min(start + npoints, n)
+        m = stop - start
+        if m < min_points:
+            continue
+        for i in range(start, stop):
+            mean_x[w, 0] += x[i]
+            mean_x[w, 1] += x[i] ** 2
+            mean_x[w, 2] += x[i] ** 3
+            mean_y[w] += y[i]
+        for k in range(3):
+            mean_x[w, k] /= m
+        mean_y[w] /= m
+        for i in range(start, stop):
+            feats[0] = x[i] - mean_x[w, 0]
+            feats[1] = x[i] ** 2 - mean_x[w, 1]
+            feats[2] = x[i] ** 3 - mean_x[w, 2]
+            yc = y[i] - mean_y[w]
+            for a in range(3):
+                sxy[w, a] += feats[a] * yc
+                for b in range(3):
+                    sxx[w, a, b] += feats[a] * feats[b]
+            syy[w] += yc * yc
+        starts[w] = start
+        counts[w] = m
+        w += 1
+    return starts[:w], counts[:w], sxx[:w], sxy[:w], syy[:w], mean_x[:w], mean_y[:w]
+
+
+# --- PASS 3: interpolasi koefisien + evaluasi kubik (fused) ---
+
+def _evaluate_loop(depth, gr, knots, table):
+    n = len(depth)
+    out = np.empty(n)
+    last = len(knots) - 1
+    for i in range(n):
+        d = depth[i]
+        if np.isnan(d) or np.isnan(gr[i]):
+            out[i] = np.nan
+            continue
+        if d <= knots[0]:
+            b0, b1, b2, b3 = table[0, 0], table[0, 1], table[0, 2], table[0, 3]
+        elif d >= knots[last]:
+            b0, b1, b2, b3 = table[last, 0], table[last, 1], table[last, 2], table[last, 3]
+        else:
+            hi = np.searchsorted(knots, d, side='right')
+            lo = hi - 1
+            t = (d - knots[lo]) / (knots[hi] - knots[lo])
+            b0 = table[lo, 0] + t * (table[hi, 0] - table[lo, 0])
+            b1 = table[lo, 1] + t * (table[hi, 1] - table[lo, 1])
+            b2 = table[lo, 2] + t * (table[hi, 2] - table[lo, 2])
+            b3 = table[lo, 3] + t * (table[hi, 3] - table[lo, 3])
+        g = 0.01 * gr[i]
+        out[i] = 10.0 ** (b0 + b1 * g + b2 * g * g + b3 * g * g * g)
+    return out
+
+
+def _evaluate_numpy(depth, gr, knots, table):
+    b0, b1, b2, b3 = (np.interp(depth, knots, table[:, k]) for k in range(4))
+    grfix = 0.01 * gr
+    out = 10**(b0 + b1 * grfix + b2 * grfix**2 + b3 * grfix**3)
+    out[np.isnan(gr)] = np.nan
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _linear_quantile = numba.njit(cache=NUMBA_CACHE)(_linear_quantile)
+    _gr_cap_loop = numba.njit(cache=NUMBA_CACHE)(_gr_cap_loop)
+    _window_moments_loop = numba.njit(cache=NUMBA_CACHE)(_window_moments_loop)
+    _evaluate_loop = numba.njit(cache=NUMBA_CACHE)(_evaluate_loop)
+
+
+def compute_gr_caps(depth, gr, npoints: int, backend: str = 'auto'):
+    """
+    Pass 1: persentil-98 GR dan median kedalaman untuk setiap chunk tumbling
+    sepanjang npoints. Chunk yang lebih pendek dari npoints/2 dilewati.
+
+    Returns:
+        tuple: (median kedalaman per chunk, GR_MAX per chunk).
+    """
+    depth = np.ascontiguousarray(depth, dtype=np.float64)
+    gr = np.ascontiguousarray(gr, dtype=np.float64)
+    if resolve_backend(backend) == 'numba':
+        return _gr_cap_loop(depth, gr, int(npoints))
+    return _gr_cap_numpy(depth, gr, int(npoints))
+
+
+def fit_tumbling_windows(x, y, npoints: int, min_points: int = 30, backend: str = 'auto') -> dict:
+    """
+    Pass 2: regresi kubik y ~ [x, x^2, x^3] untuk setiap tumbling window.
+
+    Momen tercentering tiap jendela dihitung oleh kernel (numba atau NumPy),
+    lalu seluruh persamaan normal diselesaikan dalam satu panggilan batched.
+    Hasil setara dengan LinearRegression().fit(X, y) dan model.score(X, y).
+
+    Returns:
+        dict: 'start' (indeks awal jendela), 'n_points', 'coefs' (W, 4: b0..b3)
+        dan 'r2'.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if resolve_backend(backend) == 'numba':
+        moments = _window_moments_loop(x, y, int(npoints), int(min_points))
+    else:
+        moments = _window_moments_numpy(x, y, int(npoints), int(min_points))
+    starts, counts, sxx, sxy, syy, mean_x, mean_y = moments
+
+    if len(starts) == 0:
+        return {'start': starts, 'n_points': counts, 'coefs': np.empty((0, 4)), 'r2': np.empty(0)}
+
+    slopes = solve_normal_equations(sxx, sxy)
+    intercept = mean_y - np.einsum('wi,wi->w', mean_x, slopes)
+    ss_res = syy - np.einsum('wi,wi->w', slopes, sxy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(syy > 0, 1 - ss_res / syy, 1.0)
+    return {
+        'start': starts,
+        'n_points': counts,
+        'coefs': np.column_stack([intercept, slopes]),
+        'r2': r2,
+    }
+
+
+def evaluate_rgsa(depth, gr, knots, table, backend: str = 'auto') -> np.ndarray:
+    """
+    Pass 3: interpolasi linear koefisien terhadap kedalaman (di-clamp pada
+    ujung) lalu RGSA = 10**(b0 + b1*g + b2*g^2 + b3*g^3), g = 0.01*GR.
+    NaN bila GR kosong.
+    """
+    depth = np.ascontiguousarray(depth, dtype=np.float64)
+    gr = np.ascontiguousarray(gr, dtype=np.float64)
+    knots = np.ascontiguousarray(knots, dtype=np.float64)
+    table = np.ascontiguousarray(table, dtype=np.float64)
+    if resolve_backend(backend) == 'numba':
+        return _evaluate_loop(depth, gr, knots, table)
+    return _evaluate_numpy(depth, gr, knots, table)
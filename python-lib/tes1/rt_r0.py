@@ -9,6 +9,9 @@ import pandas as pd
 import numpy as np
 import pandas as pd
 
+from services.result_writeback import write_back_columns
+from services.segments import grouped_slope
+
 
 def calculate_iqual(df):
     """
@@ -57,47 +60,38 @@ def analyze_rtr0_groups(df):
     """
     Menganalisis gradien untuk setiap grup data reservoir (IQUAL=1).
     """
-    results_rtr0 = []
     # Proses hanya pada data di mana IQUAL = 1
-    df_reservoir = df[df['IQUAL'] == 1].copy()
+    df_reservoir = df[df['IQUAL'] == 1]
 
     if df_reservoir.empty or 'GROUP_ID' not in df_reservoir.columns:
         return pd.DataFrame()
 
-    for group_id, group in df_reservoir.groupby('GROUP_ID'):
-        n = len(group)
-        if n <= 1:
-            continue
-
-        # Perhitungan gradien RT vs R0
-        sxa = group['R0'].sum()
-        sya = group['RT'].sum()
-        sxya = (group['R0'] * group['RT']).sum()
-        sx2a = (group['R0']**2).sum()
-        denominator_a = (sxa * sxa - n * sx2a)
-        slope_rt2r0 = (sxa * sya - n * sxya) / \
-            denominator_a if denominator_a != 0 else np.nan
-
-        # Perhitungan gradien PHIE vs RTR0
-        sxb = group['PHIE'].sum()
-        syb = group['RTR0'].sum()
-        sxyb = (group['PHIE'] * group['RTR0']).sum()
-        sx2b = (group['PHIE']**2).sum()
-        denominator_b = (sxb * sxb - n * sx2b)
-        slope_phie2rtr0 = (sxb * syb - n * sxyb) / \
-            denominator_b if denominator_b != 0 else np.nan
-
-        fluid_rtrophie = 'G' if slope_phie2rtr0 > 0 else 'W' if not pd.isna(
-            slope_phie2rtr0) else np.nan
-
-        results_rtr0.append({
-            'GROUP_ID': group_id,
-            'RT_R0_GRAD': slope_rt2r0,
-            'PHIE_RTR0_GRAD': slope_phie2rtr0,
-            'FLUID_RTROPHIE': fluid_rtrophie
-        })
-
-    return pd.DataFrame(results_rtr0) if results_rtr0 else pd.DataFrame()
+    # Jumlah per grup untuk kedua gradien dihitung sekaligus dengan np.bincount
+    codes, group_ids = pd.factorize(df_reservoir['GROUP_ID'], sort=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    n, slope_rt2r0 = grouped_slope(
+        codes, df_reservoir['R0'].to_numpy(dtype=float)[valid],
+        df_reservoir['RT'].to_numpy(dtype=float)[valid], len(group_ids))
+    _, slope_phie2rtr0 = grouped_slope(
+        codes, df_reservoir['PHIE'].to_numpy(dtype=float)[valid],
+        df_reservoir['RTR0'].to_numpy(dtype=float)[valid], len(group_ids))
+
+    # Hanya grup dengan lebih dari satu titik
+    keep = n > 1
+    if not keep.any():
+        return pd.DataFrame()
+    slope_rt2r0, slope_phie2rtr0 = slope_rt2r0[keep], slope_phie2rtr0[keep]
+
+    fluid_rtrophie = np.where(slope_phie2rtr0 > 0, 'G', 'W').astype(object)
+    fluid_rtrophie[np.isnan(slope_phie2rtr0)] = np.nan
+
+    return pd.DataFrame({
+        'GROUP_ID': np.asarray(group_ids)[keep],
+        'RT_R0_GRAD': slope_rt2r0,
+        'PHIE_RTR0_GRAD': slope_phie2rtr0,
+        'FLUID_RTROPHIE': pd.Series(fluid_rtrophie).infer_objects().to_numpy()
+    })
 
 
 def process_rt_r0(df: pd.DataFrame, params: dict = None, target_intervals: list = None, target_zones: list = None) -> pd.DataFrame:
@@ -141,10 +135,13 @@ def process_rt_r0(df: pd.DataFrame, params: dict = None, target_intervals: list
         df_results_rtr0 = analyze_rtr0_groups(df_to_process)
 
         if not df_results_rtr0.empty:
-            df_to_process = df_to_process.merge(
-                df_results_rtr0, on='GROUP_ID', how='left')
+            # Broadcast hasil per grup tanpa merge agar index asli tetap terjaga
+            group_results = df_results_rtr0.set_index('GROUP_ID')
+            for col in group_results.columns:
+                df_to_process[col] = df_to_process['GROUP_ID'].map(
+                    group_results[col])
 
-        # 3. Gabungkan hasilnya kembali ke DataFrame lengkap
+        # 3. Tulis hasilnya kembali ke DataFrame lengkap
         # Kolom yang akan di-update atau ditambahkan
         result_cols = [
             'IQUAL', 'R0', 'RTR0', 'GROUP_ID',
@@ -157,18 +154,8 @@ def process_rt_r0(df: pd.DataFrame, params: dict = None, target_intervals: list
         # Hapus kolom lama dari df_final untuk menghindari konflik
         df_final = df_final.drop(columns=cols_to_merge, errors='ignore')
 
-        # Gunakan 'DEPTH' sebagai kunci unik untuk merge
-        if 'DEPTH' in df_to_process.columns:
-            df_final = pd.merge(
-                df_final,
-                df_to_process[['DEPTH'] + cols_to_merge],
-                on='DEPTH',
-                how='left'
-            )
-        else:
-            print(
-                "Error: Kolom 'DEPTH' tidak ditemukan, tidak dapat menggabungkan hasil.")
-            return df
+        # Tulis hasil kembali berdasarkan posisi baris (index asli)
+        write_back_columns(df_final, df_to_process, cols_to_merge)
 
         return df_final
 
@@ -0,0 +1,86 @@
+# File: services/segments.py
+# Description: Primitif run-length untuk data log: mencari interval kontigu
+# (run) dari sebuah kondisi, menjumlahkan nilai per run, dan menyebarkan hasil
+# per run kembali ke setiap baris. Semua operasi linear-time dengan NumPy.
+
+import numpy as np
+
+
+def find_runs(condition) -> tuple:
+    """
+    Mencari run kontigu di mana condition bernilai True.
+
+    Returns:
+        tuple: (starts, lengths) sebagai array int, posisi awal dan panjang
+        setiap run, terurut dari atas ke bawah.
+    """
+    condition = np.asarray(condition, dtype=bool)
+    if condition.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], condition, [False])).astype(np.int8)))
+    starts, stops = edges[0::2], edges[1::2]
+    return starts, stops - starts
+
+
+def run_positions(starts, lengths) -> np.ndarray:
+    """Posisi baris dari semua run, digabung sesuai urutan run."""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+
+
+def run_sums(values, starts, lengths) -> np.ndarray:
+    """
+    Menjumlahkan values (N,) atau (N, K) untuk setiap run dengan np.add.reduceat.
+    NaN di dalam run membuat jumlah run tersebut NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if len(starts) == 0:
+        return np.zeros((0,) + values.shape[1:])
+    # Batas run diselingi (awal, akhir); baris nol di ujung agar akhir == N valid
+    padded = np.concatenate([values, np.zeros((1,) + values.shape[1:])])
+    bounds = np.column_stack([starts, starts + lengths]).ravel()
+    return np.add.reduceat(padded, bounds, axis=0)[0::2]
+
+
+def broadcast_runs(run_values, starts, lengths, n_rows: int, fill=np.nan) -> np.ndarray:
+    """
+    Menyebarkan nilai per run (R,) atau (R, K) ke setiap baris run dengan
+    np.repeat. Baris di luar run diisi fill.
+    """
+    run_values = np.asarray(run_values, dtype=float)
+    out = np.full((n_rows,) + run_values.shape[1:], fill, dtype=float)
+    out[run_positions(starts, lengths)] = np.repeat(run_values, lengths, axis=0)
+    return out
+
+
+def grouped_slope(group_codes, x, y, n_groups: int = None) -> tuple:
+    """
+    Slope least-squares y terhadap x untuk setiap grup dalam satu pass
+    np.bincount: slope = (sx*sy - n*sxy) / (sx^2 - n*sx2).
+
+    group_codes adalah kode grup 0..G-1 per baris. Seperti Series.sum(),
+    nilai NaN dihitung sebagai 0 tetapi barisnya tetap masuk ke n.
+
+    Returns:
+        tuple: (n per grup, slope per grup); slope NaN bila penyebut nol.
+    """
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if n_groups is None:
+        n_groups = int(group_codes.max()) + 1 if len(group_codes) else 0
+
+    def _sum(weights):
+        return np.bincount(group_codes, weights=np.where(np.isnan(weights), 0.0, weights),
+                           minlength=n_groups)
+
+    n = np.bincount(group_codes, minlength=n_groups)
+    sx, sy, sxy, sx2 = _sum(x), _sum(y), _sum(x * y), _sum(x**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = sx * sx - n * sx2
+        slope = np.where(denominator != 0, (sx * sy - n * sxy) / denominator, np.nan)
+    return n, slope
@@ -1,6 +1,136 @@
 import pandas as pd
 import numpy as np
 
+from services.depth_grid import DepthGrid, resample_curve
+
+
+# --- Engine splice N-run ---
+
+def _run_segment(df_run: pd.DataFrame, top: float, bottom: float) -> np.ndarray:
+    """(Internal) Posisi baris run dengan top <= DEPTH < bottom (urutan asli)."""
+    depth = df_run['DEPTH'].to_numpy()
+    return np.flatnonzero((depth >= top) & (depth < bottom))
+
+
+def _coalesce(df_run: pd.DataFrame, rows: np.ndarray, candidates: list) -> np.ndarray:
+    """
+    (Internal) Nilai kurva untuk baris terpilih: kolom kandidat pertama yang
+    tidak NaN (urutan prioritas), NaN bila tidak ada kolom yang tersedia.
+    """
+    values = np.full(len(rows), np.nan)
+    for col in candidates:
+        if col and col in df_run.columns:
+            column = df_run[col].to_numpy(dtype=float)[rows]
+            values = np.where(np.isnan(values), column, values)
+    return values
+
+
+def splice_runs(runs: list, splice_depths: list, curves: dict, sort: bool = True,
+                step: float = None, flag: bool = False, method: str = 'linear') -> pd.DataFrame:
+    """
+    Splice N run log secara berurutan dari atas ke bawah.
+
+    Run ke-k dipakai untuk splice_depths[k-1] <= DEPTH < splice_depths[k]
+    (run pertama tanpa batas atas, run terakhir tanpa batas bawah). Setiap
+    run hanya diiris sekali dengan array numpy; kurva output langsung ditulis
+    ke array hasil tanpa DataFrame gabungan sementara.
+
+    Args:
+        runs (list): DataFrame per run (urutan atas -> bawah), masing-masing
+            dengan kolom 'DEPTH'.
+        splice_depths (list): len(runs) - 1 kedalaman splice, menaik.
+        curves (dict): nama kolom output -> list kolom kandidat. Untuk setiap
+            baris, kandidat pertama yang tidak NaN di run asal baris itu dipakai.
+        sort (bool): Urutkan hasil berdasarkan DEPTH.
+        step (float, optional): Bila diisi, hasil di-resample ke grid DEPTH
+            kelipatan step (DepthGrid dengan origin 0, sehingga hasil splice
+            sumur lain dengan step sama cocok per indeks grid).
+        method (str): Metode resampling per run bila step diisi: 'linear',
+            'nearest' atau 'block'.
+        flag (bool): Tambahkan kolom MISSING_FLAG: 2 untuk baris di gap antar
+            run, 1 untuk baris lain yang punya kurva output NaN.
+
+    Returns:
+        pd.DataFrame: 'DEPTH', kolom-kolom curves, dan MISSING_FLAG bila flag=True.
+    """
+    if len(splice_depths) != len(runs) - 1:
+        raise ValueError("Jumlah splice depth harus satu lebih sedikit dari jumlah run.")
+    if any(b < a for a, b in zip(splice_depths, splice_depths[1:])):
+        raise ValueError("Splice depth harus menaik dari atas ke bawah.")
+    for df_run in runs:
+        if 'DEPTH' not in df_run.columns:
+            raise KeyError("Kolom 'DEPTH' tidak ditemukan di salah satu DataFrame input.")
+
+    bounds = [-np.inf, *[float(d) for d in splice_depths], np.inf]
+    segments = [_run_segment(df_run, bounds[k], bounds[k + 1]) for k, df_run in enumerate(runs)]
+    # Batas data tiap segmen (min, max) untuk penentuan gap antar run
+    extents = [(df_run['DEPTH'].to_numpy()[rows].min(), df_run['DEPTH'].to_numpy()[rows].max())
+               for df_run, rows in zip(runs, segments) if len(rows)]
+
+    if step is None:
+        depth = np.concatenate([df_run['DEPTH'].to_numpy()[rows] for df_run, rows in zip(runs, segments)])
+        # Segmen sudah berurutan; sort hanya bila ada run yang tidak menaik
+        order = None
+        if sort and len(depth) and not (np.diff(depth) >= 0).all():
+            order = np.argsort(depth, kind='quicksort')
+            depth = depth[order]
+        result = {'DEPTH': depth}
+        for col_out, candidates in curves.items():
+            values = np.concatenate([_coalesce(df_run, rows, candidates)
+                                     for df_run, rows in zip(runs, segments)])
+            result[col_out] = values[order] if order is not None else values
+    else:
+        step = float(step)
+        if step <= 0:
+            raise ValueError("Step resampling harus lebih besar dari nol.")
+        grid = DepthGrid.spanning([np.ravel(extents)], step)
+        depth = grid.depths
+        # Run k memiliki titik grid di [sd_{k-1}, sd_k): rentang indeks yang berurutan
+        cuts = np.searchsorted(depth, np.asarray(bounds[1:-1], dtype=float), side='left')
+        cuts = np.concatenate([[0], cuts, [len(grid)]])
+        result = {'DEPTH': depth}
+        for col_out, candidates in curves.items():
+            values = np.full(len(grid), np.nan)
+            for k, (df_run, rows) in enumerate(zip(runs, segments)):
+                lo, hi = cuts[k], cuts[k + 1]
+                if hi > lo and len(rows):
+                    run_grid = DepthGrid(grid.origin, step, grid.start + lo, grid.start + hi)
+                    values[lo:hi] = resample_curve(df_run['DEPTH'].to_numpy(dtype=float)[rows],
+                                                   _coalesce(df_run, rows, candidates),
+                                                   run_grid, method)
+            result[col_out] = values
+
+    final_df = pd.DataFrame(result)
+    if flag:
+        depth = final_df['DEPTH'].to_numpy()
+        missing_flag = np.zeros(len(final_df), dtype=np.int64)
+        for (_, upper_max), (lower_min, _) in zip(extents, extents[1:]):
+            if lower_min > upper_max:
+                missing_flag[(depth > upper_max) & (depth < lower_min)] = 2
+        if curves:
+            any_missing = final_df[list(curves)].isnull().any(axis=1).to_numpy()
+            missing_flag[(missing_flag == 0) & any_missing] = 1
+        final_df['MISSING_FLAG'] = missing_flag
+    return final_df
+
+
+def _curves_from_params(params: dict, warn: bool = False) -> dict:
+    """(Internal) Pemetaan kurva output -> [kolom Run 1, kolom Run 2] dari parameter frontend."""
+    curves = {}
+    for log_type in ('GR', 'NPHI', 'RHOB', 'RT'):
+        col_run1, col_run2, col_out = (params.get(f'{log_type}_RUN1'), params.get(f'{log_type}_RUN2'),
+                                       params.get(log_type))
+        if not all([col_run1, col_run2, col_out]):
+            if warn:
+                print(
+                    f"Peringatan: Parameter untuk log {log_type} tidak lengkap, melewati...")
+            continue
+        if warn:
+            print(
+                f"--> Menggabungkan {log_type}: '{col_run1}' (Run 1 - Atas) dan '{col_run2}' (Run 2 - Bawah) -> '{col_out}'")
+        curves[col_out] = [col_run1, col_run2]
+    return curves
+
 
 def splice_and_merge_logs(df_run1: pd.DataFrame, df_run2: pd.DataFrame, params: dict) -> pd.DataFrame:
     """
@@ -24,58 +154,17 @@ def splice_and_merge_logs(df_run1: pd.DataFrame, df_run2: pd.DataFrame, params:
     print(f"--> Memulai proses splicing pada kedalaman: {splice_depth}")
     print(f"--> LOGIKA BARU: Run 1 (atas), Run 2 (bawah)")
 
-    # --- 1. Splicing ---
-    # Pastikan 'DEPTH' ada dan atur sebagai index
+    # Pastikan 'DEPTH' ada
     if 'DEPTH' not in df_run1.columns or 'DEPTH' not in df_run2.columns:
         raise KeyError(
             "Kolom 'DEPTH' tidak ditemukan di salah satu DataFrame input.")
 
-    df_run1_indexed = df_run1.set_index('DEPTH')
-    df_run2_indexed = df_run2.set_index('DEPTH')
-
-    # Ambil bagian ATAS dari data RUN 1
-    upper_part = df_run1_indexed[df_run1_indexed.index < splice_depth]
-
-    # Ambil bagian BAWAH dari data RUN 2
-    lower_part = df_run2_indexed[df_run2_indexed.index >= splice_depth]
-
-    # Gabungkan keduanya. Pandas akan secara otomatis menyatukan semua kolom.
-    spliced_df = pd.concat([upper_part, lower_part], sort=True)
-    spliced_df.sort_index(inplace=True)
-    spliced_df.reset_index(inplace=True)
-    print("--> Splicing data mentah selesai.")
-
-    # --- 2. Merging (Penggabungan Kurva) ---
-    final_df = pd.DataFrame()
-    final_df['DEPTH'] = spliced_df['DEPTH']
-
-    # Mapping dari parameter frontend ke pasangan kolom input dan nama kolom output
-    curve_mapping = {
-        'GR':  (params.get('GR_RUN1'),  params.get('GR_RUN2'),  params.get('GR')),
-        'NPHI': (params.get('NPHI_RUN1'), params.get('NPHI_RUN2'), params.get('NPHI')),
-        'RHOB': (params.get('RHOB_RUN1'), params.get('RHOB_RUN2'), params.get('RHOB')),
-        'RT':  (params.get('RT_RUN1'),  params.get('RT_RUN2'),  params.get('RT')),
-    }
+    # Run 1 (atas) untuk DEPTH < splice depth, Run 2 (bawah) untuk sisanya;
+    # untuk setiap kurva, kolom Run 1 diprioritaskan lalu diisi kolom Run 2
+    final_df = splice_runs([df_run1, df_run2], [splice_depth], _curves_from_params(params, warn=True),
+                           sort=True)
 
-    for log_type, (col_run1, col_run2, col_out) in curve_mapping.items():
-        if not all([col_run1, col_run2, col_out]):
-            print(
-                f"Peringatan: Parameter untuk log {log_type} tidak lengkap, melewati...")
-            continue
-
-        print(
-            f"--> Menggabungkan {log_type}: '{col_run1}' (Run 1 - Atas) dan '{col_run2}' (Run 2 - Bawah) -> '{col_out}'")
-
-        # Ambil data dari kolom Run 1 (atas) dan Run 2 (bawah) jika ada
-        series_run1 = spliced_df[col_run1] if col_run1 in spliced_df else pd.Series(
-            index=spliced_df.index, dtype=float)
-        series_run2 = spliced_df[col_run2] if col_run2 in spliced_df else pd.Series(
-            index=spliced_df.index, dtype=float)
-
-        # Logika penggabungan: prioritaskan data dari Run 1 (atas), lalu isi kekosongan dengan Run 2 (bawah)
-        final_df[col_out] = series_run1.combine_first(series_run2)
-
-    print("--> Penggabungan semua kurva selesai.")
+    print("--> Splicing dan penggabungan semua kurva selesai.")
     return final_df
 
 
@@ -94,48 +183,13 @@ def splice_and_flag_logs(df_run1: pd.DataFrame, df_run2: pd.DataFrame, params: d
         raise ValueError(
             "Parameter SPLICEDEPTH atau max_consecutive_nan tidak valid.")
 
-    # --- 1. Splicing & Penentuan Batas Gap ---
     if 'DEPTH' not in df_run1.columns or 'DEPTH' not in df_run2.columns:
         raise KeyError("Kolom 'DEPTH' tidak ditemukan.")
 
-    df_run1_indexed = df_run1.set_index('DEPTH')
-    df_run2_indexed = df_run2.set_index('DEPTH')
-    upper_part = df_run1_indexed[df_run1_indexed.index < splice_depth]
-    lower_part = df_run2_indexed[df_run2_indexed.index >= splice_depth]
-    max_depth_upper = upper_part.index.max()
-    min_depth_bottom = lower_part.index.min()
-    spliced_df = pd.concat([upper_part, lower_part], sort=True).reset_index()
-
-    # --- 2. Merging Kurva ---
-    final_df = pd.DataFrame({'DEPTH': spliced_df['DEPTH']})
-    output_cols = []
-    curve_mapping = {
-        'GR':  (params.get('GR_RUN1'), params.get('GR_RUN2'), params.get('GR')),
-        'NPHI': (params.get('NPHI_RUN1'), params.get('NPHI_RUN2'), params.get('NPHI')),
-        'RHOB': (params.get('RHOB_RUN1'), params.get('RHOB_RUN2'), params.get('RHOB')),
-        'RT':  (params.get('RT_RUN1'), params.get('RT_RUN2'), params.get('RT')),
-    }
-    for _, (col_run1, col_run2, col_out) in curve_mapping.items():
-        if not all([col_run1, col_run2, col_out]):
-            continue
-        output_cols.append(col_out)
-        series_run1 = spliced_df[col_run1] if col_run1 in spliced_df else pd.Series(
-            dtype=float)
-        series_run2 = spliced_df[col_run2] if col_run2 in spliced_df else pd.Series(
-            dtype=float)
-        final_df[col_out] = series_run1.combine_first(series_run2)
-
-    # --- 3. Proses Flagging Tiga Tingkat ---
-    final_df['MISSING_FLAG'] = 0
-    if pd.notna(max_depth_upper) and pd.notna(min_depth_bottom) and min_depth_bottom > max_depth_upper:
-        gap_mask = (final_df['DEPTH'] > max_depth_upper) & (
-            final_df['DEPTH'] < min_depth_bottom)
-        final_df.loc[gap_mask, 'MISSING_FLAG'] = 2
-
-    not_flagged_as_gap = final_df['MISSING_FLAG'] == 0
-    missing_in_merged_logs = final_df[output_cols].isnull().any(axis=1)
-    final_flag_1_mask = not_flagged_as_gap & missing_in_merged_logs
-    final_df.loc[final_flag_1_mask, 'MISSING_FLAG'] = 1
+    # Splicing, merging dan flagging tiga tingkat dalam satu pass
+    final_df = splice_runs([df_run1, df_run2], [splice_depth], _curves_from_params(params),
+                           sort=False, flag=True)
+    output_cols = [col for col in final_df.columns if col not in ('DEPTH', 'MISSING_FLAG')]
 
     # # --- 4. Proses Fill Missing Opsional ---
     # if fill_option:
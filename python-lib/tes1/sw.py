@@ -48,6 +48,68 @@ def newton_simandoux(rt, ff, rwtemp, rtsh, vsh, n, opt='MODIFIED', c=1, max_iter
     return np.nan
 
 
+def newton_simandoux_array(rt, ff, rwtemp, rtsh, vsh, n, opt='MODIFIED', c=1, max_iter=20, tol=1e-5):
+    """
+    Array version of newton_simandoux: solves all depth samples at once.
+
+    Every element follows the same iteration as the scalar solver (start at
+    0.5, clamp at 0, stop when |delta| < tol, NaN when the derivative is zero
+    or max_iter is reached). Converged elements are dropped from the active
+    set, so later iterations only touch the samples that still move.
+    When n == 2 the equation is a quadratic and its positive root is used
+    directly; elements where it is not defined fall back to the iteration.
+
+    Returns:
+        np.ndarray of water saturation values
+    """
+    rt, ff, rwtemp, rtsh, vsh = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (rt, ff, rwtemp, rtsh, vsh)))
+    shape = rt.shape
+    rt, ff, rwtemp, rtsh, vsh = (v.ravel() for v in (rt, ff, rwtemp, rtsh, vsh))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if opt == 'MODIFIED':
+            g1 = 1 / (ff * rwtemp)
+            g2 = vsh / rtsh
+        else:  # Schlumberger
+            g1 = 1 / (ff * rwtemp * (1 - vsh))
+            g2 = (vsh ** c) / rtsh
+        g3 = -1 / rt
+
+        sw = np.full(rt.shape, np.nan)
+        pending = np.ones(rt.shape, dtype=bool)
+
+        if n == 2:
+            # g1*sw^2 + g2*sw + g3 = 0, positive root in cancellation-free form
+            root = -2 * g3 / (g2 + np.sqrt(g2 * g2 - 4 * g1 * g3))
+            solved = (g1 > 0) & np.isfinite(root) & (root >= 0)
+            sw[solved] = root[solved]
+            pending = ~solved
+
+        idx = np.flatnonzero(pending)
+        g1, g2, g3 = g1[idx], g2[idx], g3[idx]
+        s = np.full(len(idx), 0.5)
+        for _ in range(max_iter):
+            if len(idx) == 0:
+                break
+            fx = g1 * s ** n + g2 * s + g3
+            fxp = n * g1 * s ** (n - 1) + g2
+
+            zero_slope = fxp == 0
+            delta = fx / fxp
+            s = s - delta
+            s = np.where(s > 0, s, 0.0)  # Ensure sw stays positive
+
+            converged = ~zero_slope & (np.abs(delta) < tol)
+            sw[idx[converged]] = s[converged]
+
+            # Elements with zero slope stay NaN; the rest keep iterating
+            keep = ~(converged | zero_slope)
+            idx, g1, g2, g3, s = idx[keep], g1[keep], g2[keep], g3[keep], s[keep]
+
+    return sw.reshape(shape)
+
+
 def calculate_sw_simandoux(df: pd.DataFrame, params: dict, target_intervals: list = None, target_zones: list = None) -> pd.DataFrame:
     """
     Calculates Water Saturation (Simandoux) with internal filtering.
@@ -120,20 +182,22 @@ def calculate_sw_simandoux(df: pd.DataFrame, params: dict, target_intervals: lis
     df_processed[SW_COL] = np.nan
     df_processed['VOL_UWAT'] = np.nan
 
-    # Apply the calculation row-by-row only on the filtered data
-    def apply_newton(row):
-        if pd.isna(row["ILD"]) or pd.isna(row["PHIE"]) or pd.isna(row["VSH"]):
-            return np.nan
-        if row["PHIE"] < 0.005:
-            return 1.0
-        ff = A / (row["PHIE"] ** M)
-        return newton_simandoux(
-            rt=row["ILD"], ff=ff, rwtemp=row["RW_TEMP"], rtsh=RT_SH,
-            vsh=row["VSH"], n=N, opt=OPT_SIM, c=C
-        )
-
-    # Use .apply() for a cleaner, though not necessarily faster, implementation on the masked data
-    sw_values = df_processed[mask].apply(apply_newton, axis=1)
+    # Solve all filtered rows at once
+    df_masked = df_processed.loc[mask]
+    rt = df_masked["ILD"].to_numpy(dtype=float)
+    phie = df_masked["PHIE"].to_numpy(dtype=float)
+    vsh = df_masked["VSH"].to_numpy(dtype=float)
+    missing = np.isnan(rt) | np.isnan(phie) | np.isnan(vsh)
+    tight = ~missing & (phie < 0.005)
+    solve = ~missing & ~tight
+
+    sw_values = np.full(len(df_masked), np.nan)
+    sw_values[tight] = 1.0
+    sw_values[solve] = newton_simandoux_array(
+        rt=rt[solve], ff=A / (phie[solve] ** M),
+        rwtemp=df_masked["RW_TEMP"].to_numpy(dtype=float)[solve], rtsh=RT_SH,
+        vsh=vsh[solve], n=N, opt=OPT_SIM, c=C
+    )
 
     # Assign calculated values back to the main DataFrame using the mask
     df_processed.loc[mask, SW_COL] = sw_values
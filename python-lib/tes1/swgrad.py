@@ -43,6 +43,58 @@ def indonesia_computation(rw_in, phie, ct, a, m, n, rtsh, vsh):
     return max(0.0, min(1.0, swe))
 
 
+def indonesia_computation_array(rw_in, phie, ct, a, m, n, rtsh, vsh):
+    """
+    Versi array dari indonesia_computation: argumen di-broadcast sehingga
+    seluruh grid (baris x salinitas) dihitung sekaligus, dengan aturan yang
+    sama untuk input kosong, akar negatif, penyebut nol dan clipping 0-1.
+    """
+    rw_in, phie, ct, vsh = (np.asarray(v, dtype=float) for v in (rw_in, phie, ct, vsh))
+    rtsh = np.asarray(rtsh, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        ddd = 2 - vsh
+        aaa = vsh**ddd / rtsh
+        bbb = phie**m / (a * rw_in)
+
+        # Argumen akar negatif dianggap nol
+        sqrt_arg = (vsh**ddd * phie**m) / (a * rw_in * rtsh)
+        ccc = np.where(sqrt_arg < 0, 0.0, 2 * np.sqrt(np.where(sqrt_arg < 0, 0.0, sqrt_arg)))
+
+        denominator = aaa + bbb + ccc
+        base = ct / denominator
+        swe = base ** (1 / n)
+
+    # Penyebut ~0 atau basis negatif -> 1.0; hasil NaN juga menjadi 1.0
+    # (mengikuti max(0.0, min(1.0, nan)) pada versi skalar)
+    swe = np.where(np.isclose(denominator, 0) | (base < 0), 1.0, swe)
+    swe = np.clip(np.where(np.isnan(swe), 1.0, swe), 0.0, 1.0)
+
+    missing = np.isnan(vsh) | np.isnan(phie) | np.isnan(ct) | np.isnan(rtsh)
+    return np.where(missing, np.nan, swe)
+
+
+def swgrad_slope(sw_grid: np.ndarray) -> np.ndarray:
+    """
+    Gradien SW terhadap indeks salinitas (1..25) per baris, dari jumlah kolom
+    tertutup atas nilai yang tidak kosong. NaN bila kurang dari 2 titik.
+    """
+    x = np.arange(1, sw_grid.shape[1] + 1, dtype=float)
+    valid = ~np.isnan(sw_grid)
+    y = np.where(valid, sw_grid, 0.0)
+    n_grad = valid.sum(axis=1)
+    sx = valid @ x
+    sx2 = valid @ (x**2)
+    sy = y.sum(axis=1)
+    sxy = y @ x
+
+    denominator = sx * sx - n_grad * sx2
+    ok = (n_grad > 1) & (denominator != 0)
+    slope = np.full(len(sw_grid), np.nan)
+    slope[ok] = (sx[ok] * sy[ok] - n_grad[ok] * sxy[ok]) / denominator[ok]
+    return slope
+
+
 def process_swgrad(df: pd.DataFrame, params: dict = None, target_intervals: list = None, target_zones: list = None) -> pd.DataFrame:
     """
     Memproses perhitungan SWGRAD, dengan filter internal untuk interval/zona.
@@ -58,10 +110,6 @@ def process_swgrad(df: pd.DataFrame, params: dict = None, target_intervals: list
         df_processed.drop(columns=df_processed.columns.intersection(
             cols_to_drop), inplace=True)
 
-        # Inisialisasi kolom output dengan NaN
-        for col in cols_to_drop:
-            df_processed[col] = np.nan
-
         # Pastikan kolom input ada
         required_cols = ['RT', 'VSH', 'PHIE', 'DEPTH']
         if not all(col in df_processed.columns for col in required_cols):
@@ -69,7 +117,8 @@ def process_swgrad(df: pd.DataFrame, params: dict = None, target_intervals: list
                 "Peringatan: Kolom input (RT, VSH, PHIE, DEPTH) tidak lengkap. Melewatkan SWGRAD.")
             return df
 
-        df_processed['CT'] = 1 / df_processed['RT']
+        with np.errstate(divide='ignore'):
+            ct = 1 / df_processed['RT'].to_numpy(dtype=float)
 
         a = params.get('A', 1.0)
         m = params.get('M', 2.0)
@@ -91,46 +140,27 @@ def process_swgrad(df: pd.DataFrame, params: dict = None, target_intervals: list
         print(
             f"Memproses SWGRAD untuk {mask.sum()} dari {len(df_processed)} baris.")
 
-        # Loop hanya pada indeks yang dipilih oleh mask
-        for i in df_processed[mask].index:
-            sw = np.zeros(26)
-
-            # Ambil nilai sekali per baris untuk efisiensi
-            vsh_val = df_processed.at[i, 'VSH']
-            phie_val = df_processed.at[i, 'PHIE']
-            depth_val = df_processed.at[i, 'DEPTH']
-            ct_val = df_processed.at[i, 'CT']
-            ftemp_val = ftemp_const + 0.05 * depth_val
-
-            # Loop untuk 25 tingkat salinitas
-            for j in range(1, 26):
-                sal_j = j * 1000.0
-                x_j = 0.0123 + 3647.5 / (sal_j**0.955)
-                rw_in = x_j * 81.77 / (ftemp_val + 6.77)
-
-                sw[j] = indonesia_computation(
-                    rw_in, phie_val, ct_val, a, m, n, rtsh, vsh_val)
-                df_processed.at[i, f'SWARRAY_{j}'] = sw[j]
-
-            # Hitung gradien
-            sx, sx2, sy, sxy, n_grad = 0, 0, 0, 0, 0
-            for j in range(1, 26):
-                x_val, y_val = j, sw[j]
-                if not pd.isna(y_val):
-                    sx += x_val
-                    sx2 += x_val**2
-                    sy += y_val
-                    sxy += x_val * y_val
-                    n_grad += 1
-
-            if n_grad > 1:
-                denominator = (sx * sx - n_grad * sx2)
-                if denominator != 0:
-                    swgrad = (sx * sy - n_grad * sxy) / denominator
-                    df_processed.at[i, 'SWGRAD'] = swgrad
-
-        # Hapus kolom CT yang hanya sementara
-        df_processed.drop(columns=['CT'], inplace=True, errors='ignore')
+        # Grid Rw (baris x 25 salinitas) dan SW Indonesia dihitung sekaligus
+        rows = mask.to_numpy(dtype=bool)
+        salinity = np.arange(1, 26) * 1000.0
+        x_sal = 0.0123 + 3647.5 / (salinity**0.955)
+        ftemp = ftemp_const + 0.05 * df_processed['DEPTH'].to_numpy(dtype=float)[rows]
+        rw_grid = x_sal[None, :] * 81.77 / (ftemp[:, None] + 6.77)
+
+        sw_grid = indonesia_computation_array(
+            rw_grid,
+            df_processed['PHIE'].to_numpy(dtype=float)[rows, None],
+            ct[rows, None],
+            a, m, n, rtsh,
+            df_processed['VSH'].to_numpy(dtype=float)[rows, None])
+
+        # Tulis SWGRAD + SWARRAY_1..25 dalam satu blok
+        output = np.full((len(df_processed), len(cols_to_drop)), np.nan)
+        output[rows, 0] = swgrad_slope(sw_grid)
+        output[rows, 1:] = sw_grid
+        df_processed = pd.concat(
+            [df_processed, pd.DataFrame(output, index=df_processed.index, columns=cols_to_drop)],
+            axis=1)
 
         return df_processed
 
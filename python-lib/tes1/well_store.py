@@ -0,0 +1,152 @@
+# File: services/well_store.py
+# Description: Salinan kolumnar dari file LAS. Setiap LAS di-parse sekali
+# (read_las_data) lalu disimpan sebagai Parquet beserta metadata header (JSON
+# sidecar); pembacaan berikutnya lewat Parquet dengan proyeksi kolom. Salinan
+# dianggap usang bila mtime atau ukuran file sumber berubah.
+
+import hashlib
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from services.las_reader import read_las_data
+
+try:
+    import pyarrow  # noqa: F401  (engine Parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+DEFAULT_STORE_DIR = 'data/cache/well_store'
+STORE_VERSION = 2
+
+
+def _source_signature(path: str) -> dict:
+    """(Internal) Ukuran dan mtime file sumber untuk invalidasi."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _project(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """(Internal) Memilih kolom; kolom yang tidak ada menimbulkan KeyError seperti df[columns]."""
+    if columns is None:
+        return df
+    return df[list(columns)]
+
+
+class WellStore:
+    """
+    Penyimpanan kolumnar untuk file LAS. Data disimpan sebagai
+    <store_dir>/<hash path>.parquet dan header serta tanda tangan sumber di
+    <hash path>.json. Tanpa pyarrow, setiap pembacaan mem-parsing LAS langsung.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.conversions = 0
+
+    def _paths(self, las_path: str) -> Tuple[str, str]:
+        key = hashlib.blake2b(os.path.abspath(las_path).encode(), digest_size=16).hexdigest()
+        base = os.path.join(self.store_dir, key)
+        return f"{base}.parquet", f"{base}.json"
+
+    def _fresh_meta(self, las_path: str) -> Optional[dict]:
+        """(Internal) Metadata sidecar bila salinan masih sesuai dengan file sumber."""
+        data_path, meta_path = self._paths(las_path)
+        if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except Exception:
+            return None
+        if meta.get('store_version') != STORE_VERSION:
+            return None
+        if meta.get('source') != _source_signature(las_path):
+            return None
+        return meta
+
+    def _convert(self, las_path: str) -> Tuple[pd.DataFrame, dict]:
+        """(Internal) Parse LAS dan tulis salinan Parquet + sidecar."""
+        # Tanda tangan diambil sebelum parse: perubahan selama parse membuat salinan usang
+        signature = _source_signature(las_path)
+        df, header = read_las_data(las_path)
+        header['index'] = df.columns[0]
+        with self._lock:
+            self.conversions += 1
+        if not PARQUET_AVAILABLE:
+            return df, header
+
+        data_path, meta_path = self._paths(las_path)
+        meta = {'store_version': STORE_VERSION, 'source_path': os.path.abspath(las_path),
+                'source': signature, 'columns': [str(c) for c in df.columns], 'header': header}
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            df.to_parquet(data_path + tmp_suffix, index=False)
+            os.replace(data_path + tmp_suffix, data_path)
+            with open(meta_path + tmp_suffix, 'w') as f:
+                json.dump(meta, f, default=str)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except Exception as e:
+            # Direktori read-only atau disk penuh: tetap kembalikan hasil parse
+            print(f"Peringatan: Salinan kolumnar untuk {las_path} tidak disimpan: {e}")
+        return df, header
+
+    def read(self, las_path: str, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, dict]:
+        """
+        Membaca LAS sebagai DataFrame (sama dengan las.df().reset_index()).
+
+        Args:
+            las_path (str): Path file LAS.
+            columns (list, optional): Kolom yang dibaca; hanya kolom ini yang
+                diambil dari Parquet.
+
+        Returns:
+            tuple: (DataFrame, header dict seperti las_reader.parse_las_header).
+        """
+        if not os.path.exists(las_path):
+            raise FileNotFoundError(f"LAS file does not exist: {las_path}")
+        meta = self._fresh_meta(las_path) if PARQUET_AVAILABLE else None
+        if meta is None:
+            df, header = self._convert(las_path)
+            return _project(df, columns), header
+
+        missing = [c for c in (columns or []) if c not in meta['columns']]
+        if missing:
+            raise KeyError(f"Kolom {missing} tidak ada di {las_path}")
+        data_path, _ = self._paths(las_path)
+        df = pd.read_parquet(data_path, columns=list(columns) if columns is not None else None)
+        with self._lock:
+            self.hits += 1
+        return df, meta['header']
+
+    def header(self, las_path: str) -> dict:
+        """Header LAS; dari sidecar bila salinan masih segar, selain itu dikonversi dulu."""
+        meta = self._fresh_meta(las_path) if PARQUET_AVAILABLE else None
+        if meta is not None:
+            return meta['header']
+        return self.read(las_path)[1]
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_well_store(store_dir: str = DEFAULT_STORE_DIR) -> WellStore:
+    """Mengembalikan well store bersama untuk proses ini."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None or _default_store.store_dir != store_dir:
+            _default_store = WellStore(store_dir)
+        return _default_store
+
+
+def read_well(las_path: str, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, dict]:
+    """Membaca LAS lewat well store bersama. Lihat WellStore.read."""
+    return get_well_store().read(las_path, columns)
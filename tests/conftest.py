@@ -0,0 +1,14 @@
+# Modul plugin diimpor sebagai paket `services` (python-lib/tes1).
+import importlib.util
+import pathlib
+import sys
+
+SERVICES_DIR = pathlib.Path(__file__).resolve().parents[1] / 'python-lib' / 'tes1'
+
+if 'services' not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        'services', SERVICES_DIR / '__init__.py',
+        submodule_search_locations=[str(SERVICES_DIR)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['services'] = module
+    spec.loader.exec_module(module)
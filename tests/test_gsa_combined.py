@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.gsa import (
+    run_dgsa_analysis, run_gsa_combined_analysis, run_ngsa_analysis, run_rgsa_analysis)
+
+
+def _synthetic_well(seed: int, same_rows: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = 2000
+    gr = rng.uniform(0, 200, n)
+    df = pd.DataFrame({
+        'DEPTH': 1000 + np.arange(n) * 0.1524,
+        'GR': gr,
+        'RT': 10 ** (1.5 - gr / 150 + rng.normal(0, 0.2, n)),
+        'NPHI': 0.1 + gr / 600 + rng.normal(0, 0.03, n),
+        'RHOB': 2.6 - gr / 800 + rng.normal(0, 0.05, n),
+    })
+    for col in ['GR', 'RT', 'NPHI', 'RHOB']:
+        df.loc[rng.random(n) < 0.03, col] = np.nan
+    df.loc[300:500, 'NPHI'] = np.nan
+    df.loc[1200:1350, 'RHOB'] = np.nan
+    if same_rows:
+        df.loc[df['RHOB'].isna(), 'NPHI'] = np.nan
+        df.loc[df['NPHI'].isna(), 'RHOB'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('same_rows', [False, True])
+@pytest.mark.parametrize('regression_mode', ['batched', 'incremental'])
+def test_combined_matches_separate_calls(same_rows, regression_mode):
+    df = _synthetic_well(7, same_rows)
+    params = {'USE_COEFF_CACHE': False, 'REGRESSION_MODE': regression_mode}
+
+    combined = run_gsa_combined_analysis(df, params)
+    separate = [run_rgsa_analysis(df, params), run_ngsa_analysis(df, params),
+                run_dgsa_analysis(df, params)]
+
+    for result in separate:
+        added = [c for c in result.columns if c not in df.columns]
+        assert added
+        pd.testing.assert_frame_equal(combined[added], result[added])
+    assert combined[['NGSA', 'DGSA', 'RGSA']].notna().any().all()